@@ -1,60 +1,110 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-import os
-import shutil
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from typing import Optional
 
-from app.infrastructure.pdf_parser import extract_text
-from app.infrastructure.text_chunker import chunk_text
-from app.services.vector_service import add_document
+from app.infrastructure.upload_store import UploadTooLarge
+from app.compliance.policy_versioning import VersionExistsError, list_versions
+from app.services.document_service import delete_document, replace_document
+from app.services.ingestion_service import ingest_upload
 
 router = APIRouter(prefix="/documents", tags=["Documents"])
 
-UPLOAD_DIR = "data"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
 
 @router.post("/ingest")
-async def ingest_document(file: UploadFile = File(...)):
+async def ingest_document(
+    file: UploadFile = File(...),
+    version_id: Optional[str] = Form(None),
+    policy_id: Optional[str] = Form(None),
+    effective_from: Optional[str] = Form(None),
+    insurer: Optional[str] = Form(None),
+    product: Optional[str] = Form(None)
+):
     """
-    Ingests a PDF document:
-    - Saves file
-    - Extracts text (with OCR fallback)
-    - Splits into overlapping chunks
-    - Stores chunks in vector database
+    Ingests a PDF document through services.ingestion_service:
+    - Streams the file to content-addressed storage, enforcing the size
+      and page limits before parsing
+    - Extracts text (with OCR where needed)
+    - Splits into sentence-aligned, token-sized chunks that follow the
+      document's sections across pages (CHUNK_SEGMENTATION), recording
+      section path, page span and character offsets
+    - Embeds and stores chunks in vector database
+
+    When `version_id` is given the document is registered as that version
+    of `policy_id` (defaults to the filename); unchanged chunks are shared
+    with earlier versions instead of being re-embedded.
+
+    `insurer` and `product` are stored on every chunk so questions can be
+    scoped to them (see services.retrieval_scope).
     """
 
     if not file.filename.endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are supported.")
 
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
+    # Chroma rejects None metadata values, so only set tags that were given
+    scope_tags = {
+        key: value
+        for key, value in (("insurer", insurer), ("product", product))
+        if value
+    }
+    version = None
+    if version_id:
+        version = {"version_id": version_id, "policy_id": policy_id, "effective_from": effective_from}
+
+    try:
+        result = await ingest_upload(file, metadata=scope_tags, version=version)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except VersionExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    message = "Document version ingested successfully" if version else "Document ingested successfully"
+    return {"message": message, **result}
+
 
-    # Save uploaded file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+@router.put("/{source}")
+async def replace_source_document(
+    source: str,
+    file: UploadFile = File(...),
+    insurer: Optional[str] = Form(None),
+    product: Optional[str] = Form(None)
+):
+    """
+    Replace (or create) the document stored as `source`: the new file is
+    ingested first, then the old chunks are removed by id.
+    """
+    if not file.filename.endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only PDF files are supported.")
 
-    pages = extract_text(file_path)
+    scope_tags = {
+        key: value
+        for key, value in (("insurer", insurer), ("product", product))
+        if value
+    }
 
-    if not pages:
-        raise HTTPException(status_code=400, detail="No readable content found in PDF.")
+    try:
+        result = await replace_document(source, file, metadata=scope_tags)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    total_chunks = 0
+    return {"message": "Document replaced successfully", **result}
 
-    for page in pages:
-        if page["text"].strip():
-            chunks = chunk_text(page["text"])
 
-            for i, chunk in enumerate(chunks):
-                add_document(
-                    text=chunk,
-                    metadata={
-                        "source": file.filename,
-                        "page": page["page"],
-                        "chunk": i
-                    }
-                )
-                total_chunks += 1
+@router.delete("/{source}")
+def delete_source_document(source: str):
+    """Remove every chunk ingested from `source`."""
+    try:
+        result = delete_document(source)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown document: {source}")
+    return {"message": "Document deleted successfully", **result}
 
-    return {
-        "message": "Document ingested successfully",
-        "pages_processed": len(pages),
-        "chunks_created": total_chunks
-    }
+
+@router.get("/{policy_id}/versions")
+def get_policy_versions(policy_id: str):
+    versions = list_versions(policy_id)
+    if not versions:
+        raise HTTPException(status_code=404, detail=f"Unknown policy: {policy_id}")
+    return {"policy_id": policy_id, "versions": versions}
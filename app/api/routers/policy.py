@@ -1,13 +1,51 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Header, HTTPException, Query
+from typing import Optional
 from app.schemas.policy import QuestionRequest
 from app.services.rag_service import answer_question
+from app.services.retrieval_scope import scope_filter_for
+from app.explainability.decision_trace_builder import header_requests_trace
+from app.core.profiling import (
+    PROFILE_HEADER,
+    PROFILE_TOKEN_HEADER,
+    ProfilerBusy,
+    ProfilingNotAllowed,
+    call_with_optional_profile,
+    requested_mode,
+)
 
 router = APIRouter(prefix="/policy", tags=["Policy"])
 
 
 @router.post("/qa")
-def policy_qa(request: QuestionRequest):
-    return answer_question(
-        question=request.question,
-        session_id=request.session_id
-    )
+def policy_qa(
+    request: QuestionRequest,
+    x_trace_timing: Optional[str] = Header(None),
+    x_profile: Optional[str] = Header(None, alias=PROFILE_HEADER),
+    x_profile_token: Optional[str] = Header(None, alias=PROFILE_TOKEN_HEADER),
+    profile: Optional[str] = Query(None),
+    profile_token: Optional[str] = Query(None)
+):
+    try:
+        profile_mode = requested_mode(x_profile or profile, x_profile_token or profile_token)
+    except ProfilingNotAllowed as e:
+        raise HTTPException(status_code=403, detail=str(e))
+
+    try:
+        where = scope_filter_for(request)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        return call_with_optional_profile(
+            profile_mode,
+            "policy_qa",
+            answer_question,
+            question=request.question,
+            session_id=request.session_id,
+            where=where,
+            trace_timing=header_requests_trace(x_trace_timing)
+        )
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=429, detail=str(e))
@@ -0,0 +1,133 @@
+"""
+Vector index maintenance commands.
+
+Usage:
+    python -m app.cli.index info
+    python -m app.cli.index snapshot /backups/policies-2024-06-01.tar.gz
+    python -m app.cli.index restore /backups/policies-2024-06-01.tar.gz [--force]
+    python -m app.cli.index export /bundles/policies [--dtype float16]
+    python -m app.cli.index import /bundles/policies [--append]
+    python -m app.cli.index sources [--rebuild]
+
+Run restore while the API is stopped; it swaps the index directory.
+Export/import bundles are backend independent and refuse to load into a
+node configured with a different EMBEDDING_MODEL.
+"""
+
+import argparse
+import json
+import sys
+
+from app.core.config import settings
+
+
+def cmd_info(args):
+    from app.infrastructure.vector_store import get_vector_store, index_directory
+
+    store = get_vector_store()
+    info = {
+        "backend": settings.VECTOR_BACKEND,
+        "directory": index_directory(),
+        "collection": settings.DEFAULT_COLLECTION,
+        "embedding_model": settings.EMBEDDING_MODEL,
+        "count": store.count()
+    }
+    if hasattr(store, "shard_sizes"):
+        info["sharding"] = settings.VECTOR_SHARDING
+        info["shards"] = store.shard_sizes()
+
+    print(json.dumps(info, indent=2))
+
+
+def cmd_snapshot(args):
+    from app.infrastructure.index_snapshot import create_snapshot
+
+    manifest = create_snapshot(args.output)
+    print(f"✓ Snapshot of {manifest['count']} chunks written to {args.output}")
+
+
+def cmd_restore(args):
+    from app.infrastructure.index_snapshot import restore_snapshot
+
+    try:
+        manifest = restore_snapshot(args.archive, force=args.force)
+    except (ValueError, FileExistsError) as e:
+        print(f"✗ {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✓ Restored {manifest['count']} chunks from {args.archive} (created {manifest['created_at']})")
+
+
+def cmd_export(args):
+    from app.infrastructure.index_bundle import export_bundle
+
+    manifest = export_bundle(args.output, dtype=args.dtype)
+    print(f"✓ Exported {manifest['count']} chunks ({manifest['embedding_dim']}-d {manifest['dtype']}) to {args.output}")
+
+
+def cmd_import(args):
+    import time
+    from app.infrastructure.index_bundle import import_bundle
+
+    start = time.perf_counter()
+    try:
+        manifest = import_bundle(args.bundle, append=args.append)
+    except ValueError as e:
+        print(f"✗ {e}", file=sys.stderr)
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+    print(f"✓ Imported {manifest['count']} chunks in {elapsed:.1f}s "
+          f"(corpus snapshot {manifest['corpus_snapshot_id']})")
+
+
+def cmd_sources(args):
+    from app.infrastructure.source_index import get_source_index
+
+    if args.rebuild:
+        from app.services.document_service import rebuild_source_index
+        counts = rebuild_source_index()
+        print(f"✓ Source index rebuilt: {counts['sources']} documents, {counts['chunks']} chunks")
+        return
+
+    print(json.dumps(get_source_index().sources(), indent=2))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.index", description="Vector index maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    info = commands.add_parser("info", help="Show the configured index")
+    info.set_defaults(func=cmd_info)
+
+    snapshot = commands.add_parser("snapshot", help="Archive the index for seeding other nodes")
+    snapshot.add_argument("output", help="Archive path (.tar or .tar.gz)")
+    snapshot.set_defaults(func=cmd_snapshot)
+
+    restore = commands.add_parser("restore", help="Replace the index with a snapshot")
+    restore.add_argument("archive")
+    restore.add_argument("--force", action="store_true", help="Replace a non-empty index")
+    restore.set_defaults(func=cmd_restore)
+
+    export = commands.add_parser("export", help="Write the collection as a compact bundle")
+    export.add_argument("output", help="Bundle directory")
+    export.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    export.set_defaults(func=cmd_export)
+
+    load = commands.add_parser("import", help="Bulk-load a bundle into the collection")
+    load.add_argument("bundle", help="Bundle directory")
+    load.add_argument("--append", action="store_true", help="Load into a non-empty collection")
+    load.set_defaults(func=cmd_import)
+
+    sources = commands.add_parser("sources", help="List documents in the source -> chunk id index")
+    sources.add_argument("--rebuild", action="store_true", help="Rebuild it from chunk metadata")
+    sources.set_defaults(func=cmd_sources)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Bulk-ingest a directory of policy PDFs.
+
+Usage:
+    python -m app.cli.ingest /data/acme-policies --insurer acme [--workers 4]
+    python -m app.cli.ingest /data/acme-policies --manifest /tmp/acme.jsonl
+
+Extraction, chunking and embedding (ingestion_service.prepare_document)
+run in worker processes; each finished document is written to the vector
+store from this process. Every indexed file is appended to a manifest, so
+re-running after a crash or Ctrl-C skips what is already done and picks
+up files that were added or changed since. A changed file replaces the
+chunks of its previous version: the new chunks are indexed first and the
+old ones dropped after, so the document stays searchable throughout. The
+corpus snapshot id is bumped once, at the end of the run.
+
+Chunks record the file's path relative to the directory as "source".
+Each worker loads its own embedding model; size --workers to memory.
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Tuple
+
+from app.core.config import settings
+
+
+# ============================================================
+# MANIFEST
+# ============================================================
+
+def _default_manifest(directory: str) -> str:
+    slug = re.sub(r"[^a-zA-Z0-9]+", "-", os.path.abspath(directory)).strip("-").lower()
+    return os.path.join(settings.UPLOAD_DIR, "ingest-manifests", f"{slug}.jsonl")
+
+
+def load_manifest(path: str) -> Dict[str, Dict[str, Any]]:
+    """Latest entry per source; a torn last line from a crash is ignored."""
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            done[entry["source"]] = entry
+    return done
+
+
+def _append_manifest(path: str, entry: Dict[str, Any]):
+    with open(path, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _file_key(file_path: str) -> Tuple[int, int]:
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ============================================================
+# WORKERS
+# ============================================================
+
+def _prepare(task: Tuple[str, str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Worker: hash + extract / segment / embed one file."""
+    from app.services.ingestion_service import prepare_document
+
+    file_path, source, metadata = task
+    try:
+        return {
+            "source": source,
+            "path": file_path,
+            "sha256": _sha256(file_path),
+            "prepared": prepare_document(file_path, source, metadata)
+        }
+    except Exception as e:
+        return {"source": source, "path": file_path, "error": f"{type(e).__name__}: {e}"}
+
+
+def _pending(directory: str, done: Dict[str, Dict[str, Any]]):
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if not name.lower().endswith(".pdf"):
+                continue
+            file_path = os.path.join(root, name)
+            source = os.path.relpath(file_path, directory).replace(os.sep, "/")
+            entry = done.get(source)
+            if entry and (entry["size"], entry["mtime_ns"]) == _file_key(file_path):
+                continue
+            yield file_path, source
+
+
+# ============================================================
+# RUN
+# ============================================================
+
+def _rates(started: float, totals: Dict[str, int]) -> str:
+    minutes = max(time.perf_counter() - started, 1e-9) / 60
+    return (f"{totals['docs'] / minutes:.1f} docs/min, {totals['pages'] / minutes:.0f} pages/min, "
+            f"{totals['chunks'] / minutes:.0f} chunks/min")
+
+
+def run(directory: str, manifest_path: str, workers: int, metadata: Dict[str, Any]) -> Dict[str, int]:
+    from app.compliance.policy_versioning import bump_snapshot
+    from app.infrastructure.source_index import get_source_index
+    from app.services.document_service import _drop_chunks, _remove_stored_file
+    from app.services.ingestion_service import index_prepared
+
+    os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+    done = load_manifest(manifest_path)
+    tasks = [(file_path, source, metadata) for file_path, source in _pending(directory, done)]
+    print(f"{len(done)} files already in the manifest, {len(tasks)} to ingest with {workers} workers")
+
+    totals = {"docs": 0, "pages": 0, "chunks": 0, "failed": 0}
+    if not tasks:
+        return totals
+
+    index = get_source_index()
+    started = time.perf_counter()
+    context = multiprocessing.get_context("spawn")
+
+    with context.Pool(processes=workers) as pool:
+        for item in pool.imap_unordered(_prepare, tasks):
+            if "error" in item:
+                totals["failed"] += 1
+                print(f"✗ {item['source']}: {item['error']}", file=sys.stderr)
+                continue
+
+            # Changed file, or a run that died between indexing and the manifest
+            previous = index.get(item["source"])
+            old_ids = index.chunk_ids(item["source"])
+
+            result = index_prepared(item["prepared"], item["path"], sha256=item["sha256"], bump=False)
+            if old_ids:
+                _drop_chunks(old_ids)
+            if previous and previous.get("path") != index.get(item["source"]).get("path"):
+                _remove_stored_file(previous)
+
+            size, mtime_ns = _file_key(item["path"])
+            _append_manifest(manifest_path, {
+                "source": item["source"],
+                "sha256": item["sha256"],
+                "size": size,
+                "mtime_ns": mtime_ns,
+                "pages": result["pages_processed"],
+                "chunks": result["chunks_created"],
+                "done_at": datetime.now(timezone.utc).isoformat()
+            })
+
+            totals["docs"] += 1
+            totals["pages"] += result["pages_processed"]
+            totals["chunks"] += result["chunks_created"]
+            print(f"✓ [{totals['docs'] + totals['failed']}/{len(tasks)}] {item['source']} "
+                  f"({result['chunks_created']} chunks) | {_rates(started, totals)}", flush=True)
+
+    if totals["docs"]:
+        bump_snapshot()
+    return totals
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.ingest", description="Bulk PDF ingestion")
+    parser.add_argument("directory", help="Directory searched recursively for *.pdf")
+    parser.add_argument("--workers", type=int, default=max((os.cpu_count() or 2) // 2, 1))
+    parser.add_argument("--manifest", help="Checkpoint file (default: under UPLOAD_DIR/ingest-manifests)")
+    parser.add_argument("--insurer", help="Stored on every chunk for scoped questions")
+    parser.add_argument("--product", help="Stored on every chunk for scoped questions")
+    parser.add_argument("--embed-batch-size", type=int, help="EMBEDDING_BATCH_SIZE for the workers")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        print(f"✗ Not a directory: {args.directory}", file=sys.stderr)
+        sys.exit(1)
+    if args.embed_batch_size:
+        # Spawned workers read settings from the environment
+        os.environ["EMBEDDING_BATCH_SIZE"] = str(args.embed_batch_size)
+
+    metadata = {key: value for key, value in (("insurer", args.insurer), ("product", args.product)) if value}
+    manifest = args.manifest or _default_manifest(args.directory)
+
+    started = time.perf_counter()
+    try:
+        totals = run(args.directory, manifest, args.workers, metadata)
+    except KeyboardInterrupt:
+        print(f"\n✗ Interrupted; re-run to resume from {manifest}", file=sys.stderr)
+        sys.exit(130)
+
+    print(f"✓ {totals['docs']} documents, {totals['pages']} pages, {totals['chunks']} chunks "
+          f"in {time.perf_counter() - started:.1f}s ({totals['failed']} failed); manifest {manifest}")
+    if totals["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
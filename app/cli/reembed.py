@@ -0,0 +1,91 @@
+"""
+Re-embed the vector collection with another embedding model.
+
+Usage:
+    python -m app.cli.reembed start nomic-embed-text --backend ollama [--max-rate 100]
+    python -m app.cli.reembed status policies-nomic-embed-text
+    python -m app.cli.reembed cutover policies-nomic-embed-text
+
+`start` copies into a new collection and can be interrupted and re-run;
+it resumes from its checkpoint. The API keeps serving the old collection
+until `cutover` has run and the workers are restarted.
+"""
+
+import argparse
+import json
+import sys
+
+from app.core.config import settings
+
+
+def cmd_start(args):
+    from app.services.reembedding import run_reembedding
+
+    try:
+        state = run_reembedding(
+            args.model,
+            backend=args.backend,
+            target_collection=args.target,
+            batch_size=args.batch_size,
+            max_rate=args.max_rate
+        )
+    except ValueError as e:
+        print(f"✗ {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✓ {state['copied']} chunks re-embedded into {state['target_collection']}; "
+          f"run `python -m app.cli.reembed cutover {state['target_collection']}` to switch")
+
+
+def cmd_status(args):
+    from app.services.reembedding import load_state
+
+    try:
+        print(json.dumps(load_state(args.target), indent=2))
+    except FileNotFoundError:
+        print(f"✗ No re-embedding job for {args.target}", file=sys.stderr)
+        sys.exit(1)
+
+
+def cmd_cutover(args):
+    from app.services.reembedding import cutover
+
+    try:
+        state = cutover(args.target)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"✗ {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✓ {state['target_collection']} ({state['model']}) is now active "
+          f"(final sync: {state['final_sync']}); restart the API workers to switch. "
+          f"Written to {settings.ACTIVE_INDEX_PATH}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.reembed", description="Embedding model migration")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    start = commands.add_parser("start", help="Copy the collection, re-embedded with a new model (resumable)")
+    start.add_argument("model", help="Target EMBEDDING_MODEL")
+    start.add_argument("--backend", help="Target EMBEDDING_BACKEND (default: current)")
+    start.add_argument("--target", help="Target collection name")
+    start.add_argument("--batch-size", type=int)
+    start.add_argument("--max-rate", type=float, help="Chunks per second, 0 for unthrottled")
+    start.set_defaults(func=cmd_start)
+
+    status = commands.add_parser("status", help="Show a job's checkpoint")
+    status.add_argument("target", help="Target collection name")
+    status.set_defaults(func=cmd_status)
+
+    switch = commands.add_parser("cutover", help="Final catch-up, then make the target active")
+    switch.add_argument("target", help="Target collection name")
+    switch.set_defaults(func=cmd_cutover)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
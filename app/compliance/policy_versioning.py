@@ -0,0 +1,409 @@
+"""
+Policy Versioning
+
+Stores policy wordings under explicit version ids and keeps a monotonically
+increasing corpus snapshot id. Every chunk records the snapshot range in which
+it is in force (first_snapshot..last_snapshot), so any version can be queried
+through a plain Chroma metadata filter, and chunks that survive a re-issue are
+shared between versions instead of being re-embedded.
+
+The registry file is shared by every process (API workers, the ingest and
+reembed CLIs). Writers read-modify-write it under an exclusive flock on
+<POLICY_REGISTRY_PATH>.lock; readers re-read it whenever the file changed.
+Each snapshot also appends the chunk ids it changed to
+<POLICY_REGISTRY_PATH>.changes.jsonl, so other processes can patch their
+in-memory lexical index instead of reloading the corpus.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import record_cache
+from app.infrastructure.lexical_index import get_lexical_index
+from app.infrastructure.vector_store import get_vector_store
+from app.services.vector_service import add_documents, update_metadatas
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+OPEN_SNAPSHOT = 2 ** 31 - 1  # last_snapshot of chunks still in force
+
+# Snapshot changelog: past this many ids an entry asks readers to reload,
+# and past this size the file is cut back to its newest entries
+_CHANGELOG_MAX_IDS = 50_000
+_CHANGELOG_MAX_BYTES = 8 * 1024 * 1024
+_CHANGELOG_KEEP = 1000
+
+_lock = threading.Lock()
+_cache_lock = threading.Lock()
+_registry: Optional[Dict[str, Any]] = None
+_registry_stamp = None
+
+
+class VersionExistsError(ValueError):
+    """The version id is already registered for the policy"""
+
+
+# ============================================================
+# REGISTRY PERSISTENCE
+# ============================================================
+
+def _read_file() -> Dict[str, Any]:
+    path = settings.POLICY_REGISTRY_PATH
+    if not os.path.exists(path):
+        return {"snapshot_id": 0, "policies": {}}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _load_registry() -> Dict[str, Any]:
+    """
+    The registry as last written by any process; read-only for callers.
+
+    Writes replace the file atomically, so readers never see a torn file
+    and need no lock (a shared lock would stall queries behind a version
+    registration that is still embedding).
+    """
+    global _registry, _registry_stamp
+
+    try:
+        stat = os.stat(settings.POLICY_REGISTRY_PATH)
+        # ctime as well: a restored registry may be copied in with its old mtime
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_ctime_ns, stat.st_size)
+    except FileNotFoundError:
+        stamp = None
+
+    with _cache_lock:
+        if _registry is None or stamp != _registry_stamp:
+            _registry = _read_file()
+            _registry_stamp = stamp
+        return _registry
+
+
+@contextmanager
+def _locked_registry():
+    """Exclusive read-modify-write of the registry across processes."""
+    path = settings.POLICY_REGISTRY_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    with _lock, open(path + ".lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield _read_file()
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _save_registry(registry: Dict[str, Any]):
+
+    path = settings.POLICY_REGISTRY_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    # Write-then-rename so a crash never leaves a truncated registry
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(registry, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _changelog_path() -> str:
+    return settings.POLICY_REGISTRY_PATH + ".changes.jsonl"
+
+
+def _commit_snapshot(registry: Dict[str, Any], snapshot_id: int, full: bool = False):
+    """
+    Log this process's chunk writes under `snapshot_id` and save the
+    registry at it. Call inside _locked_registry.
+    """
+    previous = registry["snapshot_id"]
+    index = get_lexical_index()
+    ids = index.drain_changes()
+    full = full or len(ids) > _CHANGELOG_MAX_IDS
+
+    # Logged before the registry moves, so a reader that sees the new id finds its entry
+    path = _changelog_path()
+    entry = {"snapshot_id": snapshot_id, "ids": None if full else ids}
+    with open(path, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+    if os.path.getsize(path) > _CHANGELOG_MAX_BYTES:
+        with open(path, "r") as f:
+            lines = f.readlines()[-_CHANGELOG_KEEP:]
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.writelines(lines)
+        os.replace(tmp_path, path)
+
+    registry["snapshot_id"] = snapshot_id
+    _save_registry(registry)
+    if not full:
+        index.advance(previous, snapshot_id)
+
+
+def current_snapshot_id() -> int:
+    """Corpus snapshot id; changes whenever indexed content changes."""
+    return _load_registry()["snapshot_id"]
+
+
+def snapshot_changes(since: int, until: int) -> Optional[List[str]]:
+    """
+    Chunk ids written after snapshot `since` up to and including `until`.
+
+    Returns:
+        The ids, or None when the changelog does not cover every snapshot
+        in between (trimmed, too large, or written before it existed)
+    """
+    try:
+        with open(_changelog_path(), "r") as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return None
+
+    changed = set()
+    expected = since + 1
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            # A line still being appended belongs to a later snapshot
+            continue
+        if not since < entry["snapshot_id"] <= until:
+            continue
+        if entry["snapshot_id"] != expected or entry["ids"] is None:
+            return None
+        changed.update(entry["ids"])
+        expected += 1
+
+    return sorted(changed) if expected == until + 1 else None
+
+
+def bump_snapshot(full: bool = False) -> int:
+    """
+    Advance the corpus snapshot id without registering a version.
+
+    Args:
+        full: The store was written around services.vector_service (e.g. a
+            bundle import), so readers must reload rather than patch
+    """
+    with _locked_registry() as registry:
+        _commit_snapshot(registry, registry["snapshot_id"] + 1, full=full)
+        return registry["snapshot_id"]
+
+
+# ============================================================
+# CHUNK IDENTITY
+# ============================================================
+
+def _content_hash(text: str) -> str:
+    normalized = " ".join(text.split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _chunk_id(policy_id: str, content_hash: str, first_snapshot: int) -> str:
+    key = f"{policy_id}\x00{content_hash}\x00{first_snapshot}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+# ============================================================
+# METADATA FILTERS
+# ============================================================
+
+def _live_filter(policy_id: str) -> Dict[str, Any]:
+    return {
+        "$and": [
+            {"policy_id": policy_id},
+            {"last_snapshot": OPEN_SNAPSHOT}
+        ]
+    }
+
+
+def snapshot_filter(snapshot_id: int, policy_id: str = None) -> Dict[str, Any]:
+    """Chroma `where` clause selecting chunks in force at a snapshot."""
+
+    conditions = [
+        {"first_snapshot": {"$lte": snapshot_id}},
+        {"last_snapshot": {"$gte": snapshot_id}}
+    ]
+    if policy_id is not None:
+        conditions.insert(0, {"policy_id": policy_id})
+
+    return {"$and": conditions}
+
+
+# ============================================================
+# VERSION LOOKUP
+# ============================================================
+
+def list_versions(policy_id: str) -> List[Dict[str, Any]]:
+    policy = _load_registry()["policies"].get(policy_id)
+    return list(policy["versions"]) if policy else []
+
+
+def resolve_version(
+    policy_id: str,
+    version_id: str = None,
+    as_of: str = None
+) -> Dict[str, Any]:
+    """
+    Find a registered version of a policy.
+
+    Args:
+        policy_id: The policy identifier
+        version_id: Exact version to return
+        as_of: ISO date; returns the version in force on that date
+
+    Returns:
+        The version record; the latest version if no selector is given
+
+    Raises:
+        KeyError: If the policy or a matching version is not registered
+    """
+    versions = list_versions(policy_id)
+    if not versions:
+        raise KeyError(f"Unknown policy: {policy_id}")
+
+    if version_id is not None:
+        for version in versions:
+            if version["version_id"] == version_id:
+                return version
+        raise KeyError(f"Unknown version {version_id} for policy {policy_id}")
+
+    if as_of is not None:
+        in_force = [
+            v for v in versions
+            if (v["effective_from"] or v["registered_at"]) <= as_of
+        ]
+        if not in_force:
+            raise KeyError(f"No version of {policy_id} in force on {as_of}")
+        return max(
+            in_force,
+            key=lambda v: (v["effective_from"] or v["registered_at"], v["snapshot_id"])
+        )
+
+    return versions[-1]
+
+
+def version_filter(
+    policy_id: str,
+    version_id: str = None,
+    as_of: str = None
+) -> Dict[str, Any]:
+    """Chroma `where` clause scoping a query to one policy version."""
+    version = resolve_version(policy_id, version_id=version_id, as_of=as_of)
+    return snapshot_filter(version["snapshot_id"], policy_id=policy_id)
+
+
+# ============================================================
+# VERSION REGISTRATION
+# ============================================================
+
+def register_version(
+    policy_id: str,
+    version_id: str,
+    chunks: List[Dict[str, Any]],
+    effective_from: str = None
+) -> Dict[str, Any]:
+    """
+    Index a new version of a policy.
+
+    Chunks whose text is unchanged from the live version keep their
+    existing vectors (and the metadata, e.g. page, of the version that
+    introduced them); only new text is embedded. Chunks missing from the
+    new wording are closed at the previous snapshot.
+
+    Args:
+        policy_id: Stable identifier of the policy (e.g. source filename)
+        version_id: Caller-chosen version label, unique per policy
+        chunks: [{"text": str, "metadata": dict}, ...]
+        effective_from: ISO date the wording takes effect
+
+    Returns:
+        The stored version record
+    """
+    with _locked_registry() as registry:
+        policy = registry["policies"].setdefault(policy_id, {"versions": []})
+
+        if any(v["version_id"] == version_id for v in policy["versions"]):
+            raise VersionExistsError(f"Version {version_id} already registered for {policy_id}")
+
+        snapshot_id = registry["snapshot_id"] + 1
+
+        store = get_vector_store()
+        live = store.get(
+            where=_live_filter(policy_id),
+            include=["metadatas"]
+        )
+        live_by_hash = {
+            meta["content_hash"]: (chunk_id, meta)
+            for chunk_id, meta in zip(live["ids"], live["metadatas"])
+        }
+
+        new_ids, new_texts, new_metas = [], [], []
+        kept = set()
+
+        for chunk in chunks:
+            content_hash = _content_hash(chunk["text"])
+
+            if content_hash in live_by_hash:
+                kept.add(content_hash)
+                continue
+            if content_hash in kept:
+                continue
+            kept.add(content_hash)
+
+            metadata = dict(chunk.get("metadata") or {})
+            metadata.update({
+                "policy_id": policy_id,
+                "version_id": version_id,
+                "content_hash": content_hash,
+                "first_snapshot": snapshot_id,
+                "last_snapshot": OPEN_SNAPSHOT
+            })
+
+            new_ids.append(_chunk_id(policy_id, content_hash, snapshot_id))
+            new_texts.append(chunk["text"])
+            new_metas.append(metadata)
+
+        retired = [
+            (chunk_id, meta)
+            for content_hash, (chunk_id, meta) in live_by_hash.items()
+            if content_hash not in kept
+        ]
+
+        if retired:
+            update_metadatas(
+                ids=[chunk_id for chunk_id, _ in retired],
+                metadatas=[
+                    {**meta, "last_snapshot": snapshot_id - 1}
+                    for _, meta in retired
+                ]
+            )
+
+        add_documents(new_texts, new_metas, ids=new_ids)
+        record_cache("chunk_embedding", hit=True, count=len(kept) - len(new_ids))
+        record_cache("chunk_embedding", hit=False, count=len(new_ids))
+
+        record = {
+            "version_id": version_id,
+            "snapshot_id": snapshot_id,
+            "effective_from": effective_from,
+            "registered_at": datetime.now(timezone.utc).isoformat(),
+            "chunks_total": len(kept),
+            "chunks_added": len(new_ids),
+            "chunks_shared": len(kept) - len(new_ids),
+            "chunks_retired": len(retired)
+        }
+
+        policy["versions"].append(record)
+        _commit_snapshot(registry, snapshot_id)
+
+        return record
@@ -1,11 +1,158 @@
+import json
+
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "AI Insurance Platform"
     CHROMA_PERSIST_DIR: str = "./chroma"
+    CHROMA_MODE: str = "persistent"  # persistent | ephemeral
+
+    # HNSW index (space/M/construction_ef only apply when a collection is
+    # created; search_ef can be changed on an existing collection).
+    # Use benchmarks/hnsw_sweep.py to pick values for a corpus.
+    HNSW_SPACE: str = "l2"  # l2 | cosine | ip
+    HNSW_M: int = 16
+    HNSW_CONSTRUCTION_EF: int = 100
+    HNSW_SEARCH_EF: int = 10
+
+    # Retrieval depth: candidates fetched, then kept after MMR
+    RETRIEVAL_K: int = 10
+    RERANK_TOP_K: int = 5
+
+    # BM25 lexical candidates fused with vector hits (reciprocal rank fusion)
+    LEXICAL_SEARCH_ENABLED: bool = True
+    LEXICAL_K: int = 10
+    BM25_K1: float = 1.5
+    BM25_B: float = 0.75
+    RRF_K: int = 60
+
+    # Pre-filter candidates to chunks tagged with the question's focus
+    # areas; topped up from the unfiltered search below this many hits
+    FOCUS_PREFILTER_ENABLED: bool = True
+    FOCUS_MIN_CANDIDATES: int = 5
+
+    # Optional cross-encoder rerank of the retrieved candidates. Falls back
+    # to MMR order when scoring exceeds RERANKER_TIMEOUT_MS; with it on,
+    # RETRIEVAL_K can usually come down.
+    RERANKER_ENABLED: bool = False
+    RERANKER_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANKER_MAX_LENGTH: int = 512
+    RERANKER_TIMEOUT_MS: float = 150.0
+    RERANKER_CACHE_SIZE: int = 20000
+    RERANKER_MAX_PENDING: int = 4  # queued + running batches; rerank skipped when full
     DEFAULT_COLLECTION: str = "policies"
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    # L2-normalize embeddings at encode time (stored chunks are flagged
+    # with metadata emb_normalized=True) so similarity is a dot product
+    EMBEDDING_NORMALIZE: bool = True
+
+    # Embedding runtime: torch | torch-int8 | onnx | onnx-int8 (see
+    # app.infrastructure.embeddings); 0 threads = runtime default
+    EMBEDDING_BACKEND: str = "torch"
+    EMBEDDING_THREADS: int = 0
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_ONNX_DIR: str = "./models/onnx"
+    EMBEDDING_ONNX_QUANTIZATION: str = "avx2"  # avx2 | avx512 | avx512_vnni | arm64
+    OLLAMA_HOST: str = ""  # empty = ollama client default
+
+    # Chunk size in embedding-model tokens, capped at the model's
+    # max_seq_length minus [CLS]/[SEP] (254 for all-MiniLM-L6-v2); whole
+    # sentences are packed, overlap is carried sentences
+    CHUNK_MAX_TOKENS: int = 256
+    CHUNK_OVERLAP_TOKENS: int = 48
+    CHUNK_TOKENIZER: str = "model"  # model | approx (word/punctuation count)
+    # "section" follows headings across page breaks (PDF layout: font size,
+    # bold, numbering); "page" chunks every page on its own
+    CHUNK_SEGMENTATION: str = "section"
+    SECTION_HEADING_SCALE: float = 1.15  # font size vs body text
+    SECTION_HEADING_MAX_CHARS: int = 120
+
+    # Source (uploaded filename) -> chunk ids, for delete / replace by source
+    SOURCE_INDEX_PATH: str = "./chroma/source_index.sqlite3"
+
+    # Per-document summaries built at ingestion, served for summary
+    # questions scoped to one source (app.services.document_summary)
+    DOC_SUMMARY_DIR: str = "./data/summaries"
+    DOC_SUMMARY_MAX_CLAUSES: int = 25  # per category
+    DOC_SUMMARY_CACHE_SIZE: int = 256
+
+    # Ingestion pipeline (app.services.ingestion_service): where extract /
+    # segment / embed run - inline | thread | process - and stage retries
+    INGEST_EXECUTOR: str = "thread"
+    INGEST_WORKERS: int = 2
+    INGEST_RETRIES: int = 2
+    INGEST_RETRY_BACKOFF: float = 0.5  # seconds, doubled per retry
+
+    # Uploaded PDFs, stored by SHA-256 (app.infrastructure.upload_store)
+    UPLOAD_DIR: str = "data"
+    UPLOAD_MAX_BYTES: int = 50 * 1024 * 1024
+    UPLOAD_MAX_PAGES: int = 1000
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+
+    # OCR of scanned pages / image regions (app.infrastructure.ocr).
+    # Results are cached by page content hash; "" disables the cache.
+    OCR_ENGINE: str = "tesseract"  # tesseract | none
+    OCR_LANGUAGE: str = "eng"  # tesseract languages, e.g. "eng+hin"
+    OCR_TESSERACT_CONFIG: str = "--oem 1 --psm 3"
+    OCR_CACHE_DIR: str = "./data/ocr_cache"
+    OCR_MIN_DPI: int = 150
+    OCR_MAX_DPI: int = 300
+    OCR_MIN_TEXT_CHARS: int = 50  # below this the text layer is treated as missing
+    OCR_MIN_IMAGE_FRACTION: float = 0.05  # of the page area; smaller images (logos) are ignored
+    OCR_SEARCHABLE_COVERAGE: float = 0.9  # text over an image this large is an OCR'd scan
+
+    # Written by a re-embedding cutover (python -m app.cli.reembed cutover);
+    # its collection / model settings override the ones above
+    ACTIVE_INDEX_PATH: str = "./chroma/active_index.json"
+    REEMBED_BATCH_SIZE: int = 256
+    REEMBED_MAX_RATE: float = 200.0  # chunks/sec, 0 = unthrottled
+
+    # Vector store backend: "chroma" or "mmap" (in-process, memory-mapped)
+    VECTOR_BACKEND: str = "chroma"
+    MMAP_INDEX_DIR: str = "./vector_index"
+    MMAP_INDEX_DTYPE: str = "float16"  # float16 | int8 | float32
+
+    # Sharding DEFAULT_COLLECTION over several stores: "none", "hash"
+    # (VECTOR_SHARD_COUNT shards by chunk id) or "tenant" (one shard per
+    # VECTOR_SHARD_TENANT_FIELD value). Changing it needs export/import.
+    VECTOR_SHARDING: str = "none"
+    VECTOR_SHARD_COUNT: int = 4
+    VECTOR_SHARD_TENANT_FIELD: str = "insurer"
+    VECTOR_SHARD_QUERY_WORKERS: int = 8
+
+    # Policy versioning
+    POLICY_REGISTRY_PATH: str = "./chroma/policy_versions.json"
+
+    # Fraction of QA requests that record per-stage timing in decision_trace
+    TRACE_SAMPLE_RATE: float = 0.0
+
+    # Prometheus /metrics (set PROMETHEUS_MULTIPROC_DIR for multi-worker)
+    METRICS_ENABLED: bool = True
+
+    # Opt-in per-request profiling (X-Profile header / ?profile= flag)
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: str = ""
+    PROFILE_DIR: str = "./profiles"
+    PROFILE_MAX_FILES: int = 50
+    PROFILE_TOP_N: int = 25
+
+
+# Settings a re-embedding cutover may switch
+ACTIVE_INDEX_KEYS = ("DEFAULT_COLLECTION", "MMAP_INDEX_DIR", "EMBEDDING_MODEL", "EMBEDDING_BACKEND")
+
+
+def _apply_active_index(settings: Settings):
+    try:
+        with open(settings.ACTIVE_INDEX_PATH, "r") as f:
+            active = json.load(f)
+    except FileNotFoundError:
+        return
+
+    for key in ACTIVE_INDEX_KEYS:
+        if key in active:
+            setattr(settings, key, active[key])
 
 
 settings = Settings()
+_apply_active_index(settings)
@@ -0,0 +1,165 @@
+"""
+Prometheus Metrics
+
+Request, pipeline-stage and ingestion metrics exposed on /metrics.
+
+When PROMETHEUS_MULTIPROC_DIR is set (one directory shared by all uvicorn
+workers on a node) prometheus_client records into per-process mmap files
+and the scrape aggregates every worker, so numbers are not tied to
+whichever worker happens to serve /metrics.
+"""
+
+import os
+
+import anyio
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+# ============================================================
+# REQUESTS & PIPELINE STAGES
+# ============================================================
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests currently being served",
+    multiprocess_mode="livesum"
+)
+
+STAGE_LATENCY = Histogram(
+    "pipeline_stage_duration_seconds",
+    "Wall time spent in each QA / ingestion pipeline stage",
+    ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+
+
+# ============================================================
+# INGESTION THROUGHPUT
+# ============================================================
+
+INGESTED_DOCUMENTS = Counter(
+    "ingestion_documents_total",
+    "Documents ingested"
+)
+
+INGESTED_PAGES = Counter(
+    "ingestion_pages_total",
+    "Pages extracted from ingested documents"
+)
+
+INGESTED_CHUNKS = Counter(
+    "ingestion_chunks_total",
+    "Chunks written to the vector store"
+)
+
+EMBEDDINGS_COMPUTED = Counter(
+    "embeddings_computed_total",
+    "Texts passed through the embedding model",
+    ["purpose"]
+)
+
+INGESTION_RETRIES = Counter(
+    "ingestion_stage_retries_total",
+    "Ingestion stages retried after a transient failure",
+    ["stage"]
+)
+
+OCR_PAGES = Counter(
+    "ocr_pages_total",
+    "Pages checked for OCR, by outcome (skipped | cached | ocr)",
+    ["outcome"]
+)
+
+
+# ============================================================
+# CACHES, EXECUTORS, VECTOR STORE
+# ============================================================
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "result"]
+)
+
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    "executor_queue_depth",
+    "Tasks waiting for a worker in each executor",
+    ["executor"],
+    multiprocess_mode="livesum"
+)
+
+RERANKER_FALLBACKS = Counter(
+    "reranker_fallbacks_total",
+    "Cross-encoder reranks abandoned for MMR order, by reason (timeout/busy/error)",
+    ["reason"]
+)
+
+VECTOR_COLLECTION_SIZE = Gauge(
+    "vector_collection_size",
+    "Number of chunks in the vector collection",
+    ["collection"],
+    multiprocess_mode="mostrecent"
+)
+
+
+# ============================================================
+# HELPERS
+# ============================================================
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_LATENCY.labels(stage=stage).observe(seconds)
+
+
+def record_cache(cache: str, hit: bool, count: int = 1):
+    if count:
+        CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc(count)
+
+
+def sample_threadpool_queue():
+    """Record how many sync handlers are waiting for a threadpool slot."""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    EXECUTOR_QUEUE_DEPTH.labels(executor="threadpool").set(
+        limiter.statistics().tasks_waiting
+    )
+
+
+def is_multiprocess() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def render_latest():
+    """Serialize all metrics; returns (payload, content_type)."""
+    if is_multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+    from prometheus_client import REGISTRY
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_worker_exit():
+    """Drop this worker's live gauges from the multiprocess aggregate."""
+    if is_multiprocess():
+        multiprocess.mark_process_dead(os.getpid())
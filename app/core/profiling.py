@@ -0,0 +1,165 @@
+"""
+Per-request Profiling
+
+Runs a single QA request under cProfile when the caller asks for it with
+the X-Profile header (or ?profile= query flag) and profiling is enabled in
+config. The profile is either returned inline as a top-N hot function
+summary or also dumped as a .prof file (loadable with pstats/snakeviz) into
+a directory capped at PROFILE_MAX_FILES. Requests that don't ask pay only
+a header check.
+"""
+
+import cProfile
+import os
+import pstats
+import re
+import secrets
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_MODES = ("inline", "file")
+
+# Only one profiler can be active per interpreter (sys.monitoring on 3.12+),
+# and it also caps the production overhead to one profiled request at a time.
+_profile_lock = threading.Lock()
+
+
+class ProfilingNotAllowed(Exception):
+    """Profiling was requested but is disabled or the token is wrong"""
+
+
+class ProfilerBusy(Exception):
+    """Another request is currently being profiled"""
+
+
+def requested_mode(value: Optional[str], token: Optional[str] = None) -> Optional[str]:
+    """
+    Validate a profiling request.
+
+    Args:
+        value: X-Profile header / ?profile= value ("inline", "file", or truthy)
+        token: X-Profile-Token header / ?profile_token= value
+
+    Returns:
+        "inline" or "file", or None if profiling was not requested
+
+    Raises:
+        ProfilingNotAllowed: If profiling is disabled or the token mismatches
+    """
+    if not value:
+        return None
+
+    if not settings.PROFILING_ENABLED:
+        raise ProfilingNotAllowed("Request profiling is disabled")
+
+    if settings.PROFILING_TOKEN and not secrets.compare_digest(
+        (token or "").encode("utf-8"), settings.PROFILING_TOKEN.encode("utf-8")
+    ):
+        raise ProfilingNotAllowed("Invalid profiling token")
+
+    mode = value.strip().lower()
+    return mode if mode in PROFILE_MODES else "inline"
+
+
+def _top_functions(stats: pstats.Stats, limit: int) -> List[Dict[str, Any]]:
+
+    rows = []
+    for (filename, line, function), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": function,
+            "file": filename,
+            "line": line,
+            "calls": ncalls,
+            "self_ms": round(tottime * 1000, 3),
+            "cumulative_ms": round(cumtime * 1000, 3)
+        })
+
+    rows.sort(key=lambda r: r["self_ms"], reverse=True)
+    return rows[:limit]
+
+
+def _prune_profile_dir(directory: str):
+    profiles = [
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.endswith(".prof")
+    ]
+    profiles.sort(key=os.path.getmtime)
+
+    for path in profiles[:max(0, len(profiles) - settings.PROFILE_MAX_FILES)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _write_profile(profiler: cProfile.Profile, label: str) -> str:
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+
+    safe_label = re.sub(r"[^A-Za-z0-9_.-]", "_", label)[:64]
+    path = os.path.join(
+        settings.PROFILE_DIR,
+        f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:8]}-{safe_label}.prof"
+    )
+    profiler.dump_stats(path)
+    _prune_profile_dir(settings.PROFILE_DIR)
+
+    return path
+
+
+def run_profiled(
+    mode: str,
+    label: str,
+    fn: Callable,
+    *args,
+    **kwargs
+) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Call `fn` under cProfile.
+
+    Returns:
+        (fn's result, profile summary dict)
+
+    Raises:
+        ProfilerBusy: If another request is being profiled right now
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("Another request is being profiled; retry shortly")
+
+    try:
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        result = profiler.runcall(fn, *args, **kwargs)
+        wall_ms = (time.perf_counter() - start) * 1000
+    finally:
+        _profile_lock.release()
+
+    stats = pstats.Stats(profiler)
+    summary = {
+        "mode": mode,
+        "wall_ms": round(wall_ms, 3),
+        "total_calls": stats.total_calls,
+        "top_functions": _top_functions(stats, settings.PROFILE_TOP_N)
+    }
+
+    if mode == "file":
+        summary["path"] = _write_profile(profiler, label)
+
+    return result, summary
+
+
+def call_with_optional_profile(mode: Optional[str], label: str, fn: Callable, **kwargs):
+    """Call `fn`; when `mode` is set, profile it and attach the summary."""
+    if mode is None:
+        return fn(**kwargs)
+
+    result, summary = run_profiled(mode, label, fn, **kwargs)
+    result["profile"] = summary
+    return result
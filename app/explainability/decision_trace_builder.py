@@ -0,0 +1,139 @@
+"""
+Decision Trace Builder
+
+Records per-stage wall-clock and CPU time for the QA pipelines so a slow
+request can be attributed to embedding, vector search, reranking, clause
+extraction or answer templating. Tracing is opt-in per request (header) or
+sampled. Every span also feeds the stage latency histogram on /metrics;
+with both tracing and metrics off a span is a shared no-op.
+"""
+
+import random
+import time
+from typing import Any, Dict, List
+
+from app.core.config import settings
+from app.core.metrics import observe_stage
+
+
+TRACE_HEADER = "X-Trace-Timing"
+_TRUTHY = {"1", "true", "yes", "on"}
+
+
+class _NullSpan:
+    """No-op span used when tracing and metrics are both disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _MetricSpan:
+    """Wall-clock only span for untraced requests; feeds /metrics"""
+
+    __slots__ = ("_name", "_wall")
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __enter__(self):
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe_stage(self._name, time.perf_counter() - self._wall)
+        return False
+
+
+class _Span:
+    """Times one pipeline stage and reports it to its builder"""
+
+    __slots__ = ("_builder", "_name", "_wall", "_cpu")
+
+    def __init__(self, builder: "DecisionTraceBuilder", name: str):
+        self._builder = builder
+        self._name = name
+
+    def __enter__(self):
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall
+        self._builder._record(self._name, wall, time.thread_time() - self._cpu)
+        if settings.METRICS_ENABLED:
+            observe_stage(self._name, wall)
+        return False
+
+
+class DecisionTraceBuilder:
+    """Collects timing spans for a single request"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._stages: List[Dict[str, Any]] = []
+        if enabled:
+            self._wall_start = time.perf_counter()
+            self._cpu_start = time.thread_time()
+
+    def span(self, name: str):
+        """Context manager timing one stage."""
+        if self.enabled:
+            return _Span(self, name)
+        if settings.METRICS_ENABLED:
+            return _MetricSpan(name)
+        return _NULL_SPAN
+
+    def _record(self, name: str, wall: float, cpu: float):
+        self._stages.append({
+            "stage": name,
+            "wall_ms": round(wall * 1000, 3),
+            "cpu_ms": round(cpu * 1000, 3)
+        })
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_wall_ms": round((time.perf_counter() - self._wall_start) * 1000, 3),
+            "total_cpu_ms": round((time.thread_time() - self._cpu_start) * 1000, 3),
+            "stages": list(self._stages)
+        }
+
+    def attach(self, decision_trace: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the timing block to a decision_trace dict if enabled."""
+        if self.enabled:
+            decision_trace["timing"] = self.to_dict()
+        return decision_trace
+
+
+NULL_TRACE = DecisionTraceBuilder(enabled=False)
+
+
+def header_requests_trace(value: str = None) -> bool:
+    """Interpret the X-Trace-Timing header value."""
+    return value is not None and value.strip().lower() in _TRUTHY
+
+
+def start_trace(requested: bool = False) -> DecisionTraceBuilder:
+    """
+    Begin a trace for one request.
+
+    Args:
+        requested: True when the caller explicitly asked for timing
+
+    Returns:
+        An active builder, or the shared disabled builder
+    """
+    if requested or (
+        settings.TRACE_SAMPLE_RATE > 0
+        and random.random() < settings.TRACE_SAMPLE_RATE
+    ):
+        return DecisionTraceBuilder(enabled=True)
+    return NULL_TRACE
@@ -0,0 +1,151 @@
+"""
+Optional cross-encoder reranker.
+
+Scores (question, chunk) pairs with a small local cross-encoder
+(RERANKER_MODEL) in one batch. Scoring runs on a dedicated worker thread
+so the caller can enforce a per-request time budget: when the batch does
+not finish within RERANKER_TIMEOUT_MS the caller gets None and keeps its
+MMR order. A batch already running finishes in the background and fills
+the pair cache for the next request asking about the same chunks; one
+still queued is cancelled, and one that reaches the worker after its
+deadline is dropped. At most RERANKER_MAX_PENDING batches are queued or
+running; beyond that requests skip the rerank instead of queueing behind
+abandoned work.
+
+The model is loaded on first use, so nodes with RERANKER_ENABLED=false
+never pay for it.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import List, Optional
+
+from app.core.config import settings
+from app.core.metrics import RERANKER_FALLBACKS, record_cache
+
+
+_model = None
+_model_lock = threading.Lock()
+
+# One worker: a request that finds it busy waits in the queue, which
+# counts against its budget like any other slowness
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cross-encoder")
+_pending = threading.BoundedSemaphore(settings.RERANKER_MAX_PENDING)
+
+_cache: "OrderedDict[str, float]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _get_model():
+    global _model
+
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import CrossEncoder
+                _model = CrossEncoder(settings.RERANKER_MODEL, max_length=settings.RERANKER_MAX_LENGTH)
+    return _model
+
+
+def _pair_key(question: str, text: str) -> str:
+    digest = hashlib.sha1()
+    digest.update(" ".join(question.lower().split()).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _cache_get(key: str) -> Optional[float]:
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    return None
+
+
+def _cache_put(keys: List[str], scores: List[float]):
+    with _cache_lock:
+        for key, score in zip(keys, scores):
+            _cache[key] = score
+            _cache.move_to_end(key)
+        while len(_cache) > settings.RERANKER_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _predict(question: str, texts: List[str], keys: List[str], deadline: float) -> Optional[List[float]]:
+    try:
+        if time.perf_counter() >= deadline:
+            # The caller already fell back to MMR order
+            return None
+        scores = [float(s) for s in _get_model().predict([(question, t) for t in texts])]
+        _cache_put(keys, scores)
+        return scores
+    finally:
+        _pending.release()
+
+
+def warm_up():
+    """Load the model ahead of the first request."""
+    _get_model()
+
+
+def score_pairs(question: str, texts: List[str], budget_ms: float = None) -> Optional[List[float]]:
+    """
+    Cross-encoder relevance scores for (question, text) pairs.
+
+    Args:
+        question: The user question
+        texts: Candidate chunk texts
+        budget_ms: Time budget (default RERANKER_TIMEOUT_MS)
+
+    Returns:
+        One score per text (higher is more relevant), or None if the
+        budget ran out before the uncached pairs were scored
+    """
+    budget_ms = settings.RERANKER_TIMEOUT_MS if budget_ms is None else budget_ms
+    deadline = time.perf_counter() + budget_ms / 1000.0
+
+    keys = [_pair_key(question, t) for t in texts]
+    scores = [_cache_get(key) for key in keys]
+    missing = [n for n, score in enumerate(scores) if score is None]
+    record_cache("rerank_pair", hit=True, count=len(texts) - len(missing))
+    record_cache("rerank_pair", hit=False, count=len(missing))
+
+    if not missing:
+        return scores
+
+    if not _pending.acquire(blocking=False):
+        RERANKER_FALLBACKS.labels(reason="busy").inc()
+        return None
+
+    future = _executor.submit(
+        _predict,
+        question,
+        [texts[n] for n in missing],
+        [keys[n] for n in missing],
+        deadline
+    )
+
+    try:
+        fresh = future.result(timeout=max(deadline - time.perf_counter(), 0))
+    except FutureTimeout:
+        if future.cancel():
+            # Never started, so _predict will not release its slot
+            _pending.release()
+        RERANKER_FALLBACKS.labels(reason="timeout").inc()
+        return None
+    except Exception as e:
+        print(f"⚠️ Cross-encoder rerank failed: {e}")
+        RERANKER_FALLBACKS.labels(reason="error").inc()
+        return None
+
+    if fresh is None:
+        RERANKER_FALLBACKS.labels(reason="timeout").inc()
+        return None
+
+    for n, score in zip(missing, fresh):
+        scores[n] = score
+    return scores
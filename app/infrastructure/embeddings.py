@@ -1,15 +1,207 @@
-import torch
-from sentence_transformers import SentenceTransformer
+"""
+Embedding model.
+
+EMBEDDING_BACKEND selects how EMBEDDING_MODEL is run:
+    torch        - full-precision PyTorch SentenceTransformer (default;
+                   uses mps when available)
+    torch-int8   - PyTorch with int8 dynamic quantization of the Linear
+                   layers, CPU only
+    onnx         - ONNX export run with onnxruntime on CPU
+    onnx-int8    - ONNX export with int8 dynamic quantization
+                   (EMBEDDING_ONNX_QUANTIZATION picks the CPU target)
+    ollama       - a local Ollama server (e.g. nomic-embed-text)
+
+The ONNX backends need `optimum[onnxruntime]` and
+sentence-transformers >= 3.2. Exports are written once to
+EMBEDDING_ONNX_DIR and reused. Check a backend against the reference
+model with `python -m benchmarks.embedding_accuracy` before switching.
+
+Every backend is wrapped to the SentenceTransformer `encode` API, and
+embedding_identity() (model, backend, dimension) is recorded in the
+vector collection so vectors from different models are never mixed.
+Moving an existing collection to another model is done with
+`python -m app.cli.reembed` (app.services.reembedding).
+"""
+
+import os
+import threading
+
+import numpy as np
+
 from app.core.config import settings
 
 
-device = "mps" if torch.backends.mps.is_available() else "cpu"
+# ============================================================
+# BACKENDS
+# ============================================================
+
+def _load_torch(model_name: str, quantize: bool = False):
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    if settings.EMBEDDING_THREADS:
+        torch.set_num_threads(settings.EMBEDDING_THREADS)
+
+    device = "mps" if torch.backends.mps.is_available() and not quantize else "cpu"
+    encoder = SentenceTransformer(model_name, device=device)
+
+    if quantize:
+        encoder = torch.quantization.quantize_dynamic(encoder, {torch.nn.Linear}, dtype=torch.qint8)
+
+    return encoder
+
+
+def _onnx_export_dir(model_name: str) -> str:
+    return os.path.join(settings.EMBEDDING_ONNX_DIR, model_name.replace("/", "__"))
+
+
+def _load_onnx(model_name: str, quantize: bool = False):
+    import onnxruntime
+    from sentence_transformers import SentenceTransformer
+
+    export_dir = _onnx_export_dir(model_name)
+    file_name = "onnx/model.onnx"
+    if quantize:
+        file_name = f"onnx/model_qint8_{settings.EMBEDDING_ONNX_QUANTIZATION}.onnx"
+
+    if not os.path.exists(os.path.join(export_dir, file_name)):
+        print(f"⚙️ Exporting {model_name} to ONNX in {export_dir}")
+        exported = SentenceTransformer(model_name, device="cpu", backend="onnx")
+        exported.save_pretrained(export_dir)
+        if quantize:
+            from sentence_transformers import export_dynamic_quantized_onnx_model
+            export_dynamic_quantized_onnx_model(
+                exported,
+                quantization_config=settings.EMBEDDING_ONNX_QUANTIZATION,
+                model_name_or_path=export_dir
+            )
+
+    session_options = onnxruntime.SessionOptions()
+    if settings.EMBEDDING_THREADS:
+        session_options.intra_op_num_threads = settings.EMBEDDING_THREADS
+
+    return SentenceTransformer(
+        export_dir,
+        device="cpu",
+        backend="onnx",
+        model_kwargs={
+            "file_name": file_name,
+            "provider": "CPUExecutionProvider",
+            "session_options": session_options
+        }
+    )
+
+
+class OllamaEncoder:
+    """Ollama embeddings behind the SentenceTransformer `encode` API"""
+
+    def __init__(self, model_name: str):
+        import ollama
+
+        self.model_name = model_name
+        self._client = ollama.Client(host=settings.OLLAMA_HOST) if settings.OLLAMA_HOST else ollama
+        self._dim = None
+
+    def encode(self, texts, batch_size: int = 32, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
 
-model = SentenceTransformer(
-    settings.EMBEDDING_MODEL,
-    device=device
-)
+        vectors = []
+        for start in range(0, len(texts), batch_size):
+            response = self._client.embed(model=self.model_name, input=texts[start:start + batch_size])
+            vectors.extend(response["embeddings"])
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        return matrix[0] if single else matrix
+
+    def get_sentence_embedding_dimension(self):
+        if self._dim is None:
+            self._dim = len(self.encode("dimension probe"))
+        return self._dim
+
+
+BACKENDS = {
+    "torch": lambda name: _load_torch(name, quantize=False),
+    "torch-int8": lambda name: _load_torch(name, quantize=True),
+    "onnx": lambda name: _load_onnx(name, quantize=False),
+    "onnx-int8": lambda name: _load_onnx(name, quantize=True),
+    "ollama": OllamaEncoder,
+}
+
+
+def load_model(backend: str = None, model_name: str = None):
+    """Encoder with the SentenceTransformer `encode` API for a backend."""
+    backend = backend or settings.EMBEDDING_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
+    return BACKENDS[backend](model_name or settings.EMBEDDING_MODEL)
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """The EMBEDDING_BACKEND encoder, loaded on first use."""
+    global _model
+
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = load_model()
+    return _model
+
+
+def set_model(encoder):
+    """Use `encoder` in place of EMBEDDING_MODEL (benchmarks, accuracy checks)."""
+    global _model
+    _model = encoder
+
+
+def embedding_identity(encoder=None, model_name: str = None, backend: str = None):
+    """Model, backend and dimension recorded with a vector collection."""
+    return {
+        "embedding_model": model_name or settings.EMBEDDING_MODEL,
+        "embedding_backend": backend or settings.EMBEDDING_BACKEND,
+        "embedding_dim": int((encoder or get_model()).get_sentence_embedding_dimension())
+    }
+
+
+# ============================================================
+# ENCODING
+# ============================================================
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def embed_array(text: str) -> np.ndarray:
+    """
+    float32 embedding of one text, L2-normalized when EMBEDDING_NORMALIZE
+    is set, so cosine similarity is a plain dot product.
+    """
+    vector = np.asarray(get_model().encode(text), dtype=np.float32)
+    return _normalize(vector) if settings.EMBEDDING_NORMALIZE else vector
+
+
+def embed_arrays(texts: list) -> np.ndarray:
+    """(len(texts), dim) float32 matrix, encoded EMBEDDING_BATCH_SIZE at a time."""
+    if not texts:
+        return np.zeros((0, get_model().get_sentence_embedding_dimension()), dtype=np.float32)
+    vectors = np.asarray(
+        get_model().encode(texts, batch_size=settings.EMBEDDING_BATCH_SIZE),
+        dtype=np.float32
+    )
+    return _normalize(vectors) if settings.EMBEDDING_NORMALIZE else vectors
 
 
 def generate_embedding(text: str):
-    return model.encode(text).tolist()
+    return embed_array(text).tolist()
+
+
+def generate_embeddings(texts: list):
+    """Encode many texts in one batched forward pass."""
+    if not texts:
+        return []
+    return embed_arrays(texts).tolist()
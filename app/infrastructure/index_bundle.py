@@ -0,0 +1,210 @@
+"""
+Compact binary export/import of the vector corpus.
+
+A bundle is a directory that any backend can bulk-load at disk speed:
+    manifest.json          format, embedding model and dimension, row count,
+                           corpus snapshot id, dtype, creation time
+    embeddings.npy         contiguous (rows, dim) float32/float16 matrix
+    ids.json               chunk ids, row-aligned
+    metadata.json          columnar metadata: {key: [value per row]}
+    texts.bin              UTF-8 chunk texts, concatenated
+    text_offsets.npy       int64 (rows + 1) byte offsets into texts.bin
+    policy_versions.json   policy version registry, if one exists
+
+Unlike a snapshot (app.infrastructure.index_snapshot) a bundle is backend
+independent: export from Chroma, import into the mmap backend or back.
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.infrastructure.vector_store import get_vector_store
+
+
+BUNDLE_FORMAT = 1
+PAGE_SIZE = 4096
+
+
+def _iter_pages(store) -> Iterator[Dict[str, Any]]:
+    offset = 0
+    while True:
+        page = store.get(
+            include=["documents", "metadatas", "embeddings"],
+            limit=PAGE_SIZE,
+            offset=offset
+        )
+        if not page["ids"]:
+            return
+        yield page
+        offset += len(page["ids"])
+
+
+def export_bundle(output_dir: str, dtype: str = "float32") -> Dict[str, Any]:
+    """
+    Write the configured collection to a bundle directory.
+
+    Returns:
+        The bundle manifest
+    """
+    from app.compliance.policy_versioning import current_snapshot_id
+
+    store = get_vector_store()
+    expected = store.count()
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    ids, columns = [], {}
+    offsets = [0]
+    matrix = None
+    rows = 0
+
+    with open(os.path.join(output_dir, "texts.bin"), "wb") as texts:
+        for page in _iter_pages(store):
+            vectors = np.asarray(page["embeddings"], dtype=np.float32)
+
+            if matrix is None:
+                matrix = np.lib.format.open_memmap(
+                    os.path.join(output_dir, "embeddings.npy"),
+                    mode="w+",
+                    dtype=np.dtype(dtype),
+                    shape=(expected, vectors.shape[1])
+                )
+
+            # The collection may grow while exporting; keep the first `expected` rows
+            take = min(len(vectors), expected - rows)
+            matrix[rows:rows + take] = vectors[:take]
+
+            for n in range(take):
+                metadata = page["metadatas"][n] or {}
+                for key in metadata.keys() - columns.keys():
+                    columns[key] = [None] * len(ids)
+                for key, column in columns.items():
+                    column.append(metadata.get(key))
+
+                ids.append(page["ids"][n])
+                encoded = (page["documents"][n] or "").encode("utf-8")
+                texts.write(encoded)
+                offsets.append(offsets[-1] + len(encoded))
+
+            rows += take
+            if rows >= expected:
+                break
+
+    if matrix is None:
+        raise ValueError("Collection is empty; nothing to export")
+    matrix.flush()
+    dim = matrix.shape[1]
+    del matrix
+
+    np.save(os.path.join(output_dir, "text_offsets.npy"), np.asarray(offsets, dtype=np.int64))
+
+    with open(os.path.join(output_dir, "ids.json"), "w") as f:
+        json.dump(ids, f)
+    with open(os.path.join(output_dir, "metadata.json"), "w") as f:
+        json.dump(columns, f)
+
+    if os.path.exists(settings.POLICY_REGISTRY_PATH):
+        shutil.copy2(settings.POLICY_REGISTRY_PATH, os.path.join(output_dir, "policy_versions.json"))
+
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "embedding_model": settings.EMBEDDING_MODEL,
+        "embedding_dim": dim,
+        "dtype": dtype,
+        "count": rows,
+        "corpus_snapshot_id": current_snapshot_id(),
+        "source_backend": settings.VECTOR_BACKEND,
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+    with open(os.path.join(output_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+def read_bundle_manifest(bundle_dir: str) -> Dict[str, Any]:
+    with open(os.path.join(bundle_dir, "manifest.json"), "r") as f:
+        return json.load(f)
+
+
+def _load_columns(bundle_dir: str) -> Tuple[list, Dict[str, list], np.ndarray, np.ndarray]:
+    with open(os.path.join(bundle_dir, "ids.json"), "r") as f:
+        ids = json.load(f)
+    with open(os.path.join(bundle_dir, "metadata.json"), "r") as f:
+        columns = json.load(f)
+    offsets = np.load(os.path.join(bundle_dir, "text_offsets.npy"))
+    texts = np.memmap(os.path.join(bundle_dir, "texts.bin"), dtype=np.uint8, mode="r") \
+        if offsets[-1] else np.zeros(0, dtype=np.uint8)
+    return ids, columns, offsets, texts
+
+
+def import_bundle(bundle_dir: str, append: bool = False, batch_size: int = PAGE_SIZE) -> Dict[str, Any]:
+    """
+    Bulk-load a bundle into the configured collection.
+
+    Args:
+        bundle_dir: Directory written by export_bundle
+        append: Allow loading into a non-empty collection
+        batch_size: Rows per add() call
+
+    Returns:
+        The bundle manifest
+
+    Raises:
+        ValueError: If the bundle was built with a different EMBEDDING_MODEL
+            or the collection is not empty and append is False
+    """
+    from app.compliance.policy_versioning import bump_snapshot
+
+    manifest = read_bundle_manifest(bundle_dir)
+
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"Unsupported bundle format: {manifest.get('format')}")
+    if manifest["embedding_model"] != settings.EMBEDDING_MODEL:
+        raise ValueError(
+            f"Bundle was built with {manifest['embedding_model']}, "
+            f"configured EMBEDDING_MODEL is {settings.EMBEDDING_MODEL}"
+        )
+
+    store = get_vector_store()
+    if store.count() and not append:
+        raise ValueError("Collection is not empty; pass append=True (--append) to load anyway")
+
+    embeddings = np.load(os.path.join(bundle_dir, "embeddings.npy"), mmap_mode="r")
+    ids, columns, offsets, texts = _load_columns(bundle_dir)
+    count = manifest["count"]
+
+    for start in range(0, count, batch_size):
+        end = min(start + batch_size, count)
+
+        metadatas = []
+        for row in range(start, end):
+            metadatas.append({
+                key: column[row]
+                for key, column in columns.items()
+                if column[row] is not None
+            })
+
+        store.add(
+            ids=ids[start:end],
+            documents=[
+                bytes(texts[offsets[row]:offsets[row + 1]]).decode("utf-8")
+                for row in range(start, end)
+            ],
+            metadatas=metadatas,
+            embeddings=np.asarray(embeddings[start:end], dtype=np.float32).tolist()
+        )
+
+    registry = os.path.join(bundle_dir, "policy_versions.json")
+    if os.path.exists(registry) and not (append and os.path.exists(settings.POLICY_REGISTRY_PATH)):
+        os.makedirs(os.path.dirname(os.path.abspath(settings.POLICY_REGISTRY_PATH)), exist_ok=True)
+        shutil.copy2(registry, settings.POLICY_REGISTRY_PATH)
+    bump_snapshot(full=True)
+
+    return manifest
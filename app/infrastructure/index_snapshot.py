@@ -0,0 +1,170 @@
+"""
+Index snapshots for seeding new nodes.
+
+A snapshot is a tar archive (gzip if the name ends in .gz/.tgz):
+    manifest.json          format, backend, collection, embedding model,
+                           chunk count, creation time
+    index/...              the backend's on-disk index directory
+    policy_versions.json   the policy version registry, if one exists
+
+SQLite files are copied with the online backup API so the Chroma catalogue
+is always consistent, and the backend's writer lock (the one every add /
+update / delete takes) is held while copying, so ingestion in any process
+waits for the snapshot. Restore unpacks next to the target and swaps it in with a rename,
+so it should run while the API is stopped.
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import tarfile
+import tempfile
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+from app.core.config import settings
+from app.infrastructure.vector_store import get_vector_store, index_directory
+
+
+SNAPSHOT_FORMAT = 1
+
+
+def _tar_mode(path: str, write: bool) -> str:
+    compressed = path.endswith(".gz") or path.endswith(".tgz")
+    if write:
+        return "w:gz" if compressed else "w"
+    return "r:gz" if compressed else "r"
+
+
+def _stage_index(source_dir: str, staging_dir: str):
+    """Copy the index directory, backing up SQLite databases consistently."""
+    registry = os.path.abspath(settings.POLICY_REGISTRY_PATH)
+
+    for root, _, files in os.walk(source_dir):
+        rel_root = os.path.relpath(root, source_dir)
+        os.makedirs(os.path.join(staging_dir, rel_root), exist_ok=True)
+
+        for name in files:
+            src = os.path.join(root, name)
+            dst = os.path.join(staging_dir, rel_root, name)
+
+            if os.path.abspath(src) == registry or name.endswith((".tmp", ".lock", "-journal")):
+                continue
+
+            if name.endswith(".sqlite3"):
+                with closing(sqlite3.connect(src)) as source_db, closing(sqlite3.connect(dst)) as target_db:
+                    source_db.backup(target_db)
+            elif not name.endswith(("-wal", "-shm")):
+                shutil.copy2(src, dst)
+
+
+def create_snapshot(output_path: str) -> Dict[str, Any]:
+    """
+    Write a snapshot of the configured index to `output_path`.
+
+    Returns:
+        The snapshot manifest
+    """
+    source_dir = index_directory()
+    if not os.path.isdir(source_dir):
+        raise FileNotFoundError(f"No index found at {source_dir}")
+
+    store = get_vector_store()
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "backend": settings.VECTOR_BACKEND,
+        "collection": settings.DEFAULT_COLLECTION,
+        "embedding_model": settings.EMBEDDING_MODEL,
+        "count": store.count(),
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+
+    with tempfile.TemporaryDirectory(prefix="index-snapshot-") as staging:
+        with store.write_lock():
+            _stage_index(source_dir, os.path.join(staging, "index"))
+
+        with open(os.path.join(staging, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        if os.path.exists(settings.POLICY_REGISTRY_PATH):
+            shutil.copy2(settings.POLICY_REGISTRY_PATH, os.path.join(staging, "policy_versions.json"))
+
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        with tarfile.open(output_path, _tar_mode(output_path, write=True)) as tar:
+            for name in sorted(os.listdir(staging)):
+                tar.add(os.path.join(staging, name), arcname=name)
+
+    return manifest
+
+
+def read_manifest(archive_path: str) -> Dict[str, Any]:
+    with tarfile.open(archive_path, _tar_mode(archive_path, write=False)) as tar:
+        return json.load(tar.extractfile("manifest.json"))
+
+
+def _safe_extract(tar: tarfile.TarFile, target: str):
+    root = os.path.realpath(target)
+    for member in tar.getmembers():
+        path = os.path.realpath(os.path.join(target, member.name))
+        if not (path == root or path.startswith(root + os.sep)):
+            raise ValueError(f"Unsafe path in snapshot: {member.name}")
+        if member.issym() or member.islnk():
+            raise ValueError(f"Links are not allowed in snapshots: {member.name}")
+    tar.extractall(target)
+
+
+def restore_snapshot(archive_path: str, force: bool = False) -> Dict[str, Any]:
+    """
+    Replace the configured index with the contents of a snapshot.
+
+    Args:
+        archive_path: Snapshot written by create_snapshot
+        force: Overwrite a non-empty index (the old one is kept as
+            <dir>.bak-<timestamp>)
+
+    Returns:
+        The snapshot manifest
+
+    Raises:
+        ValueError: If the snapshot was built for another backend or model
+        FileExistsError: If an index already exists and force is False
+    """
+    manifest = read_manifest(archive_path)
+
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported snapshot format: {manifest.get('format')}")
+    if manifest["backend"] != settings.VECTOR_BACKEND:
+        raise ValueError(
+            f"Snapshot is for backend {manifest['backend']}, configured backend is {settings.VECTOR_BACKEND}"
+        )
+    if manifest["embedding_model"] != settings.EMBEDDING_MODEL:
+        raise ValueError(
+            f"Snapshot was built with {manifest['embedding_model']}, "
+            f"configured EMBEDDING_MODEL is {settings.EMBEDDING_MODEL}"
+        )
+
+    target = os.path.abspath(index_directory())
+    if os.path.isdir(target) and os.listdir(target) and not force:
+        raise FileExistsError(f"Index directory {target} is not empty; use --force to replace it")
+
+    parent = os.path.dirname(target)
+    os.makedirs(parent, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(prefix=".restore-", dir=parent) as staging:
+        with tarfile.open(archive_path, _tar_mode(archive_path, write=False)) as tar:
+            _safe_extract(tar, staging)
+
+        if os.path.isdir(target):
+            os.rename(target, f"{target}.bak-{time.strftime('%Y%m%d-%H%M%S')}")
+        os.rename(os.path.join(staging, "index"), target)
+
+        registry = os.path.join(staging, "policy_versions.json")
+        if os.path.exists(registry):
+            os.makedirs(os.path.dirname(os.path.abspath(settings.POLICY_REGISTRY_PATH)), exist_ok=True)
+            shutil.copy2(registry, settings.POLICY_REGISTRY_PATH)
+
+    return manifest
@@ -0,0 +1,289 @@
+"""
+In-memory BM25 index over chunk text.
+
+Complements the vector store for exact-term questions ("room rent", "ICU",
+clause numbers, rider names) that embeddings rank poorly. The index is
+loaded from the vector store on first use and then kept current
+incrementally: local writes (services.vector_service) update it directly,
+and writes from other processes are picked up from the snapshot changelog
+(policy_versioning) when the corpus snapshot id moves. Only when the
+changelog cannot cover the gap is the index rebuilt, off to the side;
+searches keep using the current index while it catches up.
+
+Search honours the same Chroma-style `where` filters as the vector store,
+so scoped questions stay scoped.
+"""
+
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.infrastructure.metadata_filter import matches_where
+
+
+# Clause numbers such as 4.2.1 stay one token
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:\.[0-9]+)*")
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "does", "for", "from",
+    "has", "have", "how", "in", "is", "it", "my", "of", "on", "or", "the",
+    "this", "to", "under", "what", "when", "which", "will", "with",
+}
+
+_PAGE_SIZE = 4096
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in _STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over an incrementally maintained inverted index"""
+
+    def __init__(self, k1: float = None, b: float = None):
+        self.k1 = k1 if k1 is not None else settings.BM25_K1
+        self.b = b if b is not None else settings.BM25_B
+
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, Counter] = {}
+        self._doc_len: Dict[str, int] = {}
+        self._metadatas: Dict[str, dict] = {}
+        self._total_len = 0
+        self._snapshot_id = None
+        self._reload_lock = threading.Lock()
+        # Ids written locally since the last snapshot bump (see drain_changes)
+        self._changed = set()
+        # Local writes made while a rebuild runs, replayed onto the new index
+        self._journal = None
+
+    def __len__(self):
+        return len(self._doc_len)
+
+    # ------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------
+
+    def add(self, ids: List[str], texts: List[str], metadatas: List[dict]):
+        with self._lock:
+            self._record("_add", ids, texts, metadatas)
+            self._add(ids, texts, metadatas)
+
+    def update_metadata(self, ids: List[str], metadatas: List[dict]):
+        with self._lock:
+            self._record("_update_metadata", ids, metadatas)
+            self._update_metadata(ids, metadatas)
+
+    def remove(self, ids: List[str]):
+        with self._lock:
+            self._record("_remove", ids)
+            self._remove(ids)
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_len.clear()
+            self._metadatas.clear()
+            self._total_len = 0
+
+    def _record(self, op: str, ids: List[str], *args):
+        self._changed.update(ids)
+        if self._journal is not None:
+            self._journal.append((op, ids) + args)
+
+    def _add(self, ids: List[str], texts: List[str], metadatas: List[dict]):
+        for doc_id, text, metadata in zip(ids, texts, metadatas):
+            if doc_id in self._doc_len:
+                continue
+            terms = Counter(tokenize(text))
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = tf
+            self._doc_terms[doc_id] = terms
+            self._doc_len[doc_id] = sum(terms.values())
+            self._metadatas[doc_id] = metadata or {}
+            self._total_len += self._doc_len[doc_id]
+
+    def _update_metadata(self, ids: List[str], metadatas: List[dict]):
+        for doc_id, metadata in zip(ids, metadatas):
+            if doc_id in self._metadatas:
+                self._metadatas[doc_id] = metadata or {}
+
+    def _remove(self, ids: List[str]):
+        for doc_id in ids:
+            terms = self._doc_terms.pop(doc_id, None)
+            if terms is None:
+                continue
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self._postings[term]
+            self._total_len -= self._doc_len.pop(doc_id)
+            self._metadatas.pop(doc_id, None)
+
+    def drain_changes(self) -> List[str]:
+        """Ids written locally since the previous call, for the snapshot changelog."""
+        with self._lock:
+            ids = sorted(self._changed)
+            self._changed.clear()
+            return ids
+
+    def advance(self, previous: int, snapshot_id: int):
+        """
+        Note that a snapshot bump made by this process only covers writes
+        already applied here, so an index current at `previous` is current
+        at `snapshot_id` too and needs no reload.
+        """
+        with self._lock:
+            if self._snapshot_id == previous and self._journal is None:
+                self._snapshot_id = snapshot_id
+
+    def load_from_store(self, store, snapshot_id: int = None):
+        """Rebuild from every chunk in a vector store, then swap it in."""
+        with self._lock:
+            self._journal = []
+
+        fresh = BM25Index(k1=self.k1, b=self.b)
+        try:
+            offset = 0
+            while True:
+                page = store.get(include=["documents", "metadatas"], limit=_PAGE_SIZE, offset=offset)
+                if not page["ids"]:
+                    break
+                fresh._add(page["ids"], page["documents"], page["metadatas"])
+                offset += len(page["ids"])
+        except BaseException:
+            with self._lock:
+                self._journal = None
+            raise
+
+        with self._lock:
+            # Writes that landed during the scan may be missing from it
+            for op, *args in self._journal:
+                getattr(fresh, op)(*args)
+            self._journal = None
+            self._postings = fresh._postings
+            self._doc_terms = fresh._doc_terms
+            self._doc_len = fresh._doc_len
+            self._metadatas = fresh._metadatas
+            self._total_len = fresh._total_len
+            self._snapshot_id = snapshot_id
+
+    def apply_changes(self, store, ids: List[str], snapshot_id: int):
+        """Re-read the given chunks from the store; ids no longer stored are dropped."""
+        with self._lock:
+            self._journal = []
+
+        stored = {}
+        try:
+            for start in range(0, len(ids), _PAGE_SIZE):
+                page = store.get(ids=ids[start:start + _PAGE_SIZE], include=["documents", "metadatas"])
+                for doc_id, text, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+                    stored[doc_id] = (text, metadata)
+        except BaseException:
+            with self._lock:
+                self._journal = None
+            raise
+
+        with self._lock:
+            self._remove(ids)
+            present = [doc_id for doc_id in ids if doc_id in stored]
+            self._add(
+                present,
+                [stored[doc_id][0] for doc_id in present],
+                [stored[doc_id][1] for doc_id in present]
+            )
+            # Local writes since the fetch win over what it read
+            for op, *args in self._journal:
+                getattr(self, op)(*args)
+            self._journal = None
+            self._snapshot_id = snapshot_id
+
+    def sync(self, store, snapshot_id: int, changes: Callable[[int, int], Optional[List[str]]] = None):
+        """
+        Catch up with the corpus snapshot id.
+
+        `changes(since, until)` returns the chunk ids written in between,
+        or None when it cannot tell; those are re-read from the store,
+        otherwise the whole index is rebuilt. Only the first load blocks
+        searches; later, one thread catches up while the others keep
+        searching the current index.
+        """
+        if snapshot_id == self._snapshot_id:
+            return
+        if not self._reload_lock.acquire(blocking=self._snapshot_id is None):
+            return
+        try:
+            since = self._snapshot_id
+            if since == snapshot_id:
+                return
+            changed = changes(since, snapshot_id) if changes is not None and since is not None else None
+            if changed is None:
+                self.load_from_store(store, snapshot_id)
+            else:
+                self.apply_changes(store, changed, snapshot_id)
+        finally:
+            self._reload_lock.release()
+
+    # ------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------
+
+    def search(self, query: str, k: int = 10, where: Dict[str, Any] = None) -> List[Tuple[str, float]]:
+        """
+        BM25 top-k for a query.
+
+        Args:
+            query: Free-text question
+            k: Number of hits to return
+            where: Optional Chroma-style metadata filter
+
+        Returns:
+            (chunk id, score) pairs, best first
+        """
+        with self._lock:
+            if not self._doc_len:
+                return []
+
+            n = len(self._doc_len)
+            avg_len = self._total_len / n
+            scores: Dict[str, float] = {}
+
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            if where:
+                scores = {
+                    doc_id: score for doc_id, score in scores.items()
+                    if matches_where(self._metadatas[doc_id], where)
+                }
+
+            return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+
+_index: Optional[BM25Index] = None
+_index_lock = threading.Lock()
+
+
+def get_lexical_index() -> BM25Index:
+    """Process-wide BM25 index for the configured vector store."""
+    global _index
+
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = BM25Index()
+
+    return _index
@@ -0,0 +1,73 @@
+"""
+Evaluate Chroma-style `where` filters against a metadata dict.
+
+Used by in-process backends so the same filters the services build for
+Chroma work everywhere. Supports $and, $or, implicit equality and the
+$eq, $ne, $gt, $gte, $lt, $lte, $in, $nin operators.
+"""
+
+from typing import Any, Dict, Optional
+
+
+def equal(value: Any, arg: Any) -> bool:
+    """Equality as Chroma applies it: True is not 1, but 1 is 1.0."""
+    return isinstance(value, bool) == isinstance(arg, bool) and value == arg
+
+
+_OPERATORS = {
+    "$eq": lambda value, arg: equal(value, arg),
+    "$ne": lambda value, arg: not equal(value, arg),
+    "$gt": lambda value, arg: value is not None and value > arg,
+    "$gte": lambda value, arg: value is not None and value >= arg,
+    "$lt": lambda value, arg: value is not None and value < arg,
+    "$lte": lambda value, arg: value is not None and value <= arg,
+    "$in": lambda value, arg: any(equal(value, a) for a in arg),
+    "$nin": lambda value, arg: not any(equal(value, a) for a in arg),
+}
+
+
+def matches_where(metadata: Dict[str, Any], where: Dict[str, Any]) -> bool:
+
+    if not where:
+        return True
+
+    for key, condition in where.items():
+
+        if key == "$and":
+            if not all(matches_where(metadata, sub) for sub in condition):
+                return False
+
+        elif key == "$or":
+            if not any(matches_where(metadata, sub) for sub in condition):
+                return False
+
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for op, arg in condition.items():
+                if op not in _OPERATORS:
+                    raise ValueError(f"Unsupported where operator: {op}")
+                if not _OPERATORS[op](value, arg):
+                    return False
+
+        elif not equal(metadata.get(key), condition):
+            return False
+
+    return True
+
+
+def equality_value(where: Optional[Dict[str, Any]], key: str) -> Any:
+    """
+    Value `key` is pinned to by a top-level (or top-level $and) equality
+    condition, or None if the filter does not pin it.
+    """
+    if not where:
+        return None
+
+    for term in [where] + [sub for sub in where.get("$and", []) if isinstance(sub, dict)]:
+        condition = term.get(key)
+        if isinstance(condition, dict):
+            condition = condition.get("$eq") if len(condition) == 1 else None
+        if condition is not None:
+            return condition
+
+    return None
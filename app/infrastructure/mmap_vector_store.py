@@ -0,0 +1,542 @@
+"""
+In-process vector index over a memory-mapped embedding matrix.
+
+Layout of the index directory:
+    header.json    dim, dtype, committed row count and log length, generation
+    vectors.bin    row-major matrix of L2-normalized embeddings (float16,
+                   int8 scaled by 127, or float32)
+    records.jsonl  append-only sidecar log of add/update/delete records
+                   holding ids, chunk text and metadata
+    write.lock     flock()ed by writers so several processes can ingest
+
+compact() writes the surviving rows to vectors.<generation>.bin and
+records.<generation>.jsonl, then swaps header.json to the new generation
+and removes the old files, so a reader never pairs a header with another
+generation's data.
+
+Scalar metadata values are kept in an in-memory inverted index, so filters
+with equality conditions (e.g. one document's source) only visit and score
+that subset of rows.
+
+Readers map vectors.bin read-only, so every uvicorn worker on a node shares
+the same physical pages through the OS page cache. Each call stats
+header.json and replays only the new tail of the log when another process
+has written, so workers pick up new chunks without a restart.
+
+Search is exact: cosine similarity of every candidate row against the query
+by matrix multiplication. float32 rows are multiplied straight off the map
+in one BLAS call; float16/int8 rows are upcast in fixed-size blocks, one
+BLAS call per block, because BLAS has no half-precision kernels.
+"""
+
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+
+from app.infrastructure.metadata_filter import matches_where
+from app.infrastructure.vector_store import VectorStore
+
+
+DTYPES = {
+    "float16": np.float16,
+    "float32": np.float32,
+    "int8": np.int8,
+}
+
+INT8_SCALE = 127.0
+BLOCK_ROWS = 65536
+
+
+def _posting_key(value: Any):
+    # True and 1 are different filter values (metadata_filter.equal); 1 and 1.0 are not
+    return (isinstance(value, bool), value)
+
+
+def _append_committed(path: str, committed_bytes: int, payload: bytes):
+    """
+    Write `payload` right after the committed part of a file. Bytes past
+    it were left by a writer that died before updating the header; they
+    are dropped so row numbers and log offsets stay aligned.
+    """
+    with os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), "r+b") as f:
+        f.truncate(committed_bytes)
+        f.seek(committed_bytes)
+        f.write(payload)
+
+
+class MmapVectorStore(VectorStore):
+    """Exact top-k search over a memory-mapped, shared embedding matrix"""
+
+    name = "mmap"
+
+    def __init__(self, directory: str, dtype: str = "float16"):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported MMAP_INDEX_DTYPE: {dtype}")
+
+        self.directory = directory
+        self.dtype = np.dtype(DTYPES[dtype])
+
+        self._header_path = os.path.join(directory, "header.json")
+        self._lock_path = os.path.join(directory, "write.lock")
+
+        self._lock = threading.RLock()
+        self._header_stamp = None
+        self._reset_state()
+
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self._refresh()
+
+    # ------------------------------------------------------------
+    # State & synchronisation
+    # ------------------------------------------------------------
+
+    def _reset_state(self):
+        self._dim = None
+        self._rows = 0
+        self._generation = None
+        self._records_offset = 0
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadatas: List[dict] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._row_of: Dict[str, int] = {}
+        self._meta_index: Dict[str, Dict[Any, Set[int]]] = {}
+        self._info: Dict[str, Any] = {}
+        self._matrix = None
+
+    def _generation_paths(self, generation: Optional[int]):
+        """vectors and records files of a generation; generation 0 keeps the original names."""
+        if not generation:
+            return (os.path.join(self.directory, "vectors.bin"), os.path.join(self.directory, "records.jsonl"))
+        return (
+            os.path.join(self.directory, f"vectors.{generation}.bin"),
+            os.path.join(self.directory, f"records.{generation}.jsonl")
+        )
+
+    @property
+    def _vectors_path(self) -> str:
+        return self._generation_paths(self._generation)[0]
+
+    @property
+    def _records_path(self) -> str:
+        return self._generation_paths(self._generation)[1]
+
+    def _read_header(self) -> Dict[str, Any]:
+        with open(self._header_path, "r") as f:
+            return json.load(f)
+
+    def _write_header(self, header: Dict[str, Any]):
+        tmp_path = self._header_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(header, f)
+        os.replace(tmp_path, self._header_path)
+
+    def _header(self) -> Dict[str, Any]:
+        return {
+            "dim": self._dim,
+            "dtype": self.dtype.name,
+            "rows": self._rows,
+            "records_bytes": self._records_offset,
+            "generation": self._generation or 0,
+            "info": self._info
+        }
+
+    @contextmanager
+    def write_lock(self):
+        """Exclusive cross-process lock held by every writer."""
+        with open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _stamp(self):
+        # Headers are replaced atomically, so a new inode means new data
+        try:
+            stat = os.stat(self._header_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def _refresh(self):
+        """Catch up with writes committed by this or another process."""
+        stamp = self._stamp()
+        while stamp is not None and stamp != self._header_stamp:
+            try:
+                self._load(self._read_header())
+            except FileNotFoundError:
+                # Compacted away since the header was read; the new header names its files
+                if self._stamp() == stamp:
+                    raise
+                stamp = self._stamp()
+                continue
+            self._header_stamp = stamp
+
+    def _load(self, header: Dict[str, Any]):
+        if header["generation"] != self._generation:
+            self._reset_state()
+            self._generation = header["generation"]
+
+        self._dim = header["dim"]
+        self.dtype = np.dtype(header["dtype"])
+        self._info = header.get("info", {})
+
+        if header["records_bytes"] > self._records_offset:
+            with open(self._records_path, "rb") as f:
+                f.seek(self._records_offset)
+                tail = f.read(header["records_bytes"] - self._records_offset)
+            for line in tail.splitlines():
+                if line:
+                    self._apply_record(json.loads(line))
+            self._records_offset = header["records_bytes"]
+
+        self._rows = header["rows"]
+        self._matrix = (
+            np.memmap(self._vectors_path, dtype=self.dtype, mode="r", shape=(self._rows, self._dim))
+            if self._rows else None
+        )
+
+    def _apply_record(self, record: Dict[str, Any]):
+        op = record["op"]
+        row = record["row"]
+
+        if op == "add":
+            if row >= len(self._alive):
+                grown = np.zeros(max(row + 1, 2 * len(self._alive), 1024), dtype=bool)
+                grown[:len(self._alive)] = self._alive
+                self._alive = grown
+            self._ids.append(record["id"])
+            self._documents.append(record["document"])
+            self._metadatas.append(record["metadata"])
+            self._alive[row] = True
+            self._row_of[record["id"]] = row
+            self._index_metadata(row, record["metadata"], add=True)
+
+        elif op == "update":
+            if "document" in record:
+                self._documents[row] = record["document"]
+            if "metadata" in record:
+                self._index_metadata(row, self._metadatas[row], add=False)
+                self._metadatas[row] = record["metadata"]
+                self._index_metadata(row, record["metadata"], add=True)
+
+        elif op == "delete":
+            self._alive[row] = False
+            self._row_of.pop(self._ids[row], None)
+            self._index_metadata(row, self._metadatas[row], add=False)
+
+    def _index_metadata(self, row: int, metadata: Optional[dict], add: bool):
+        for key, value in (metadata or {}).items():
+            if not isinstance(value, (str, int, float, bool)):
+                continue
+            postings = self._meta_index.setdefault(key, {})
+            posting_key = _posting_key(value)
+            if add:
+                postings.setdefault(posting_key, set()).add(row)
+            elif posting_key in postings:
+                postings[posting_key].discard(row)
+
+    def _append_records(self, records: List[Dict[str, Any]]):
+        payload = "".join(json.dumps(r) + "\n" for r in records).encode("utf-8")
+        _append_committed(self._records_path, self._records_offset, payload)
+        for record in records:
+            self._apply_record(record)
+        self._records_offset += len(payload)
+
+    # ------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------
+
+    def _encode(self, embeddings) -> np.ndarray:
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.maximum(norms, 1e-12)
+
+        if self.dtype == np.int8:
+            return np.round(matrix * INT8_SCALE).astype(np.int8)
+        return matrix.astype(self.dtype)
+
+    def _decode(self, rows: np.ndarray) -> np.ndarray:
+        decoded = rows.astype(np.float32)
+        if self.dtype == np.int8:
+            decoded /= INT8_SCALE
+        return decoded
+
+    def _scores(self, rows, queries: np.ndarray) -> np.ndarray:
+        """Cosine scores, shape (len(rows), len(queries))."""
+        if self.dtype == np.float32:
+            return np.asarray(rows @ queries.T)
+
+        out = np.empty((len(rows), len(queries)), dtype=np.float32)
+        for start in range(0, len(rows), BLOCK_ROWS):
+            block = np.asarray(rows[start:start + BLOCK_ROWS], dtype=np.float32)
+            out[start:start + BLOCK_ROWS] = block @ queries.T
+        if self.dtype == np.int8:
+            out /= INT8_SCALE
+        return out
+
+    # ------------------------------------------------------------
+    # Row selection
+    # ------------------------------------------------------------
+
+    def _indexed_candidates(self, where: Dict[str, Any]) -> Optional[Set[int]]:
+        """Rows satisfying the filter's top-level equality terms, if any."""
+        terms = [where] + [
+            sub for sub in where.get("$and", []) if isinstance(sub, dict)
+        ]
+
+        candidates = None
+        for term in terms:
+            for key, condition in term.items():
+                if key.startswith("$"):
+                    continue
+                if isinstance(condition, dict):
+                    if "$eq" not in condition:
+                        continue
+                    condition = condition["$eq"]
+                rows = self._meta_index.get(key, {}).get(_posting_key(condition), set())
+                candidates = set(rows) if candidates is None else candidates & rows
+
+        return candidates
+
+    def _select_rows(self, ids: List[str] = None, where: Dict[str, Any] = None) -> List[int]:
+        indexed = self._indexed_candidates(where) if where else None
+
+        if ids is not None:
+            rows = [self._row_of[i] for i in ids if i in self._row_of]
+            if indexed is not None:
+                rows = [r for r in rows if r in indexed]
+        elif indexed is not None:
+            rows = sorted(indexed)
+        else:
+            rows = np.flatnonzero(self._alive[:self._rows]).tolist()
+
+        if where:
+            rows = [r for r in rows if matches_where(self._metadatas[r], where)]
+
+        return rows
+
+    def _rows_result(self, rows: List[int], include: List[str]) -> Dict[str, Any]:
+        result = {"ids": [self._ids[r] for r in rows]}
+        if "documents" in include:
+            result["documents"] = [self._documents[r] for r in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [self._metadatas[r] for r in rows]
+        if "embeddings" in include:
+            result["embeddings"] = (
+                list(self._decode(self._matrix[rows])) if rows else []
+            )
+        return result
+
+    # ------------------------------------------------------------
+    # VectorStore API
+    # ------------------------------------------------------------
+
+    def add(self, ids, documents, metadatas, embeddings):
+        with self._lock, self.write_lock():
+            self._refresh()
+
+            vectors = self._encode(embeddings)
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+                self._generation = self._generation or 0
+            elif vectors.shape[1] != self._dim:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match index dimension {self._dim}"
+                )
+
+            # Like Chroma, adding an existing id is a no-op
+            keep = [n for n, doc_id in enumerate(ids) if doc_id not in self._row_of]
+            if not keep:
+                return
+
+            records = []
+            for offset, n in enumerate(keep):
+                records.append({
+                    "op": "add",
+                    "row": self._rows + offset,
+                    "id": ids[n],
+                    "document": documents[n],
+                    "metadata": metadatas[n]
+                })
+
+            _append_committed(
+                self._vectors_path,
+                self._rows * self._dim * self.dtype.itemsize,
+                np.ascontiguousarray(vectors[keep]).tobytes()
+            )
+
+            self._append_records(records)
+            self._rows += len(keep)
+            self._write_header(self._header())
+            self._refresh()
+
+    def update(self, ids, documents=None, metadatas=None, embeddings=None):
+        with self._lock, self.write_lock():
+            self._refresh()
+
+            rows = [self._row_of[i] for i in ids]
+            records = []
+            for n, row in enumerate(rows):
+                record = {"op": "update", "row": row}
+                if documents is not None:
+                    record["document"] = documents[n]
+                if metadatas is not None:
+                    record["metadata"] = metadatas[n]
+                records.append(record)
+
+            if embeddings is not None:
+                vectors = self._encode(embeddings)
+                row_bytes = self._dim * self.dtype.itemsize
+                with open(self._vectors_path, "r+b") as f:
+                    for n, row in enumerate(rows):
+                        f.seek(row * row_bytes)
+                        f.write(vectors[n].tobytes())
+
+            self._append_records(records)
+            self._write_header(self._header())
+            self._refresh()
+
+    def get(self, ids=None, where=None, include=None, limit=None, offset=None):
+        include = include or ["documents", "metadatas"]
+        with self._lock:
+            self._refresh()
+            rows = self._select_rows(ids, where)
+            start = offset or 0
+            rows = rows[start:start + limit] if limit is not None else rows[start:]
+            return self._rows_result(rows, include)
+
+    def query(self, query_embeddings, n_results=10, where=None, include=None):
+        include = include or ["documents", "metadatas", "distances"]
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries.reshape(1, -1)
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+        with self._lock:
+            self._refresh()
+
+            empty = {key: [[] for _ in queries] for key in ["ids"] + list(include)}
+            if not self._rows:
+                return empty
+
+            if where:
+                candidates = np.asarray(self._select_rows(where=where), dtype=np.int64)
+                if not len(candidates):
+                    return empty
+                scores = self._scores(self._matrix[candidates], queries)
+            else:
+                candidates = None
+                scores = self._scores(self._matrix, queries)
+                scores[~self._alive[:self._rows]] = -np.inf
+
+            result = {key: [] for key in ["ids"] + list(include)}
+            k = min(n_results, len(scores))
+
+            for column in range(len(queries)):
+                col = scores[:, column]
+                top = np.argpartition(-col, k - 1)[:k] if k < len(col) else np.arange(len(col))
+                top = top[np.argsort(-col[top])]
+                top = top[np.isfinite(col[top])]
+
+                rows = candidates[top].tolist() if candidates is not None else top.tolist()
+                hit = self._rows_result(rows, include)
+
+                result["ids"].append(hit["ids"])
+                for key in include:
+                    if key == "distances":
+                        result["distances"].append((1.0 - col[top]).tolist())
+                    else:
+                        result[key].append(hit[key])
+
+            return result
+
+    def delete(self, ids=None, where=None):
+        with self._lock, self.write_lock():
+            self._refresh()
+
+            rows = self._select_rows(ids, where)
+            if not rows:
+                return
+
+            self._append_records([{"op": "delete", "row": r} for r in rows])
+            self._write_header(self._header())
+            self._refresh()
+
+    def count(self):
+        with self._lock:
+            self._refresh()
+            return len(self._row_of)
+
+    def get_info(self):
+        with self._lock:
+            self._refresh()
+            return dict(self._info)
+
+    def set_info(self, info):
+        with self._lock, self.write_lock():
+            self._refresh()
+            self._info = {**self._info, **info}
+            self._write_header(self._header())
+            self._refresh()
+
+    # ------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------
+
+    def compact(self):
+        """Rewrite the index without deleted rows and superseded records."""
+        with self._lock, self.write_lock():
+            self._refresh()
+
+            rows = np.flatnonzero(self._alive[:self._rows]).tolist()
+            generation = (self._generation or 0) + 1
+
+            old_paths = self._generation_paths(self._generation)
+            vectors_path, records_path = self._generation_paths(generation)
+
+            with open(vectors_path, "wb") as f:
+                for start in range(0, len(rows), BLOCK_ROWS):
+                    f.write(np.ascontiguousarray(self._matrix[rows[start:start + BLOCK_ROWS]]).tobytes())
+
+            records_bytes = 0
+            with open(records_path, "wb") as f:
+                for new_row, row in enumerate(rows):
+                    line = (json.dumps({
+                        "op": "add",
+                        "row": new_row,
+                        "id": self._ids[row],
+                        "document": self._documents[row],
+                        "metadata": self._metadatas[row]
+                    }) + "\n").encode("utf-8")
+                    f.write(line)
+                    records_bytes += len(line)
+
+            # The header switches readers to the new files in one step
+            self._write_header({
+                "dim": self._dim,
+                "dtype": self.dtype.name,
+                "rows": len(rows),
+                "records_bytes": records_bytes,
+                "generation": generation,
+                "info": self._info
+            })
+            self._refresh()
+
+            # Maps of the old vectors stay valid; a reader that has yet to open
+            # the old files finds them gone and re-reads the header
+            for path in old_paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,176 @@
+"""
+Page OCR
+
+Decides per page whether OCR is needed and at what resolution, and
+caches results by page content so re-ingesting a document (or another
+document sharing the same scanned pages) does not OCR again.
+
+    text-only / blank page           -> skipped
+    no usable text layer, images     -> whole page OCR'd
+    text layer plus large images     -> only the image regions OCR'd
+    searchable scan (text over a     -> skipped
+    full-page image)
+
+Resolution follows the scanned image's own: rendering above the native
+DPI costs time without adding detail, so it is clamped to
+[OCR_MIN_DPI, OCR_MAX_DPI].
+
+Cache entries live under OCR_CACHE_DIR, keyed by a SHA-256 of the page's
+content stream, its image data, the region and the OCR settings.
+"""
+
+import hashlib
+import io
+import os
+from typing import List, Optional, Tuple
+
+from app.core import metrics
+from app.core.config import settings
+
+
+# ============================================================
+# CLASSIFIER
+# ============================================================
+
+def _area(rect) -> float:
+    return max(rect[2] - rect[0], 0.0) * max(rect[3] - rect[1], 0.0)
+
+
+def _native_dpi(image) -> float:
+    x0, _, x1, _ = image["bbox"]
+    width_inches = (x1 - x0) / 72
+    return image["width"] / width_inches if width_inches > 0 else 0.0
+
+
+def _render_dpi(images) -> int:
+    native = max((_native_dpi(image) for image in images), default=0.0)
+    if not native:
+        return settings.OCR_MAX_DPI
+    return int(min(max(native, settings.OCR_MIN_DPI), settings.OCR_MAX_DPI))
+
+
+def plan_page(page, text: str) -> List[Tuple[Optional[tuple], int]]:
+    """
+    Regions of a page to OCR, as (clip, dpi); clip None is the whole page.
+    Empty when the text layer is all there is to read.
+    """
+    page_rect = tuple(page.rect)
+    page_area = _area(page_rect) or 1.0
+
+    placed = []
+    for image in page.get_image_info(xrefs=True):
+        bbox = (
+            max(image["bbox"][0], page_rect[0]), max(image["bbox"][1], page_rect[1]),
+            min(image["bbox"][2], page_rect[2]), min(image["bbox"][3], page_rect[3])
+        )
+        if _area(bbox) > 0:
+            placed.append({**image, "bbox": bbox})
+
+    # No usable text layer: judged on all images together, since scans are
+    # often stored as many strips or tiles that are each small
+    if len(text.strip()) < settings.OCR_MIN_TEXT_CHARS:
+        total = sum(_area(image["bbox"]) for image in placed)
+        if total < settings.OCR_MIN_IMAGE_FRACTION * page_area:
+            return []
+        return [(None, _render_dpi(placed))]
+
+    images = [image for image in placed if _area(image["bbox"]) >= settings.OCR_MIN_IMAGE_FRACTION * page_area]
+    if not images:
+        return []
+
+    coverage = min(sum(_area(image["bbox"]) for image in images) / page_area, 1.0)
+    if coverage >= settings.OCR_SEARCHABLE_COVERAGE:
+        return []
+
+    return [(image["bbox"], _render_dpi([image])) for image in images]
+
+
+# ============================================================
+# CACHE
+# ============================================================
+
+def _page_digest(page) -> "hashlib._Hash":
+    digest = hashlib.sha256(page.read_contents())
+    digest.update(repr(tuple(page.rect)).encode())
+    for image in page.get_images(full=True):
+        digest.update(page.parent.xref_stream_raw(image[0]) or b"")
+    return digest
+
+
+def _cache_key(digest, clip, dpi: int) -> str:
+    digest = digest.copy()
+    digest.update(
+        f"{settings.OCR_ENGINE}|{settings.OCR_LANGUAGE}|{settings.OCR_TESSERACT_CONFIG}|{clip}|{dpi}".encode()
+    )
+    return digest.hexdigest()
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(settings.OCR_CACHE_DIR, key[:2], f"{key}.txt")
+
+
+def _cache_get(key: str) -> Optional[str]:
+    if not settings.OCR_CACHE_DIR:
+        return None
+    try:
+        with open(_cache_path(key), "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _cache_put(key: str, text: str):
+    if not settings.OCR_CACHE_DIR:
+        return
+    path = _cache_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+# ============================================================
+# OCR
+# ============================================================
+
+def _recognize(page, clip, dpi: int) -> str:
+    import pytesseract
+    from PIL import Image
+
+    pix = page.get_pixmap(dpi=dpi, clip=clip)
+    image = Image.open(io.BytesIO(pix.tobytes("png")))
+    return pytesseract.image_to_string(
+        image,
+        lang=settings.OCR_LANGUAGE,
+        config=settings.OCR_TESSERACT_CONFIG
+    ).strip()
+
+
+def ocr_page(page, text: str = "") -> str:
+    """
+    Text recovered by OCR for a PyMuPDF page whose text layer is `text`;
+    "" when the page needs none (or OCR_ENGINE is "none").
+    """
+    if settings.OCR_ENGINE == "none":
+        return ""
+
+    regions = plan_page(page, text)
+    if not regions:
+        metrics.OCR_PAGES.labels(outcome="skipped").inc()
+        return ""
+
+    digest = _page_digest(page)
+    parts, cached = [], True
+    for clip, dpi in regions:
+        key = _cache_key(digest, clip, dpi)
+        result = _cache_get(key)
+        if result is None:
+            cached = False
+            result = _recognize(page, clip, dpi)
+            _cache_put(key, result)
+        if result:
+            parts.append(result)
+
+    metrics.OCR_PAGES.labels(outcome="cached" if cached else "ocr").inc()
+    return "\n\n".join(parts)
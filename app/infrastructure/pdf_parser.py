@@ -1,7 +1,17 @@
 import fitz
-import pytesseract
-from PIL import Image
-import io
+import re
+import statistics
+
+from app.core.config import settings
+from app.infrastructure.ocr import ocr_page
+from app.infrastructure.text_chunker import ends_sentence, is_heading
+
+
+# Running headers/footers that would otherwise split sections
+_PAGE_NUMBER_RE = re.compile(r"\s*(?:page\s+)?\d+(?:\s*(?:of|/)\s*\d+)?\s*", re.IGNORECASE)
+_NUMBERING_RE = re.compile(r"\s*(\d+(?:\.\d+)*)[.)]?\s")
+
+BOLD_FLAG = 16
 
 
 def extract_text(file_path: str):
@@ -11,12 +21,10 @@ def extract_text(file_path: str):
     for page_number, page in enumerate(doc):
         text = page.get_text()
 
-        # OCR fallback if text empty
-        if not text.strip():
-            pix = page.get_pixmap()
-            img_bytes = pix.tobytes("png")
-            image = Image.open(io.BytesIO(img_bytes))
-            text = pytesseract.image_to_string(image)
+        # OCR for scanned pages and image regions (cached)
+        recognized = ocr_page(page, text)
+        if recognized:
+            text = f"{text.strip()}\n\n{recognized}"
 
         pages.append({
             "page": page_number + 1,
@@ -24,3 +32,142 @@ def extract_text(file_path: str):
         })
 
     return pages
+
+
+# ============================================================
+# LAYOUT (SECTION) EXTRACTION
+# ============================================================
+
+def _page_lines(page):
+    """
+    (text, size, bold, starts_block) for each text line of a page, in
+    reading order. OCR'd text has no font information (size 0) and follows
+    the text layer.
+    """
+    lines = []
+    # Image blocks are skipped without decoding their pixels
+    flags = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+    for block in page.get_text("dict", flags=flags, sort=True)["blocks"]:
+        if block.get("type") != 0:
+            continue
+        for n, line in enumerate(block["lines"]):
+            spans = [s for s in line["spans"] if s["text"].strip()]
+            if not spans:
+                continue
+            text = "".join(s["text"] for s in line["spans"]).strip()
+            size = max(s["size"] for s in spans)
+            bold = all(s["flags"] & BOLD_FLAG for s in spans)
+            lines.append((text, size, bold, n == 0))
+
+    # Blank lines in OCR output separate paragraphs
+    previous = ""
+    for line in ocr_page(page, "\n".join(line[0] for line in lines)).splitlines():
+        if line.strip():
+            lines.append((line.strip(), 0.0, False, not previous.strip()))
+        previous = line
+
+    return lines
+
+
+def _heading_level(text: str, size: float, heading_sizes: list) -> int:
+    numbering = _NUMBERING_RE.match(text)
+    if numbering:
+        return numbering.group(1).count(".") + 1
+    if size in heading_sizes:
+        return heading_sizes.index(size) + 1
+    return 1
+
+
+def extract_sections(file_path: str):
+    """
+    Pages plus the document's sections, which may span pages.
+
+    A line is a heading when its font is noticeably larger than the body
+    text, or it is a short bold line, or it looks like a numbered or
+    ALL-CAPS heading; the last two only after a line that ended a
+    sentence (or another heading), so a wrapped paragraph is never split.
+    Nesting comes from the numbering depth ("4.2" is under "4") or, for
+    unnumbered headings, from font size.
+
+    Every line lands in some section's text: a heading directly followed
+    by another heading is carried into the next section's text.
+
+    Returns:
+        {"pages": [{"page", "text"}],
+         "sections": [{"path": [heading, ...], "text": str,
+                       "lines": [(section_offset, page, page_offset)]}]}
+
+        "lines" maps each line of a section's text back to its page and
+        character offset in that page's text.
+    """
+    doc = fitz.open(file_path)
+    layout = [_page_lines(page) for page in doc]
+
+    sizes = [size for lines in layout for _, size, _, _ in lines if size]
+    body_size = statistics.median(sizes) if sizes else 0.0
+    heading_sizes = sorted(
+        {round(s, 1) for s in sizes if s >= body_size * settings.SECTION_HEADING_SCALE},
+        reverse=True
+    )
+
+    pages, sections = [], []
+    path = []                          # [(level, title)]
+    section = {"path": [], "text": "", "lines": []}
+    has_body = False                   # section has lines besides its headings
+    after_break = True                 # previous line ended a sentence or was a heading
+
+    for page_number, lines in enumerate(layout, start=1):
+        page_text = ""
+        for text, size, bold, starts_block in lines:
+            if _PAGE_NUMBER_RE.fullmatch(text):
+                continue
+
+            short = len(text) <= settings.SECTION_HEADING_MAX_CHARS
+            heading = short and not text.endswith((".", ",", ";")) and (
+                (size and round(size, 1) in heading_sizes)
+                or (after_break and ((bold and starts_block) or is_heading(text)))
+            )
+            after_break = heading or ends_sentence(text)
+
+            if heading:
+                if has_body:
+                    sections.append(section)
+                    carried_text, carried_lines = "", []
+                else:
+                    # Headings with no body yet open the next section's text
+                    carried_text, carried_lines = section["text"], section["lines"]
+                has_body = False
+                level = _heading_level(text, round(size, 1), heading_sizes)
+                while path and path[-1][0] >= level:
+                    path.pop()
+                path.append((level, text))
+                section = {"path": [title for _, title in path], "text": carried_text, "lines": carried_lines}
+            else:
+                has_body = True
+
+            if page_text:
+                page_text += "\n\n" if starts_block else "\n"
+            if section["text"]:
+                # A paragraph carries on across a page break
+                section["text"] += "\n\n" if starts_block and section["lines"][-1][1] == page_number else "\n"
+
+            section["lines"].append((len(section["text"]), page_number, len(page_text)))
+            section["text"] += text
+            page_text += text
+
+        pages.append({"page": page_number, "text": page_text})
+
+    if section["lines"]:
+        sections.append(section)
+
+    return {"pages": pages, "sections": sections}
+
+
+def load_document(file_path: str):
+    """
+    Parsed document for chunking: {"pages": [...]} and, when
+    CHUNK_SEGMENTATION is "section", "sections" (see extract_sections).
+    """
+    if settings.CHUNK_SEGMENTATION == "section":
+        return extract_sections(file_path)
+    return {"pages": extract_text(file_path)}
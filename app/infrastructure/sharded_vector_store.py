@@ -0,0 +1,296 @@
+"""
+Sharded vector store.
+
+Spreads one logical collection over several backend stores ("shards") so
+index size and query latency scale with a shard rather than the whole
+customer base. VECTOR_SHARDING selects how chunks are placed:
+
+    hash    - VECTOR_SHARD_COUNT fixed shards, chosen by crc32(chunk id)
+    tenant  - one shard per value of VECTOR_SHARD_TENANT_FIELD (created on
+              first write); chunks without the field go to a default shard
+
+Queries whose `where` pins the tenant field (tenant sharding) touch only
+that tenant's shard; everything else fans out to all shards in parallel
+and the per-shard top-k lists are merged with a heap. Chunks stay in the
+shard they were added to, so changing a chunk's tenant means delete + add.
+"""
+
+import heapq
+import re
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from itertools import islice
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.infrastructure.metadata_filter import equality_value
+from app.infrastructure.vector_store import VectorStore
+
+
+STRATEGIES = ("hash", "tenant")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _fan_out_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.VECTOR_SHARD_QUERY_WORKERS,
+                    thread_name_prefix="shard-query"
+                )
+    return _executor
+
+
+class ShardedVectorStore(VectorStore):
+    """Routes VectorStore calls to per-shard stores"""
+
+    name = "sharded"
+
+    def __init__(
+        self,
+        collection: str,
+        open_shard: Callable[[str], VectorStore],
+        list_shards: Callable[[], List[str]],
+        strategy: str = "hash",
+        shard_count: int = 4,
+        tenant_field: str = "insurer"
+    ):
+        """
+        Args:
+            collection: Logical collection name, used as the shard name prefix
+            open_shard: Opens (creating if needed) the store for a shard name
+            list_shards: Names of the shards that already exist on disk
+            strategy: "hash" or "tenant"
+            shard_count: Number of shards for hash sharding
+            tenant_field: Chunk metadata key used for tenant sharding
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown VECTOR_SHARDING strategy: {strategy}")
+
+        self.collection = collection
+        self.strategy = strategy
+        self.shard_count = shard_count
+        self.tenant_field = tenant_field
+
+        self._open_shard = open_shard
+        self._list_shards = list_shards
+        self._shards: Dict[str, VectorStore] = {}
+        self._lock = threading.Lock()
+
+        if strategy == "hash":
+            for n in range(shard_count):
+                self._shard(self._hash_shard_name(n))
+
+    # ------------------------------------------------------------
+    # Placement
+    # ------------------------------------------------------------
+
+    def _hash_shard_name(self, n: int) -> str:
+        return f"{self.collection}_shard{n:02d}"
+
+    def _tenant_shard_name(self, tenant: Any) -> str:
+        if tenant is None:
+            return f"{self.collection}_t_default"
+        # Collection names are restricted to [a-zA-Z0-9._-]; the checksum
+        # keeps tenants that slug to the same text apart
+        slug = re.sub(r"[^a-zA-Z0-9]+", "-", str(tenant)).strip("-").lower()[:48]
+        return f"{self.collection}_t_{slug or 'x'}_{zlib.crc32(str(tenant).encode('utf-8')):08x}"
+
+    def shard_for(self, chunk_id: str, metadata: Optional[dict] = None) -> str:
+        """Name of the shard a new chunk is written to."""
+        if self.strategy == "hash":
+            return self._hash_shard_name(zlib.crc32(chunk_id.encode("utf-8")) % self.shard_count)
+        return self._tenant_shard_name((metadata or {}).get(self.tenant_field))
+
+    def _shard(self, name: str) -> VectorStore:
+        if name not in self._shards:
+            with self._lock:
+                if name not in self._shards:
+                    self._shards[name] = self._open_shard(name)
+        return self._shards[name]
+
+    def shard_names(self) -> List[str]:
+        """All shards of this collection, including ones written by other processes."""
+        prefix = f"{self.collection}_shard" if self.strategy == "hash" else f"{self.collection}_t_"
+        names = {name for name in self._list_shards() if name.startswith(prefix)}
+        names.update(self._shards)
+        return sorted(names)
+
+    def _targets(self, where: Dict[str, Any] = None) -> List[VectorStore]:
+        """Shards that can hold chunks matching `where`."""
+        names = self.shard_names()
+
+        if self.strategy == "tenant":
+            tenant = equality_value(where, self.tenant_field)
+            if tenant is not None:
+                names = [n for n in names if n == self._tenant_shard_name(tenant)]
+
+        return [self._shard(n) for n in names]
+
+    def _locate(self, ids: List[str]) -> Dict[str, List[str]]:
+        """Group existing chunk ids by the shard holding them."""
+        if self.strategy == "hash":
+            grouped: Dict[str, List[str]] = {}
+            for chunk_id in ids:
+                grouped.setdefault(self.shard_for(chunk_id), []).append(chunk_id)
+            return grouped
+
+        grouped = {}
+        for name in self.shard_names():
+            found = self._shard(name).get(ids=ids, include=[])["ids"]
+            if found:
+                grouped[name] = list(found)
+        return grouped
+
+    # ------------------------------------------------------------
+    # VectorStore API
+    # ------------------------------------------------------------
+
+    def add(self, ids, documents, metadatas, embeddings):
+        grouped: Dict[str, List[int]] = {}
+        for n, chunk_id in enumerate(ids):
+            grouped.setdefault(self.shard_for(chunk_id, metadatas[n]), []).append(n)
+
+        for name, rows in grouped.items():
+            self._shard(name).add(
+                ids=[ids[n] for n in rows],
+                documents=[documents[n] for n in rows],
+                metadatas=[metadatas[n] for n in rows],
+                embeddings=[embeddings[n] for n in rows]
+            )
+
+    def update(self, ids, documents=None, metadatas=None, embeddings=None):
+        position = {chunk_id: n for n, chunk_id in enumerate(ids)}
+
+        for name, shard_ids in self._locate(ids).items():
+            rows = [position[chunk_id] for chunk_id in shard_ids]
+            self._shard(name).update(
+                ids=shard_ids,
+                documents=[documents[n] for n in rows] if documents is not None else None,
+                metadatas=[metadatas[n] for n in rows] if metadatas is not None else None,
+                embeddings=[embeddings[n] for n in rows] if embeddings is not None else None
+            )
+
+    def get(self, ids=None, where=None, include=None, limit=None, offset=None):
+        include = include or ["documents", "metadatas"]
+        result = {key: [] for key in ["ids"] + list(include)}
+
+        if ids is not None:
+            targets = [(self._shard(name), shard_ids) for name, shard_ids in self._locate(ids).items()]
+        else:
+            targets = [(shard, None) for shard in self._targets(where)]
+
+        # Shards are paged in name order, so limit/offset walk one stable sequence
+        skip = offset or 0
+        remaining = limit
+
+        for shard, shard_ids in targets:
+            if remaining is not None and remaining <= 0:
+                break
+
+            if shard_ids is None and not where:
+                size = shard.count()
+                if skip >= size:
+                    skip -= size
+                    continue
+                part = shard.get(include=include, limit=remaining, offset=skip)
+            else:
+                part = shard.get(ids=shard_ids, where=where, include=include)
+                found = len(part["ids"])
+                if skip >= found:
+                    skip -= found
+                    continue
+                end = skip + remaining if remaining is not None else None
+                part = {key: list(part[key])[skip:end] for key in result}
+
+            skip = 0
+            for key in result:
+                result[key].extend(part[key])
+            if remaining is not None:
+                remaining -= len(part["ids"])
+
+        return result
+
+    def query(self, query_embeddings, n_results=10, where=None, include=None):
+        include = include or ["documents", "metadatas", "distances"]
+        shard_include = list(include) if "distances" in include else list(include) + ["distances"]
+        keys = ["ids"] + list(include)
+
+        targets = self._targets(where)
+        if not targets:
+            return {key: [[] for _ in query_embeddings] for key in keys}
+
+        def run(shard):
+            return shard.query(
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+                where=where,
+                include=shard_include
+            )
+
+        if len(targets) == 1:
+            return run(targets[0])
+
+        parts = list(_fan_out_executor().map(run, targets))
+
+        result = {key: [] for key in keys}
+        for column in range(len(query_embeddings)):
+            # Each shard's hits are sorted by distance; merge lazily and stop at k
+            hits = [
+                [(distance, s, n) for n, distance in enumerate(part["distances"][column])]
+                for s, part in enumerate(parts)
+            ]
+            top = list(islice(heapq.merge(*hits), n_results))
+
+            for key in keys:
+                result[key].append([parts[s][key][column][n] for _, s, n in top])
+
+        return result
+
+    def delete(self, ids=None, where=None):
+        if ids is not None:
+            for name, shard_ids in self._locate(ids).items():
+                self._shard(name).delete(ids=shard_ids, where=where)
+            return
+
+        for shard in self._targets(where):
+            shard.delete(where=where)
+
+    def count(self):
+        return sum(self.shard_sizes().values())
+
+    def get_info(self):
+        for name in self.shard_names():
+            info = self._shard(name).get_info()
+            if info:
+                return info
+        return {}
+
+    def set_info(self, info):
+        for name in self.shard_names():
+            self._shard(name).set_info(info)
+
+    # ------------------------------------------------------------
+    # Shard maintenance
+    # ------------------------------------------------------------
+
+    def shard_sizes(self) -> Dict[str, int]:
+        """Chunk count per shard, for monitoring and rebalancing."""
+        return {name: self._shard(name).count() for name in self.shard_names()}
+
+    @contextmanager
+    def write_lock(self):
+        """Hold every shard's writer lock (backends that have one)."""
+        with ExitStack() as stack:
+            for name in self.shard_names():
+                shard = self._shard(name)
+                if hasattr(shard, "write_lock"):
+                    stack.enter_context(shard.write_lock())
+            yield
@@ -0,0 +1,119 @@
+"""
+Source -> chunk id index.
+
+Records which chunk ids were written for each ingested document
+("source", the uploaded filename) and the stored file's SHA-256, so a
+document can be deleted or replaced by touching only its own chunks
+instead of scanning the collection.
+
+Kept in SQLite (SOURCE_INDEX_PATH) rather than a JSON registry: every
+update is a few indexed row writes, not a rewrite of the whole file,
+which matters during bulk ingestion. Safe to share between processes.
+
+Documents ingested before the index existed are picked up with
+`python -m app.cli.index sources --rebuild`.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    chunk_id TEXT PRIMARY KEY,
+    source   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_by_source ON chunks (source);
+CREATE TABLE IF NOT EXISTS sources (
+    source TEXT PRIMARY KEY,
+    sha256 TEXT,
+    path   TEXT
+);
+"""
+
+_BATCH = 500  # SQLite host parameter limit is 999 on older builds
+
+
+class SourceIndex:
+    """Source -> chunk ids, backed by one SQLite file"""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def add(self, source: str, chunk_ids: List[str], sha256: str = None, path: str = None):
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO chunks (chunk_id, source) VALUES (?, ?)",
+                [(chunk_id, source) for chunk_id in chunk_ids]
+            )
+            if sha256 or path:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sources (source, sha256, path) VALUES (?, ?, ?)",
+                    (source, sha256, path)
+                )
+            else:
+                self._db.execute("INSERT OR IGNORE INTO sources (source) VALUES (?)", (source,))
+
+    def chunk_ids(self, source: str) -> List[str]:
+        with self._lock:
+            rows = self._db.execute("SELECT chunk_id FROM chunks WHERE source = ?", (source,)).fetchall()
+        return [row[0] for row in rows]
+
+    def get(self, source: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT source, sha256, path FROM sources WHERE source = ?", (source,)
+            ).fetchone()
+        return dict(zip(("source", "sha256", "path"), row)) if row else None
+
+    def remove_chunks(self, chunk_ids: List[str]):
+        with self._lock, self._db:
+            for start in range(0, len(chunk_ids), _BATCH):
+                batch = chunk_ids[start:start + _BATCH]
+                self._db.execute(
+                    f"DELETE FROM chunks WHERE chunk_id IN ({','.join('?' * len(batch))})", batch
+                )
+
+    def remove_source(self, source: str):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM chunks WHERE source = ?", (source,))
+            self._db.execute("DELETE FROM sources WHERE source = ?", (source,))
+
+    def sha_in_use(self, sha256: str) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM sources WHERE sha256 = ? LIMIT 1", (sha256,)).fetchone() is not None
+
+    def sources(self) -> List[Dict[str, object]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT s.source, s.sha256, COUNT(c.chunk_id) FROM sources s "
+                "LEFT JOIN chunks c ON c.source = s.source GROUP BY s.source ORDER BY s.source"
+            ).fetchall()
+        return [{"source": source, "sha256": sha256, "chunks": count} for source, sha256, count in rows]
+
+    def clear(self):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM chunks")
+            self._db.execute("DELETE FROM sources")
+
+
+_index: Optional[SourceIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_source_index() -> SourceIndex:
+    global _index
+
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SourceIndex(settings.SOURCE_INDEX_PATH)
+    return _index
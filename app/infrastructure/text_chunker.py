@@ -1,12 +1,316 @@
-def chunk_text(text: str, chunk_size: int = 400, overlap: int = 80):
-    words = text.split()
-    chunks = []
-
-    start = 0
-    while start < len(words):
-        end = start + chunk_size
-        chunk = words[start:end]
-        chunks.append(" ".join(chunk))
-        start += chunk_size - overlap
-
-    return chunks
+"""
+Text Chunker
+
+Streams over a page of text and packs whole sentences into chunks of at
+most CHUNK_MAX_TOKENS embedding-model tokens (never more than the model
+encodes without truncation), carrying the last
+CHUNK_OVERLAP_TOKENS worth of sentences into the next chunk. Section
+headings (numbered clauses, ALL-CAPS titles) always start a new chunk, so
+a chunk never straddles two sections and clause boundaries survive for
+clause extraction.
+
+Chunks are returned as character spans of the input ({"text", "start",
+"end", "tokens"}); the text is a single slice of the page, so evidence
+can be traced back to its exact position.
+
+With CHUNK_SEGMENTATION = "section", a document is chunked by the
+sections pdf_parser.extract_sections() finds across pages instead of page
+by page; such chunks record their section path and page span.
+"""
+
+import bisect
+import re
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+# Blocks are runs of non-blank lines; headings are their own block
+_LINE_RE = re.compile(r"[^\n]+")
+_HEADING_RE = re.compile(
+    r"\s*(?:"
+    r"(?i:section|clause|part|article)\s+\d+[\w.]*"   # Section 4 / Clause 2.1
+    r"|\d+(?:\.\d+)*[.)]?\s+[A-Z][^.!?]{0,80}"          # 4.2 Exclusions
+    r"|[A-Z][A-Z0-9 ,&/()\-]{3,80}"                     # GENERAL CONDITIONS
+    r")\s*:?\s*$"
+)
+# A sentence ends at . ! ? (plus closing quotes/brackets) followed by space
+_SENTENCE_RE = re.compile(r"\S.*?(?:[.!?][\"')\]]*(?=\s)|$)", re.DOTALL)
+_APPROX_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+_token_counter: Optional[Callable[[str], int]] = None
+_token_budget: Optional[int] = None
+
+
+# ============================================================
+# TOKEN COUNTING
+# ============================================================
+
+def approx_token_count(text: str) -> int:
+    """Word and punctuation count; close to WordPiece for English prose."""
+    return len(_APPROX_TOKEN_RE.findall(text))
+
+
+def _load_token_counter() -> Callable[[str], int]:
+    if settings.CHUNK_TOKENIZER != "model":
+        return approx_token_count
+
+    try:
+        from app.infrastructure.embeddings import get_model
+        tokenizer = getattr(get_model(), "tokenizer", None)
+    except Exception:
+        tokenizer = None
+
+    if tokenizer is None:
+        return approx_token_count
+
+    def count(text: str) -> int:
+        return len(tokenizer(text, add_special_tokens=False, return_attention_mask=False)["input_ids"])
+
+    return count
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in `text` for the embedding model (CHUNK_TOKENIZER)."""
+    global _token_counter
+
+    if _token_counter is None:
+        _token_counter = _load_token_counter()
+    return _token_counter(text)
+
+
+def token_budget() -> int:
+    """
+    CHUNK_MAX_TOKENS, capped so a chunk plus [CLS]/[SEP] fits the model's
+    max_seq_length and is never silently truncated.
+    """
+    global _token_budget
+
+    if _token_budget is None:
+        limit = None
+        if settings.CHUNK_TOKENIZER == "model":
+            try:
+                from app.infrastructure.embeddings import get_model
+                limit = getattr(get_model(), "max_seq_length", None)
+            except Exception:
+                limit = None
+        _token_budget = min(settings.CHUNK_MAX_TOKENS, limit - 2) if limit else settings.CHUNK_MAX_TOKENS
+    return _token_budget
+
+
+# ============================================================
+# SEGMENTATION
+# ============================================================
+
+def is_heading(line: str) -> bool:
+    """Numbered clause, "Section N" or ALL-CAPS title line."""
+    return _HEADING_RE.fullmatch(line) is not None
+
+
+def ends_sentence(line: str) -> bool:
+    """Whether a line ends a sentence, so the next one may be a heading."""
+    return line.rstrip().rstrip("\"')]").endswith((".", "!", "?", ":", ";"))
+
+
+def _blocks(text: str) -> Iterator[Tuple[int, int, bool]]:
+    """
+    (start, end, is_heading) for paragraph blocks and heading lines. A
+    line inside a paragraph is a heading only after a line that ended a
+    sentence, so wrapped text is never cut at a line break.
+    """
+    block_start = block_end = None
+    # Start of the block's last line; only that line can end the sentence
+    last_start = None
+
+    for line in _LINE_RE.finditer(text):
+        start, end = line.span()
+        blank = not line.group().strip()
+        heading = not blank and is_heading(line.group()) and (
+            block_start is None
+            or text.count("\n", block_end, start) > 1
+            or ends_sentence(text[last_start:block_end])
+        )
+
+        if blank or heading:
+            if block_start is not None:
+                yield block_start, block_end, False
+                block_start = None
+            if heading:
+                yield start, end, True
+            continue
+
+        # A blank line (two newlines in a row) also ends the block
+        if block_start is not None and text.count("\n", block_end, start) > 1:
+            yield block_start, block_end, False
+            block_start = None
+
+        if block_start is None:
+            block_start = start
+        last_start, block_end = start, end
+
+    if block_start is not None:
+        yield block_start, block_end, False
+
+
+def _sentences(text: str) -> Iterator[Tuple[int, int, bool]]:
+    """(start, end, starts_section) spans of sentences, in order."""
+    for start, end, heading in _blocks(text):
+        if heading:
+            yield start + len(text[start:end]) - len(text[start:end].lstrip()), end, True
+            continue
+        for match in _SENTENCE_RE.finditer(text, start, end):
+            yield match.start(), match.end(), False
+
+
+def _split_long(text: str, start: int, end: int, max_tokens: int) -> Iterator[Tuple[int, int]]:
+    """Break a sentence longer than max_tokens at word boundaries."""
+    piece_start = start
+    piece_tokens = 0
+    last_end = start
+
+    for word in re.finditer(r"\S+", text[start:end]):
+        tokens = count_tokens(word.group())
+        if piece_tokens and piece_tokens + tokens > max_tokens:
+            yield piece_start, last_end
+            piece_start, piece_tokens = start + word.start(), 0
+        piece_tokens += tokens
+        last_end = start + word.end()
+
+    if piece_tokens:
+        yield piece_start, last_end
+
+
+# ============================================================
+# CHUNKING
+# ============================================================
+
+def iter_chunks(text: str, max_tokens: int = None, overlap_tokens: int = None) -> Iterator[Dict]:
+    """
+    Sentence-aligned chunks of `text`.
+
+    Args:
+        text: Page text
+        max_tokens: Chunk size in model tokens (token_budget())
+        overlap_tokens: Sentences carried into the next chunk, in tokens
+            (CHUNK_OVERLAP_TOKENS); never carried across a section heading
+
+    Yields:
+        {"text", "start", "end", "tokens"} with text == text[start:end]
+    """
+    max_tokens = max_tokens or token_budget()
+    overlap_tokens = settings.CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+
+    window: List[Tuple[int, int, int]] = []     # (start, end, tokens)
+    window_tokens = 0
+    window_body = False                         # more than headings in the window
+    emitted_end = -1
+
+    def emit():
+        start, end = window[0][0], window[-1][1]
+        return {"text": text[start:end], "start": start, "end": end, "tokens": window_tokens}
+
+    for start, end, new_section in _sentences(text):
+        tokens = count_tokens(text[start:end])
+        pieces = (
+            [(s, e, count_tokens(text[s:e])) for s, e in _split_long(text, start, end, max_tokens)]
+            if tokens > max_tokens else [(start, end, tokens)]
+        )
+
+        for n, piece in enumerate(pieces):
+            # Consecutive headings stay together with the body that follows
+            section_break = new_section and n == 0 and window_body
+            if window and (window_tokens + piece[2] > max_tokens or section_break):
+                if window[-1][1] > emitted_end:
+                    yield emit()
+                    emitted_end = window[-1][1]
+
+                if section_break:
+                    window, window_tokens = [], 0
+                else:
+                    # Keep trailing sentences as overlap
+                    kept, kept_tokens = [], 0
+                    for span in reversed(window):
+                        if kept_tokens + span[2] > overlap_tokens or kept_tokens + span[2] + piece[2] > max_tokens:
+                            break
+                        kept.insert(0, span)
+                        kept_tokens += span[2]
+                    window, window_tokens = kept, kept_tokens
+                window_body = bool(window)
+
+            window.append(piece)
+            window_tokens += piece[2]
+            window_body = window_body or not new_section
+
+    if window and window[-1][1] > emitted_end:
+        yield emit()
+
+
+def chunk_spans(text: str, max_tokens: int = None, overlap_tokens: int = None) -> List[Dict]:
+    return list(iter_chunks(text, max_tokens, overlap_tokens))
+
+
+def chunk_text(text: str, chunk_size: int = None, overlap: int = None) -> List[str]:
+    """Chunk texts only; sizes are in model tokens (see iter_chunks)."""
+    return [chunk["text"] for chunk in iter_chunks(text, chunk_size, overlap)]
+
+
+# ============================================================
+# DOCUMENTS
+# ============================================================
+
+def iter_page_chunks(pages: List[Dict]) -> Iterator[Dict]:
+    """Chunks of each page on its own; adds "page", "page_end", "chunk"."""
+    for page in pages:
+        if not page["text"].strip():
+            continue
+        for i, chunk in enumerate(iter_chunks(page["text"])):
+            yield {**chunk, "page": page["page"], "page_end": page["page"], "chunk": i}
+
+
+def iter_section_chunks(sections: List[Dict]) -> Iterator[Dict]:
+    """
+    Chunks of each section, which may cross pages. "start"/"end" are
+    offsets into the text of "page" and "page_end" respectively; "section"
+    is the heading path joined with " > ".
+    """
+    for section in sections:
+        offsets = [line[0] for line in section["lines"]]
+
+        def locate(offset: int):
+            n = bisect.bisect_right(offsets, offset) - 1
+            _, page, page_offset = section["lines"][n]
+            return page, page_offset + offset - offsets[n]
+
+        for i, chunk in enumerate(iter_chunks(section["text"])):
+            page, start = locate(chunk["start"])
+            page_end, end = locate(chunk["end"] - 1)
+            yield {
+                **chunk,
+                "start": start,
+                "end": end + 1,
+                "page": page,
+                "page_end": page_end,
+                "chunk": i,
+                "section": " > ".join(section["path"])
+            }
+
+
+def iter_document_chunks(document: Dict) -> Iterator[Dict]:
+    """Chunks of a pdf_parser.load_document() result, by section when parsed so."""
+    if "sections" in document:
+        return iter_section_chunks(document["sections"])
+    return iter_page_chunks(document["pages"])
+
+
+def chunk_metadata(chunk: Dict) -> Dict:
+    """Position metadata stored with a chunk (Chroma rejects None values)."""
+    metadata = {
+        "page": chunk["page"],
+        "page_end": chunk["page_end"],
+        "chunk": chunk["chunk"],
+        "char_start": chunk["start"],
+        "char_end": chunk["end"]
+    }
+    if chunk.get("section"):
+        metadata["section"] = chunk["section"]
+    return metadata
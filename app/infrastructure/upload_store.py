@@ -0,0 +1,107 @@
+"""
+Upload Store
+
+Streams uploaded PDFs to disk without blocking the event loop, hashing
+them (SHA-256) on the way, and files them under a content-addressed path
+(UPLOAD_DIR/ab/abcdef....pdf). Re-uploading the same bytes, under any
+filename, reuses the stored file, and two different files with the same
+name never overwrite each other.
+
+Limits are enforced before any parsing:
+    UPLOAD_MAX_BYTES   - checked against the declared size, then while
+                         streaming, so the copy stops at the limit
+    UPLOAD_MAX_PAGES   - read from the PDF page tree only
+
+Starlette spools the multipart body before the handler runs, so cap the
+request body at the proxy as well (e.g. nginx client_max_body_size).
+"""
+
+import hashlib
+import os
+from typing import Any, Dict
+from uuid import uuid4
+
+import anyio
+from fastapi import UploadFile
+
+from app.core.config import settings
+
+
+PDF_MAGIC = b"%PDF-"
+
+
+class UploadTooLarge(ValueError):
+    """Upload exceeds UPLOAD_MAX_BYTES or UPLOAD_MAX_PAGES"""
+
+
+def stored_path(sha256: str) -> str:
+    return os.path.join(settings.UPLOAD_DIR, sha256[:2], f"{sha256}.pdf")
+
+
+def _page_count(file_path: str) -> int:
+    import fitz
+
+    with fitz.open(file_path) as doc:
+        return doc.page_count
+
+
+async def save_upload(file: UploadFile) -> Dict[str, Any]:
+    """
+    Stream an uploaded PDF to its content-addressed path.
+
+    Returns:
+        {"path", "sha256", "size", "pages", "existing"}
+
+    Raises:
+        UploadTooLarge: If the file exceeds the size or page limit
+        ValueError: If the file is not a PDF
+    """
+    max_bytes = settings.UPLOAD_MAX_BYTES
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLarge(f"Upload is {file.size} bytes; the limit is {max_bytes}")
+
+    tmp_dir = os.path.join(settings.UPLOAD_DIR, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    tmp_path = os.path.join(tmp_dir, f"{uuid4().hex}.part")
+
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        async with await anyio.open_file(tmp_path, "wb") as out:
+            while True:
+                block = await file.read(settings.UPLOAD_CHUNK_BYTES)
+                if not block:
+                    break
+                if size == 0 and not block.startswith(PDF_MAGIC):
+                    raise ValueError("File is not a PDF")
+
+                size += len(block)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds the {max_bytes} byte limit")
+
+                digest.update(block)
+                await out.write(block)
+
+        if size == 0:
+            raise ValueError("Uploaded file is empty")
+
+        try:
+            pages = await anyio.to_thread.run_sync(_page_count, tmp_path)
+        except RuntimeError as e:        # fitz: unreadable / damaged PDF
+            raise ValueError(f"Unreadable PDF: {e}")
+        if pages > settings.UPLOAD_MAX_PAGES:
+            raise UploadTooLarge(f"PDF has {pages} pages; the limit is {settings.UPLOAD_MAX_PAGES}")
+
+        sha256 = digest.hexdigest()
+        path = stored_path(sha256)
+        existing = os.path.exists(path)
+        if not existing:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+
+        return {"path": path, "sha256": sha256, "size": size, "pages": pages, "existing": existing}
+
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -1,14 +1,413 @@
-import chromadb
-from chromadb.config import Settings as ChromaSettings
+"""
+Vector store backends.
+
+`get_vector_store()` returns the configured backend. Every backend exposes
+the subset of the Chroma collection API the services use (add / update /
+get / query / delete / count) with Chroma's argument names and result
+shapes, so services never depend on a particular engine.
+
+Backends:
+    chroma  - chromadb collection (default)
+    mmap    - in-process exact search over a memory-mapped float16/int8/float32
+              matrix, see app.infrastructure.mmap_vector_store
+
+With VECTOR_SHARDING set, the configured backend holds one store per
+shard and get_vector_store() returns a ShardedVectorStore over them (see
+app.infrastructure.sharded_vector_store).
+
+Chroma runs in one of two CHROMA_MODEs:
+    persistent  - chromadb.PersistentClient rooted at CHROMA_PERSIST_DIR
+                  (chroma.sqlite3 plus one HNSW segment directory per
+                  collection); reopened as-is on restart (default)
+    ephemeral   - in-memory only, lost on restart (tests, benchmarks)
+
+Use `python -m app.cli.index snapshot|restore` to copy a built index
+between nodes instead of re-ingesting.
+"""
+
+import fcntl
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
 from app.core.config import settings
 
-client = chromadb.Client(
-    ChromaSettings(
-        persist_directory=settings.CHROMA_PERSIST_DIR,
-        anonymized_telemetry=False
+
+class VectorStore:
+    """Interface shared by all vector store backends"""
+
+    name: str = "base"
+
+    def add(self, ids: List[str], documents: List[str], metadatas: List[dict], embeddings):
+        raise NotImplementedError
+
+    def update(self, ids: List[str], documents: List[str] = None,
+               metadatas: List[dict] = None, embeddings=None):
+        raise NotImplementedError
+
+    def get(self, ids: List[str] = None, where: Dict[str, Any] = None,
+            include: List[str] = None, limit: int = None, offset: int = None) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def query(self, query_embeddings, n_results: int = 10,
+              where: Dict[str, Any] = None, include: List[str] = None) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def delete(self, ids: List[str] = None, where: Dict[str, Any] = None):
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def get_info(self) -> Dict[str, Any]:
+        """Collection-level metadata (e.g. the embedding model it was built with)."""
+        raise NotImplementedError
+
+    def set_info(self, info: Dict[str, Any]):
+        raise NotImplementedError
+
+    def write_lock(self):
+        """Context manager excluding writers in every process (snapshots)."""
+        raise NotImplementedError
+
+
+class WriterLock:
+    """
+    Exclusive writer lock: flock() on `path` across processes, reentrant
+    within one, so every shard of a Chroma directory can hold it at once.
+    Without a path (ephemeral Chroma) it only serialises threads.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    @contextmanager
+    def hold(self):
+        with self._lock:
+            if self._depth == 0 and self.path:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._file = open(self.path, "a")
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0 and self._file is not None:
+                    fcntl.flock(self._file, fcntl.LOCK_UN)
+                    self._file.close()
+                    self._file = None
+
+
+_writer_locks: Dict[Optional[str], WriterLock] = {}
+_writer_locks_lock = threading.Lock()
+
+
+def _writer_lock(path: Optional[str]) -> WriterLock:
+    """One lock object per lock file, shared by every store opened on it."""
+    with _writer_locks_lock:
+        if path not in _writer_locks:
+            _writer_locks[path] = WriterLock(path)
+        return _writer_locks[path]
+
+
+class ChromaVectorStore(VectorStore):
+    """Thin pass-through to a chromadb collection"""
+
+    name = "chroma"
+
+    def __init__(self, collection, lock: WriterLock = None):
+        self.collection = collection
+        self._writer = lock or WriterLock()
+
+    def write_lock(self):
+        """Held by every write and while the index is snapshotted."""
+        return self._writer.hold()
+
+    def add(self, ids, documents, metadatas, embeddings):
+        with self.write_lock():
+            self.collection.add(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+
+    def update(self, ids, documents=None, metadatas=None, embeddings=None):
+        args = {"ids": ids}
+        if documents is not None:
+            args["documents"] = documents
+        if metadatas is not None:
+            args["metadatas"] = metadatas
+        if embeddings is not None:
+            args["embeddings"] = embeddings
+        with self.write_lock():
+            self.collection.update(**args)
+
+    def get(self, ids=None, where=None, include=None, limit=None, offset=None):
+        args = {"include": include or ["documents", "metadatas"]}
+        if ids is not None:
+            args["ids"] = ids
+        if where:
+            args["where"] = where
+        if limit is not None:
+            args["limit"] = limit
+        if offset is not None:
+            args["offset"] = offset
+        return self.collection.get(**args)
+
+    def query(self, query_embeddings, n_results=10, where=None, include=None):
+        args = {
+            "query_embeddings": query_embeddings,
+            "n_results": n_results,
+            "include": include or ["documents", "metadatas", "distances"]
+        }
+        if where:
+            args["where"] = where
+        return self.collection.query(**args)
+
+    def delete(self, ids=None, where=None):
+        args = {}
+        if ids is not None:
+            args["ids"] = ids
+        if where:
+            args["where"] = where
+        with self.write_lock():
+            self.collection.delete(**args)
+
+    def count(self):
+        return self.collection.count()
+
+    def get_info(self):
+        return {
+            key: value
+            for key, value in (self.collection.metadata or {}).items()
+            if not key.startswith("hnsw:")
+        }
+
+    def set_info(self, info):
+        existing = self.collection.metadata or {}
+        hnsw_keys = [key for key in existing if key.startswith("hnsw:")]
+        with self.write_lock():
+            try:
+                self.collection.modify(metadata={**existing, **info})
+            except ValueError:
+                # Chroma >= 1.0 rejects hnsw:* keys in modify() (they live
+                # in the collection configuration there); anything else is real
+                if not hnsw_keys:
+                    raise
+                self.collection.modify(metadata={
+                    **{k: v for k, v in existing.items() if k not in hnsw_keys},
+                    **info
+                })
+
+
+def _chroma_client():
+    import chromadb
+    from chromadb.config import Settings as ChromaSettings
+
+    chroma_settings = ChromaSettings(anonymized_telemetry=False)
+
+    if settings.CHROMA_MODE == "persistent":
+        client = chromadb.PersistentClient(
+            path=settings.CHROMA_PERSIST_DIR,
+            settings=chroma_settings
+        )
+    elif settings.CHROMA_MODE == "ephemeral":
+        client = chromadb.EphemeralClient(settings=chroma_settings)
+    else:
+        raise ValueError(f"Unknown CHROMA_MODE: {settings.CHROMA_MODE}")
+
+    return client
+
+
+def _create_chroma_store(collection: str, mmap_dir: str) -> VectorStore:
+    client = _chroma_client()
+    lock = _writer_lock(
+        os.path.join(settings.CHROMA_PERSIST_DIR, "write.lock")
+        if settings.CHROMA_MODE == "persistent" else None
     )
-)
 
-collection = client.get_or_create_collection(
-    name=settings.DEFAULT_COLLECTION
-)
+    def open_shard(name: str) -> ChromaVectorStore:
+        return ChromaVectorStore(open_collection(client, name, hnsw_metadata()), lock=lock)
+
+    def list_shards() -> List[str]:
+        # Chroma < 0.6 returns Collection objects, later versions names
+        return [getattr(c, "name", c) for c in client.list_collections()]
+
+    if settings.VECTOR_SHARDING == "none":
+        return open_shard(collection)
+    return _sharded(collection, open_shard, list_shards)
+
+
+def hnsw_metadata(
+    space: str = None,
+    m: int = None,
+    construction_ef: int = None,
+    search_ef: int = None
+) -> Dict[str, Any]:
+    """Chroma collection metadata for HNSW parameters (Settings by default)."""
+    return {
+        "hnsw:space": space or settings.HNSW_SPACE,
+        "hnsw:M": m or settings.HNSW_M,
+        "hnsw:construction_ef": construction_ef or settings.HNSW_CONSTRUCTION_EF,
+        "hnsw:search_ef": search_ef or settings.HNSW_SEARCH_EF,
+    }
+
+
+# Metadata key -> collection configuration key (Chroma >= 1.0)
+_HNSW_CONFIGURATION_KEYS = {
+    "hnsw:space": "space",
+    "hnsw:M": "max_neighbors",
+    "hnsw:construction_ef": "ef_construction",
+    "hnsw:search_ef": "ef_search",
+}
+
+
+def _current_hnsw(collection, existing: Dict[str, Any], key: str):
+    """
+    The collection's HNSW setting for a metadata key. Chroma >= 1.0 keeps
+    it in the configuration (set_info drops the hnsw:* metadata there);
+    older versions only have the metadata.
+    """
+    configuration = getattr(collection, "configuration_json", None) or {}
+    hnsw = configuration.get("hnsw") or {}
+    return hnsw.get(_HNSW_CONFIGURATION_KEYS[key], existing.get(key))
+
+
+def _current_search_ef(collection, existing: Dict[str, Any]):
+    return _current_hnsw(collection, existing, "hnsw:search_ef")
+
+
+def _set_search_ef(collection, existing: Dict[str, Any], search_ef: int):
+    try:
+        # Chroma >= 1.0 takes index tuning through the configuration API
+        collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+        return
+    except TypeError:
+        pass
+    except Exception as e:
+        print(f"⚠️ Could not update hnsw:search_ef on {collection.name}: {e}")
+        return
+
+    try:
+        collection.modify(metadata={**existing, "hnsw:search_ef": search_ef})
+    except Exception as e:
+        print(f"⚠️ Could not update hnsw:search_ef on {collection.name}: {e}")
+
+
+def open_collection(client, name: str, metadata: Dict[str, Any]):
+    """
+    Get or create a collection with the given HNSW metadata.
+
+    Build parameters of an existing collection cannot change without a
+    rebuild, so a mismatch is only reported; search_ef is applied in place.
+    """
+    collection = client.get_or_create_collection(name=name, metadata=metadata)
+    existing = collection.metadata or {}
+
+    for key in ("hnsw:space", "hnsw:M", "hnsw:construction_ef"):
+        current = _current_hnsw(collection, existing, key)
+        if current is not None and current != metadata[key]:
+            print(
+                f"⚠️ Collection {name} was built with {key}={current}; "
+                f"configured {metadata[key]} needs a rebuild (export/import) to apply"
+            )
+
+    if _current_search_ef(collection, existing) != metadata["hnsw:search_ef"]:
+        _set_search_ef(collection, existing, metadata["hnsw:search_ef"])
+
+    return collection
+
+
+def index_directory() -> str:
+    """On-disk directory holding the configured backend's index."""
+    if settings.VECTOR_BACKEND == "mmap":
+        return settings.MMAP_INDEX_DIR
+    return settings.CHROMA_PERSIST_DIR
+
+
+def _create_mmap_store(collection: str, mmap_dir: str) -> VectorStore:
+    from app.infrastructure.mmap_vector_store import MmapVectorStore
+
+    if settings.VECTOR_SHARDING == "none":
+        return MmapVectorStore(mmap_dir, dtype=settings.MMAP_INDEX_DTYPE)
+
+    # One subdirectory of the index directory per shard
+    def open_shard(name: str) -> VectorStore:
+        return MmapVectorStore(os.path.join(mmap_dir, name), dtype=settings.MMAP_INDEX_DTYPE)
+
+    def list_shards() -> List[str]:
+        if not os.path.isdir(mmap_dir):
+            return []
+        return [
+            name for name in os.listdir(mmap_dir)
+            if os.path.isdir(os.path.join(mmap_dir, name))
+        ]
+
+    return _sharded(collection, open_shard, list_shards)
+
+
+def _sharded(collection: str, open_shard, list_shards) -> VectorStore:
+    from app.infrastructure.sharded_vector_store import ShardedVectorStore
+
+    return ShardedVectorStore(
+        collection,
+        open_shard=open_shard,
+        list_shards=list_shards,
+        strategy=settings.VECTOR_SHARDING,
+        shard_count=settings.VECTOR_SHARD_COUNT,
+        tenant_field=settings.VECTOR_SHARD_TENANT_FIELD
+    )
+
+
+BACKENDS = {
+    "chroma": _create_chroma_store,
+    "mmap": _create_mmap_store,
+}
+
+_store: Optional[VectorStore] = None
+_store_lock = threading.Lock()
+
+
+def create_vector_store(collection: str = None, mmap_dir: str = None) -> VectorStore:
+    """
+    Open a store with the configured backend. Defaults to the serving
+    collection; the re-embedding job opens its target collection here.
+    """
+    if settings.VECTOR_BACKEND not in BACKENDS:
+        raise ValueError(f"Unknown VECTOR_BACKEND: {settings.VECTOR_BACKEND}")
+    return BACKENDS[settings.VECTOR_BACKEND](
+        collection or settings.DEFAULT_COLLECTION,
+        mmap_dir or settings.MMAP_INDEX_DIR
+    )
+
+
+def get_vector_store() -> VectorStore:
+    """Process-wide vector store for the configured VECTOR_BACKEND."""
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_vector_store()
+
+    return _store
+
+
+def warm_start(probe_embedding=None) -> int:
+    """
+    Open the existing index and page it in without rebuilding anything.
+
+    A single probe query forces Chroma to load the HNSW segment (or the
+    mmap backend to fault in its matrix) before the first real request.
+
+    Returns:
+        Number of chunks in the index
+    """
+    store = get_vector_store()
+    count = store.count()
+
+    if count and probe_embedding is not None:
+        store.query(query_embeddings=[probe_embedding], n_results=1, include=["distances"])
+
+    return count
@@ -1,11 +1,13 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from typing import Optional
 from uuid import uuid4
-import os
-import shutil
+import time
 
 from app.core.config import settings
+from app.core import metrics
+from app.core.profiling import PROFILE_HEADER, PROFILE_TOKEN_HEADER
+from app.schemas.policy import RetrievalScope
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -21,18 +23,73 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Per-route latency histogram and in-flight gauge for /metrics"""
+    if not settings.METRICS_ENABLED:
+        return await call_next(request)
+
+    metrics.REQUESTS_IN_FLIGHT.inc()
+    metrics.sample_threadpool_queue()
+    start = time.perf_counter()
+    status = 500
+
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.REQUESTS_IN_FLIGHT.dec()
+        # Label by route template, not raw path, to keep cardinality bounded
+        route = request.scope.get("route")
+        metrics.REQUEST_LATENCY.labels(
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status)
+        ).observe(time.perf_counter() - start)
+
+
 # Pre-initialize embeddings on startup
 @app.on_event("startup")
 async def startup_event():
     """Pre-warm the embedding model for faster first request"""
+    probe = None
     try:
         from app.infrastructure.embeddings import generate_embedding
         print("🔥 Pre-warming embedding model...")
-        _ = generate_embedding("initialization")
+        probe = generate_embedding("initialization")
         print("✓ Embedding model ready")
     except Exception as e:
         print(f"⚠️ Embedding warm-up failed: {e}")
 
+    if settings.RERANKER_ENABLED:
+        try:
+            from app.infrastructure.cross_encoder import warm_up
+            warm_up()
+            print(f"✓ Cross-encoder ready ({settings.RERANKER_MODEL})")
+        except Exception as e:
+            print(f"⚠️ Cross-encoder warm-up failed: {e}")
+
+    # Open the persisted index as-is; never re-ingest on startup
+    try:
+        from app.infrastructure.vector_store import warm_start
+        count = warm_start(probe)
+        print(f"✓ Vector index ready ({settings.VECTOR_BACKEND}, {count} chunks)")
+    except Exception as e:
+        print(f"⚠️ Vector index warm-up failed: {e}")
+
+    try:
+        from app.services.vector_service import ensure_embedding_identity
+        ensure_embedding_identity()
+    except Exception as e:
+        print(f"⚠️ {e}")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    metrics.mark_worker_exit()
+
 # Import routers
 try:
     from app.api.routers.ingestion import router as ingestion_router
@@ -68,67 +125,115 @@ def health():
     }
 
 
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus exposition of request, pipeline and ingestion metrics"""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+
+    try:
+        from app.infrastructure.vector_store import get_vector_store
+        store = get_vector_store()
+        # Sharded stores report one series per shard for rebalancing
+        sizes = store.shard_sizes() if hasattr(store, "shard_sizes") \
+            else {settings.DEFAULT_COLLECTION: store.count()}
+        for collection, size in sizes.items():
+            metrics.VECTOR_COLLECTION_SIZE.labels(collection=collection).set(size)
+    except Exception as e:
+        print(f"Warning: Could not read collection size: {e}")
+
+    payload, content_type = metrics.render_latest()
+    return Response(content=payload, media_type=content_type)
+
+
 # ============ FRONTEND COMPATIBILITY ENDPOINTS ============
 
-class AskRequest(BaseModel):
+class AskRequest(RetrievalScope):
     question: str
 
 
 @app.post("/upload-policy")
-async def upload_policy(file: UploadFile = File(...)):
+async def upload_policy(
+    file: UploadFile = File(...),
+    insurer: Optional[str] = Form(None),
+    product: Optional[str] = Form(None)
+):
     """Upload and ingest a PDF policy document"""
     if not file.filename or not file.filename.endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
 
+    from app.infrastructure.upload_store import UploadTooLarge
+    from app.services.ingestion_service import ingest_upload
+
+    # Chroma rejects None metadata values, so only set tags that were given
+    scope_tags = {
+        key: value
+        for key, value in (("insurer", insurer), ("product", product))
+        if value
+    }
+
     try:
-        from app.infrastructure.pdf_parser import extract_text
-        from app.infrastructure.text_chunker import chunk_text
-        from app.services.vector_service import add_document
-        
-        UPLOAD_DIR = "data"
-        os.makedirs(UPLOAD_DIR, exist_ok=True)
-        
-        file_path = os.path.join(UPLOAD_DIR, file.filename)
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        # Extract and process
-        pages = extract_text(file_path)
-        if not pages:
-            raise HTTPException(status_code=400, detail="No readable content found in PDF")
-
-        # Store in vector DB
-        for page in pages:
-            if page["text"].strip():
-                chunks = chunk_text(page["text"])
-                for chunk in chunks:
-                    add_document(
-                        text=chunk,
-                        metadata={
-                            "source": file.filename,
-                            "page": page["page"],
-                        }
-                    )
-
-        return {"message": "Document ingested successfully"}
-    
+        await ingest_upload(file, metadata=scope_tags)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
 
+    return {"message": "Document ingested successfully"}
+
 
 @app.post("/ask")
-async def ask_question(request: AskRequest):
+async def ask_question(
+    request: AskRequest,
+    x_trace_timing: Optional[str] = Header(None),
+    x_profile: Optional[str] = Header(None, alias=PROFILE_HEADER),
+    x_profile_token: Optional[str] = Header(None, alias=PROFILE_TOKEN_HEADER),
+    profile: Optional[str] = Query(None),
+    profile_token: Optional[str] = Query(None)
+):
     """Ask a question about the uploaded policy"""
+    from app.core.profiling import (
+        ProfilerBusy,
+        ProfilingNotAllowed,
+        call_with_optional_profile,
+        requested_mode,
+    )
+
+    from app.services.retrieval_scope import scope_filter_for
+
+    try:
+        profile_mode = requested_mode(x_profile or profile, x_profile_token or profile_token)
+    except ProfilingNotAllowed as e:
+        raise HTTPException(status_code=403, detail=str(e))
+
+    try:
+        where = scope_filter_for(request)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
         from app.services.rag_service import answer_question
+        from app.explainability.decision_trace_builder import header_requests_trace
         
         question = request.question
         session_id = str(uuid4())
         
-        result = answer_question(question=question, session_id=session_id)
+        result = call_with_optional_profile(
+            profile_mode,
+            "ask",
+            answer_question,
+            question=question,
+            session_id=session_id,
+            where=where,
+            trace_timing=header_requests_trace(x_trace_timing)
+        )
         return result
     
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Question processing failed: {str(e)}")
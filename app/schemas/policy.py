@@ -2,6 +2,17 @@ from pydantic import BaseModel
 from typing import Optional
 
 
-class QuestionRequest(BaseModel):
+class RetrievalScope(BaseModel):
+    """Optional filters limiting which chunks a question searches"""
+    source: Optional[str] = None       # one uploaded document (filename)
+    insurer: Optional[str] = None
+    product: Optional[str] = None
+    # Scope the question to one policy version (see compliance.policy_versioning)
+    policy_id: Optional[str] = None
+    version_id: Optional[str] = None
+    as_of: Optional[str] = None
+
+
+class QuestionRequest(RetrievalScope):
     question: str
     session_id: Optional[str] = None
@@ -137,8 +137,22 @@ class AnswerTemplate:
     
     @staticmethod
     def format_conditions_answer(clauses: List[str]) -> Dict[str, Any]:
-        \"\"\"Format answer for conditional coverage questions\"\"\"
-        clean_conditions = []\n        for clause in clauses[:10]:\n            text = ' '.join(clause.split())\n            if len(text) > 140:\n                text = text[:140] + \"...\"\n            if text not in clean_conditions:\n                clean_conditions.append(text)\n        \n        return {\n            \"answer_type\": \"conditions\",\n            \"conditions_list\": clean_conditions,\n            \"note\": \"Coverage is ONLY valid when these conditions are met\",\n            \"count\": len(clean_conditions),\n            \"warning\": \"Non-compliance may result in claim denial\"\n        }
+        """Format answer for conditional coverage questions"""
+        clean_conditions = []
+        for clause in clauses[:10]:
+            text = ' '.join(clause.split())
+            if len(text) > 140:
+                text = text[:140] + "..."
+            if text not in clean_conditions:
+                clean_conditions.append(text)
+        
+        return {
+            "answer_type": "conditions",
+            "conditions_list": clean_conditions,
+            "note": "Coverage is ONLY valid when these conditions are met",
+            "count": len(clean_conditions),
+            "warning": "Non-compliance may result in claim denial"
+        }
     
     @staticmethod
     def format_financial_answer(clauses: List[str], financial_type: str) -> Dict[str, Any]:
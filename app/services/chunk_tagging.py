@@ -0,0 +1,133 @@
+"""
+Chunk Category Tagging
+
+Tags every chunk at ingestion with boolean `cat_*` metadata (exclusions,
+limits, waiting period, ...) using the same deterministic keyword approach
+as the clause classifiers. At question time the classifier's focus areas
+map onto these tags to build a cheap metadata pre-filter, so e.g. an
+exclusion question searches exclusion-tagged chunks first.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+
+# Tag -> phrases that mark a chunk as belonging to the category
+CATEGORY_TAG_PATTERNS = {
+    "cat_coverage": re.compile(
+        r"\b(we will pay|we cover|is covered|are covered|coverage|benefits?|eligib\w*)\b"
+    ),
+    "cat_exclusions": re.compile(
+        r"\b(exclusions?|excluded|not covered|exceptions?|we will not pay|shall not be liable)\b"
+    ),
+    "cat_limits": re.compile(
+        r"\b(limits?|limited to|maximum|up to|capped|ceiling|sum insured|sub-limits?|room rent|icu)\b"
+    ),
+    "cat_financial": re.compile(
+        r"\b(deductibles?|co-?pay(ments?)?|co-payment|out of pocket|excess)\b"
+    ),
+    "cat_conditions": re.compile(
+        r"\b(conditions?|conditional|subject to|provided that|unless|only if)\b"
+    ),
+    "cat_waiting_period": re.compile(
+        r"\b(waiting period|waiting time|wait(ing)? of \d+)\b"
+    ),
+    "cat_claims": re.compile(
+        r"\b(claims?|pre-?auth\w*|authori[sz]ation|approval|cashless|reimburse\w*|documents?)\b"
+    ),
+    "cat_network": re.compile(
+        r"\b(network|empanel\w*|hospitals?)\b"
+    ),
+}
+
+# Category focus area (query_classifier.get_category_focus_areas) -> chunk
+# tag. Callers pass category focus areas only: use-case terms (cashless,
+# room rent, the broker's "deductible", ...) would widen the $or filter for
+# every question from that use case.
+FOCUS_TAGS = {
+    "coverage": "cat_coverage",
+    "eligible": "cat_coverage",
+    "covered": "cat_coverage",
+    "benefits": "cat_coverage",
+    "exclusion": "cat_exclusions",
+    "excluded": "cat_exclusions",
+    "not covered": "cat_exclusions",
+    "exception": "cat_exclusions",
+    "limit": "cat_limits",
+    "maximum": "cat_limits",
+    "cap": "cat_limits",
+    "ceiling": "cat_limits",
+    "deductible": "cat_financial",
+    "copay": "cat_financial",
+    "co-pay": "cat_financial",
+    "out of pocket": "cat_financial",
+    "condition": "cat_conditions",
+    "conditional": "cat_conditions",
+    "subject to": "cat_conditions",
+    "provided": "cat_conditions",
+    "waiting": "cat_waiting_period",
+    "requirement": "cat_claims",
+    "document": "cat_claims",
+    "approval": "cat_claims",
+    "authorization": "cat_claims",
+    "pre-auth": "cat_claims",
+    "claim": "cat_claims",
+    "network": "cat_network",
+    "hospital": "cat_network",
+    "empanel": "cat_network",
+    "in-network": "cat_network",
+}
+
+
+def category_tags(text: str) -> Dict[str, bool]:
+    """
+    Category tags for a chunk.
+
+    Only matching tags are returned (all True), so a filter on
+    {"cat_exclusions": True} selects exactly the tagged chunks.
+    """
+    lowered = (text or "").lower()
+    return {
+        tag: True
+        for tag, pattern in CATEGORY_TAG_PATTERNS.items()
+        if pattern.search(lowered)
+    }
+
+
+def focus_filter(focus_areas: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Metadata filter selecting chunks tagged with any focused category.
+
+    Args:
+        focus_areas: Output of get_query_focus_areas
+
+    Returns:
+        A `where` filter, or None if no focus area maps to a tag
+    """
+    tags = sorted({FOCUS_TAGS[f] for f in focus_areas if f in FOCUS_TAGS})
+
+    if not tags:
+        return None
+    if len(tags) == 1:
+        return {tags[0]: True}
+    return {"$or": [{tag: True} for tag in tags]}
+
+
+def combine_filters(*filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """AND together `where` filters, skipping empty ones."""
+    conditions = []
+    for where in filters:
+        if not where:
+            continue
+        if list(where) == ["$and"]:
+            conditions.extend(where["$and"])
+        elif len(where) > 1:
+            conditions.extend({key: value} for key, value in where.items())
+        else:
+            conditions.append(where)
+
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
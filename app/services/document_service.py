@@ -0,0 +1,127 @@
+"""
+Document Service
+
+Delete and replace ingested documents by source (the uploaded filename).
+Chunk ids come from the source index maintained by the ingestion index
+stage, so both operations touch only the document's own chunks. Each one
+bumps the corpus snapshot id so caches keyed on it are invalidated.
+
+Policies registered as versions (policy_versioning) are not in the
+source index; they are retired by registering a new version.
+"""
+
+import os
+from typing import Any, Dict, List
+
+import anyio
+
+from app.compliance.policy_versioning import bump_snapshot
+from app.core.config import settings
+from app.infrastructure.source_index import get_source_index
+from app.infrastructure.vector_store import get_vector_store
+from app.services.document_summary import delete_document_summary
+from app.services.ingestion_service import ingest_upload
+from app.services.vector_service import delete_chunks
+
+
+PAGE_SIZE = 4096
+
+
+def _drop_chunks(chunk_ids: List[str]):
+    delete_chunks(chunk_ids)
+    get_source_index().remove_chunks(chunk_ids)
+
+
+def _remove_stored_file(entry: Dict[str, Any]):
+    """
+    Delete the uploaded PDF unless another source has the same bytes.
+    Files outside UPLOAD_DIR (bulk-ingested originals) are never touched.
+    """
+    path = entry.get("path")
+    if not path or not entry.get("sha256") or get_source_index().sha_in_use(entry["sha256"]):
+        return
+    upload_dir = os.path.abspath(settings.UPLOAD_DIR)
+    if os.path.commonpath([upload_dir, os.path.abspath(path)]) != upload_dir:
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def delete_document(source: str) -> Dict[str, Any]:
+    """
+    Remove every chunk of a document.
+
+    Returns:
+        {"source", "chunks_deleted", "snapshot_id"}
+
+    Raises:
+        KeyError: If the source is not in the source index
+    """
+    index = get_source_index()
+    entry = index.get(source)
+    if entry is None:
+        raise KeyError(source)
+
+    chunk_ids = index.chunk_ids(source)
+    _drop_chunks(chunk_ids)
+    index.remove_source(source)
+    _remove_stored_file(entry)
+    delete_document_summary(source)
+
+    return {"source": source, "chunks_deleted": len(chunk_ids), "snapshot_id": bump_snapshot()}
+
+
+async def replace_document(source: str, file, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    Ingest a new file under `source`, then remove the chunks of the old
+    one; the document stays searchable throughout. Creates the document
+    when the source is new.
+
+    Returns:
+        The ingestion result plus "chunks_deleted" and "snapshot_id"
+
+    Raises:
+        Same as ingestion_service.ingest_upload
+    """
+    index = get_source_index()
+    previous = index.get(source)
+    old_ids = index.chunk_ids(source)
+
+    result = await ingest_upload(file, metadata=metadata, source=source)
+
+    await anyio.to_thread.run_sync(_drop_chunks, old_ids)
+    if previous and previous.get("path") != index.get(source).get("path"):
+        _remove_stored_file(previous)
+
+    return {**result, "chunks_deleted": len(old_ids), "snapshot_id": bump_snapshot()}
+
+
+def rebuild_source_index() -> Dict[str, int]:
+    """
+    Rebuild the source index from chunk metadata, for collections
+    ingested before it existed. Versioned chunks are skipped.
+    """
+    store = get_vector_store()
+    by_source: Dict[str, List[str]] = {}
+    offset = 0
+
+    while True:
+        page = store.get(include=["metadatas"], limit=PAGE_SIZE, offset=offset)
+        if not page["ids"]:
+            break
+        for chunk_id, metadata in zip(page["ids"], page["metadatas"]):
+            metadata = metadata or {}
+            if metadata.get("source") and "policy_id" not in metadata:
+                by_source.setdefault(metadata["source"], []).append(chunk_id)
+        offset += len(page["ids"])
+
+    index = get_source_index()
+    previous = {entry["source"]: index.get(entry["source"]) for entry in index.sources()}
+    index.clear()
+    for source, chunk_ids in by_source.items():
+        entry = previous.get(source) or {}
+        index.add(source, chunk_ids, sha256=entry.get("sha256"), path=entry.get("path"))
+
+    return {"sources": len(by_source), "chunks": sum(len(ids) for ids in by_source.values())}
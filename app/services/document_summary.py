@@ -0,0 +1,168 @@
+"""
+Document Summaries
+
+Builds a structured summary of every ingested document once, at ingestion
+(the post stage of services.ingestion_service), from all of its clauses:
+coverage, limits, conditions and exclusions, each clause with the page
+and section it came from. Summary questions scoped to one document
+("give me an overview of acme-gold.pdf") are answered from this artifact
+by rag_service instead of running retrieval over a handful of chunks.
+
+Summaries are JSON files in DOC_SUMMARY_DIR, one per source, held in a
+small LRU in memory. A cached entry is re-read when its file changes, so
+a document replaced by another worker is picked up. Documents ingested
+before summaries existed get theirs built from the vector store on first
+request.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.domain.policy_formatter import format_policy_summary
+from app.infrastructure.vector_store import get_vector_store
+
+
+CATEGORIES = ("coverage", "limits", "conditions", "exclusions")
+
+_cache: "OrderedDict[str, tuple]" = OrderedDict()   # source -> (mtime_ns, summary)
+_cache_lock = threading.Lock()
+
+
+# ============================================================
+# BUILD
+# ============================================================
+
+def build_summary(source: str, chunks: List[Dict[str, Any]], sha256: str = None) -> Dict[str, Any]:
+    """
+    Summary of one document from its chunks, in document order.
+
+    Args:
+        source: Document name (chunk metadata "source")
+        chunks: [{"text", "metadata"}]
+        sha256: Stored file hash, if known
+
+    Returns:
+        {"source", "sha256", "built_at", "chunks", "clauses",
+         "structured": {category: [{"clause", "page", "section"?}]},
+         "summary_view"}
+    """
+    # rag_service imports this module; its clause rules are the ones answers use
+    from app.services.rag_service import _classify_clause, _extract_clauses
+
+    structured = {category: [] for category in CATEGORIES}
+    seen = set()
+    parsed = 0
+
+    for chunk in chunks:
+        metadata = chunk.get("metadata") or {}
+        for clause in _extract_clauses([chunk["text"]]):
+            if clause in seen:
+                continue
+            seen.add(clause)
+            parsed += 1
+
+            category = _classify_clause(clause)
+            if category not in structured or len(structured[category]) >= settings.DOC_SUMMARY_MAX_CLAUSES:
+                continue
+
+            entry = {"clause": clause, "page": metadata.get("page")}
+            if metadata.get("section"):
+                entry["section"] = metadata["section"]
+            structured[category].append(entry)
+
+    return {
+        "source": source,
+        "sha256": sha256,
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "chunks": len(chunks),
+        "clauses": parsed,
+        "structured": structured,
+        "summary_view": format_policy_summary(
+            {category: [e["clause"] for e in entries] for category, entries in structured.items()}
+        )
+    }
+
+
+def _build_from_store(source: str) -> Optional[Dict[str, Any]]:
+    page = get_vector_store().get(where={"source": source}, include=["documents", "metadatas"])
+    if not page["ids"]:
+        return None
+
+    chunks = [
+        {"text": text, "metadata": metadata or {}}
+        for text, metadata in zip(page["documents"], page["metadatas"])
+    ]
+    chunks.sort(key=lambda c: (c["metadata"].get("page") or 0, c["metadata"].get("char_start") or 0))
+    return build_summary(source, chunks)
+
+
+# ============================================================
+# STORAGE
+# ============================================================
+
+def _summary_path(source: str) -> str:
+    name = hashlib.sha1(source.encode("utf-8")).hexdigest()
+    return os.path.join(settings.DOC_SUMMARY_DIR, f"{name}.json")
+
+
+def save_summary(summary: Dict[str, Any]):
+    path = _summary_path(summary["source"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(summary, f)
+    os.replace(tmp_path, path)
+
+
+def delete_document_summary(source: str):
+    with _cache_lock:
+        _cache.pop(source, None)
+    try:
+        os.remove(_summary_path(source))
+    except FileNotFoundError:
+        pass
+
+
+def get_document_summary(source: str) -> Optional[Dict[str, Any]]:
+    """
+    Precomputed summary of a document, or None if it has no chunks.
+    """
+    path = _summary_path(source)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        summary = _build_from_store(source)
+        if summary is not None:
+            save_summary(summary)
+        return summary
+
+    with _cache_lock:
+        cached = _cache.get(source)
+        if cached and cached[0] == mtime_ns:
+            _cache.move_to_end(source)
+            return cached[1]
+
+    with open(path, "r") as f:
+        summary = json.load(f)
+
+    with _cache_lock:
+        _cache[source] = (mtime_ns, summary)
+        _cache.move_to_end(source)
+        while len(_cache) > settings.DOC_SUMMARY_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return summary
+
+
+# ============================================================
+# INGESTION HOOK
+# ============================================================
+
+def summarize_ingested(result: Dict[str, Any]):
+    """Post-ingestion step: build and store the document's summary."""
+    save_summary(build_summary(result["source"], result["chunks"], sha256=result.get("sha256")))
@@ -1,11 +1,11 @@
-import ollama
+from app.infrastructure.embeddings import generate_embedding
 
 
 def embed_text(text: str):
+    """
+    Embed text with the configured provider. Kept for existing callers;
+    the model (including Ollama's nomic-embed-text) is chosen by
+    EMBEDDING_BACKEND / EMBEDDING_MODEL in app.infrastructure.embeddings.
+    """
 
-    response = ollama.embeddings(
-        model="nomic-embed-text",   # lightweight + fast
-        prompt=text
-    )
-
-    return response["embedding"]
+    return generate_embedding(text)
@@ -0,0 +1,361 @@
+"""
+Ingestion Service
+
+The one document ingestion pipeline; /documents/ingest, /upload-policy
+and the CLIs all go through it. Stages:
+
+    store    - stream the upload to content-addressed storage (upload_store)
+    extract  - parse pages / sections, OCR where needed (pdf_parser)
+    segment  - sentence- and section-aware chunks with position metadata
+    embed    - batch-encode the chunk texts
+    index    - write vectors, lexical index and source index, or register
+               a policy version
+    post     - the document summary (services.document_summary), then
+               hooks registered with register_post_hook()
+
+extract, segment and embed form prepare_document(), a plain function of a
+file path, so it can run inline, on a thread pool or in worker processes
+(INGEST_EXECUTOR). index and the hooks always run in the calling process,
+which owns the vector store and the lexical index.
+
+Each stage is timed into the pipeline stage histogram ("ingest_<stage>")
+and retried INGEST_RETRIES times on transient errors; ValueError (bad
+input) is never retried.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import anyio
+
+from app.core import metrics
+from app.core.config import settings
+from app.explainability.decision_trace_builder import DecisionTraceBuilder
+
+
+EXECUTORS = ("inline", "thread", "process")
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+_post_hooks: List[Callable[[Dict[str, Any]], None]] = []
+
+
+# ============================================================
+# STAGES
+# ============================================================
+
+def _run_stage(tracer: DecisionTraceBuilder, stage: str, fn: Callable, *args, **kwargs):
+    """Time one stage and retry it on transient failures."""
+    attempt = 0
+    with tracer.span(f"ingest_{stage}"):
+        while True:
+            try:
+                return fn(*args, **kwargs)
+            except (ValueError, KeyError):
+                raise
+            except Exception as e:
+                if attempt >= settings.INGEST_RETRIES:
+                    raise
+                attempt += 1
+                metrics.INGESTION_RETRIES.labels(stage=stage).inc()
+                print(f"⚠️ Ingestion stage {stage} failed ({e}); retry {attempt}/{settings.INGEST_RETRIES}")
+                time.sleep(settings.INGEST_RETRY_BACKOFF * 2 ** (attempt - 1))
+
+
+def _extract(file_path: str) -> Dict[str, Any]:
+    from app.infrastructure.pdf_parser import load_document
+
+    document = load_document(file_path)
+    if not any(page["text"].strip() for page in document["pages"]):
+        raise ValueError("No readable content found in PDF")
+    return document
+
+
+def _segment(document: Dict[str, Any], source: str, metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
+    from app.infrastructure.text_chunker import chunk_metadata, iter_document_chunks
+
+    return [
+        {
+            "text": chunk["text"],
+            "metadata": {"source": source, **chunk_metadata(chunk), **metadata}
+        }
+        for chunk in iter_document_chunks(document)
+    ]
+
+
+def _embed(texts: List[str]) -> List[List[float]]:
+    from app.infrastructure.embeddings import generate_embeddings
+
+    return generate_embeddings(texts)
+
+
+def prepare_document(
+    file_path: str,
+    source: str,
+    metadata: Dict[str, Any] = None,
+    embed: bool = True
+) -> Dict[str, Any]:
+    """
+    extract -> segment -> embed for one PDF. Pure with respect to the
+    vector store, so it can run in a worker process.
+
+    Args:
+        file_path: Stored PDF
+        source: Name recorded on every chunk (the uploaded filename)
+        metadata: Extra metadata for every chunk (e.g. insurer / product)
+        embed: Skip when the index stage embeds selectively (versions)
+
+    Returns:
+        {"source", "pages", "chunks": [{"text", "metadata"}],
+         "embeddings" (or None), "stages": [timing]}
+
+    Raises:
+        ValueError: If the document has no readable text
+    """
+    tracer = DecisionTraceBuilder(enabled=True)
+
+    document = _run_stage(tracer, "extract", _extract, file_path)
+    chunks = _run_stage(tracer, "segment", _segment, document, source, metadata or {})
+    embeddings = None
+    if embed and chunks:
+        embeddings = _run_stage(tracer, "embed", _embed, [chunk["text"] for chunk in chunks])
+
+    return {
+        "source": source,
+        "pages": len(document["pages"]),
+        "chunks": chunks,
+        "embeddings": embeddings,
+        "stages": tracer.to_dict()["stages"]
+    }
+
+
+def _index(
+    prepared: Dict[str, Any],
+    stored: Dict[str, Any],
+    ids: List[str] = None,
+    version: Dict[str, Any] = None
+) -> Dict[str, Any]:
+    from app.compliance.policy_versioning import register_version
+    from app.infrastructure.source_index import get_source_index
+    from app.services.vector_service import add_documents
+
+    chunks = prepared["chunks"]
+    if version:
+        record = register_version(
+            version["policy_id"] or prepared["source"],
+            version["version_id"],
+            chunks,
+            effective_from=version.get("effective_from")
+        )
+        return {"ids": None, "chunks_created": record["chunks_added"], "version": record}
+
+    add_documents(
+        [chunk["text"] for chunk in chunks],
+        [chunk["metadata"] for chunk in chunks],
+        ids=ids,
+        embeddings=prepared["embeddings"]
+    )
+    # Versioned chunks are tracked by policy_versioning instead
+    get_source_index().add(prepared["source"], ids, sha256=stored.get("sha256"), path=stored.get("path"))
+    return {"ids": ids, "chunks_created": len(ids)}
+
+
+# ============================================================
+# POST-PROCESS HOOKS
+# ============================================================
+
+def register_post_hook(hook: Callable[[Dict[str, Any]], None]):
+    """
+    Run `hook(result)` after every successful ingestion. `result` has
+    "source", "sha256", "path", "chunks" ([{"text", "metadata"}]), "ids"
+    (None for versioned ingests) and "version". A failing hook is logged
+    and does not fail the ingestion.
+    """
+    if hook not in _post_hooks:
+        _post_hooks.append(hook)
+
+
+def _run_post_hooks(tracer: DecisionTraceBuilder, result: Dict[str, Any]):
+    from app.services.document_summary import summarize_ingested
+
+    with tracer.span("ingest_post"):
+        for hook in [summarize_ingested, *_post_hooks]:
+            try:
+                hook(result)
+            except Exception as e:
+                print(f"⚠️ Ingestion hook {getattr(hook, '__name__', hook)} failed for {result['source']}: {e}")
+
+
+# ============================================================
+# PIPELINE
+# ============================================================
+
+def _prepare_executor() -> Executor:
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                if settings.INGEST_EXECUTOR == "process":
+                    # spawn: forking a process that runs model / pool threads can deadlock
+                    _executor = ProcessPoolExecutor(
+                        max_workers=settings.INGEST_WORKERS,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    _executor = ThreadPoolExecutor(
+                        max_workers=settings.INGEST_WORKERS,
+                        thread_name_prefix="ingest"
+                    )
+    return _executor
+
+
+def _complete(
+    tracer: DecisionTraceBuilder,
+    prepared: Dict[str, Any],
+    stored: Dict[str, Any],
+    version: Dict[str, Any] = None,
+    bump: bool = True
+) -> Dict[str, Any]:
+    """index + post hooks, in the process that owns the vector store."""
+    from app.compliance.policy_versioning import bump_snapshot
+
+    # Ids are fixed up front so a retried write cannot duplicate chunks
+    ids = None if version else [str(uuid.uuid4()) for _ in prepared["chunks"]]
+    indexed = _run_stage(tracer, "index", _index, prepared, stored, ids, version)
+    if bump and not version:
+        # Versions advance it themselves; other workers resync on it
+        bump_snapshot()
+
+    result = {
+        "source": prepared["source"],
+        "sha256": stored.get("sha256"),
+        "path": stored.get("path"),
+        "pages_processed": prepared["pages"],
+        "chunks": prepared["chunks"],
+        **indexed
+    }
+    _run_post_hooks(tracer, result)
+
+    metrics.INGESTED_DOCUMENTS.inc()
+    metrics.INGESTED_PAGES.inc(prepared["pages"])
+    metrics.INGESTED_CHUNKS.inc(indexed["chunks_created"])
+    return result
+
+
+def _summary(result: Dict[str, Any], tracer: DecisionTraceBuilder, prepared: Dict[str, Any]) -> Dict[str, Any]:
+    # store ran before the prepare stages, index / post after them
+    own = tracer.to_dict()["stages"]
+    summary = {
+        "source": result["source"],
+        "sha256": result["sha256"],
+        "pages_processed": result["pages_processed"],
+        "chunks_created": result["chunks_created"],
+        "timing": own[:1] + prepared["stages"] + own[1:] if own and own[0]["stage"] == "ingest_store"
+                  else prepared["stages"] + own
+    }
+    if result.get("version"):
+        summary["version"] = result["version"]
+    return summary
+
+
+def ingest_file(
+    file_path: str,
+    source: str,
+    metadata: Dict[str, Any] = None,
+    version: Dict[str, Any] = None,
+    sha256: str = None
+) -> Dict[str, Any]:
+    """
+    Run every stage after `store` in this thread.
+
+    Args:
+        file_path: Stored PDF
+        source: Name recorded on every chunk
+        metadata: Extra metadata for every chunk
+        version: {"version_id", "policy_id", "effective_from"} to register
+            the document as a policy version instead of plain chunks
+        sha256: Content hash from the store stage, if known
+
+    Returns:
+        {"source", "sha256", "pages_processed", "chunks_created",
+         "timing", "version"?}
+    """
+    prepared = prepare_document(file_path, source, metadata, embed=version is None)
+    return index_prepared(prepared, file_path, sha256=sha256, version=version)
+
+
+def index_prepared(
+    prepared: Dict[str, Any],
+    file_path: str,
+    sha256: str = None,
+    version: Dict[str, Any] = None,
+    bump: bool = True
+) -> Dict[str, Any]:
+    """
+    index + post stages for a prepare_document() result computed
+    elsewhere (e.g. by a bulk-ingest worker process).
+
+    Args:
+        bump: Advance the corpus snapshot id; batch callers pass False
+            and bump once when the batch is done
+
+    Returns:
+        Same as ingest_file
+    """
+    tracer = DecisionTraceBuilder(enabled=True)
+    result = _complete(tracer, prepared, {"path": file_path, "sha256": sha256}, version, bump)
+    return _summary(result, tracer, prepared)
+
+
+async def ingest_upload(
+    file,
+    metadata: Dict[str, Any] = None,
+    version: Dict[str, Any] = None,
+    source: str = None
+) -> Dict[str, Any]:
+    """
+    Full pipeline for an uploaded PDF, on the INGEST_EXECUTOR. `source`
+    defaults to the uploaded filename.
+
+    Raises:
+        UploadTooLarge: Upload over the size / page limit (413)
+        VersionExistsError: The policy version is already registered (409)
+        ValueError: Not a PDF or no readable text (400)
+    """
+    from app.infrastructure.upload_store import save_upload
+
+    if settings.INGEST_EXECUTOR not in EXECUTORS:
+        raise RuntimeError(f"Unknown INGEST_EXECUTOR: {settings.INGEST_EXECUTOR}")
+
+    tracer = DecisionTraceBuilder(enabled=True)
+    with tracer.span("ingest_store"):
+        stored = await save_upload(file)
+
+    source = source or file.filename
+    if settings.INGEST_EXECUTOR == "inline":
+        # anyio's worker threads instead of the INGEST_WORKERS pool; never
+        # on the event loop
+        prepared = await anyio.to_thread.run_sync(
+            prepare_document, stored["path"], source, metadata, version is None
+        )
+        result = await anyio.to_thread.run_sync(_complete, tracer, prepared, stored, version)
+        return _summary(result, tracer, prepared)
+
+    loop = asyncio.get_running_loop()
+    prepared = await loop.run_in_executor(
+        _prepare_executor(), prepare_document, stored["path"], source, metadata, version is None
+    )
+
+    if settings.INGEST_EXECUTOR == "process" and not metrics.is_multiprocess():
+        # The worker's histogram is not scraped; record its stages here
+        for stage in prepared["stages"]:
+            metrics.observe_stage(stage["stage"], stage["wall_ms"] / 1000)
+
+    result = await anyio.to_thread.run_sync(_complete, tracer, prepared, stored, version)
+    return _summary(result, tracer, prepared)
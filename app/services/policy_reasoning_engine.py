@@ -3,8 +3,11 @@ import re
 import numpy as np
 from typing import List, Dict, Any
 
+from app.core.config import settings
 from app.services.vector_service import search_documents, hybrid_rerank
-from app.infrastructure.embeddings import generate_embedding
+from app.infrastructure.embeddings import embed_array, embed_arrays
+from app.explainability.decision_trace_builder import start_trace
+from app.core.metrics import EMBEDDINGS_COMPUTED
 
 
 # ============================================================
@@ -17,16 +20,6 @@ TOP_K_CLAUSES = 25           # Limit reasoning scope
 SIMILARITY_THRESHOLD = 0.45  # Clause relevance cutoff
 
 
-# ============================================================
-# COSINE SIMILARITY
-# ============================================================
-
-def _cosine_similarity(v1, v2):
-    v1 = np.array(v1)
-    v2 = np.array(v2)
-    return float(np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2) + 1e-10))
-
-
 # ============================================================
 # CLAUSE EXTRACTION
 # ============================================================
@@ -52,14 +45,21 @@ def _extract_clauses(documents: List[str]) -> List[str]:
 
 def _rank_clauses_by_question(question: str, clauses: List[str]):
 
-    q_embedding = generate_embedding(question)
+    if not clauses:
+        return []
 
-    scored = []
+    q_embedding = embed_array(question)
+    c_embeddings = embed_arrays(clauses)
 
-    for clause in clauses:
-        c_embedding = generate_embedding(clause)
-        sim = _cosine_similarity(q_embedding, c_embedding)
-        scored.append((clause, sim))
+    if not settings.EMBEDDING_NORMALIZE:
+        q_embedding = q_embedding / max(float(np.linalg.norm(q_embedding)), 1e-10)
+        c_embeddings = c_embeddings / np.maximum(np.linalg.norm(c_embeddings, axis=1, keepdims=True), 1e-10)
+
+    # Unit vectors: one matrix-vector product gives every cosine similarity
+    similarities = c_embeddings @ q_embedding
+    scored = [(clause, float(sim)) for clause, sim in zip(clauses, similarities)]
+
+    EMBEDDINGS_COMPUTED.labels(purpose="clause_ranking").inc(len(clauses) + 1)
 
     scored.sort(key=lambda x: x[1], reverse=True)
 
@@ -181,18 +181,26 @@ def _calculate_confidence(structured, top_similarity):
 # MAIN POLICY REASONING PIPELINE
 # ============================================================
 
-def answer_question(question: str, session_id: str = None):
+def answer_question(
+    question: str,
+    session_id: str = None,
+    where: Dict[str, Any] = None,
+    trace_timing: bool = False
+):
 
     if session_id is None:
         session_id = str(uuid.uuid4())
 
+    tracer = start_trace(trace_timing)
+
     # 1️⃣ Retrieve Relevant Policy Sections
-    raw_results = search_documents(question, k=10)
+    raw_results = search_documents(question, k=settings.RETRIEVAL_K, where=where, tracer=tracer)
 
     documents, metadatas, _ = hybrid_rerank(
         question,
         raw_results,
-        top_k=5
+        top_k=settings.RERANK_TOP_K,
+        tracer=tracer
     )
 
     if not documents:
@@ -201,21 +209,24 @@ def answer_question(question: str, session_id: str = None):
             "question": question,
             "analysis": {"verdict": "not_specified"},
             "confidence": 0.0,
-            "decision_trace": {"reason": "No relevant policy text retrieved."},
+            "decision_trace": tracer.attach({"reason": "No relevant policy text retrieved."}),
             "evidence": [],
             "sources": []
         }
 
     # 2️⃣ Extract Clauses
-    clauses = _extract_clauses(documents)
+    with tracer.span("clause_extraction"):
+        clauses = _extract_clauses(documents)
 
     # 3️⃣ Rank Clauses Semantically
-    scored_clauses = _rank_clauses_by_question(question, clauses)
+    with tracer.span("clause_ranking"):
+        scored_clauses = _rank_clauses_by_question(question, clauses)
 
     top_similarity = scored_clauses[0][1] if scored_clauses else 0
 
     # 4️⃣ Build Legal Structure
-    structured = _build_structured_map(scored_clauses)
+    with tracer.span("clause_structuring"):
+        structured = _build_structured_map(scored_clauses)
 
     # 5️⃣ Derive Verdict
     verdict = _derive_verdict(structured)
@@ -234,10 +245,15 @@ def answer_question(question: str, session_id: str = None):
         key = (meta.get("source"), meta.get("page"))
         if key not in seen:
             seen.add(key)
-            unique_sources.append({
+            source = {
                 "source": meta.get("source"),
                 "page": meta.get("page")
-            })
+            }
+            if meta.get("page_end", source["page"]) != source["page"]:
+                source["page_end"] = meta["page_end"]
+            if meta.get("section"):
+                source["section"] = meta["section"]
+            unique_sources.append(source)
 
     return {
         "session_id": session_id,
@@ -250,13 +266,13 @@ def answer_question(question: str, session_id: str = None):
             "conditions": structured["conditions"]
         },
         "confidence": confidence,
-        "decision_trace": {
+        "decision_trace": tracer.attach({
             "top_similarity": round(top_similarity, 3),
             "coverage_clauses": len(structured["coverage"]),
             "limit_clauses": len(structured["limits"]),
             "condition_clauses": len(structured["conditions"]),
             "exclusion_clauses": len(structured["exclusions"])
-        },
+        }),
         "evidence": evidence,
         "sources": unique_sources
     }
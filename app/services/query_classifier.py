@@ -304,20 +304,18 @@ def classify_query(question: str) -> Tuple[QueryCategory, UseCase, float]:
     return best_category, best_usecase, confidence
 
 
-def get_query_focus_areas(category: QueryCategory, usecase: UseCase) -> List[str]:
+def get_category_focus_areas(category: QueryCategory) -> List[str]:
     """
-    Determine which parts of the policy to focus on based on query type.
+    Focus areas implied by the query category alone (no use-case terms).
     
     Args:
         category: The query category
-        usecase: The use-case context
         
     Returns:
         List of focus areas to search for
     """
     focus_areas = []
     
-    # Category-based focus
     if category in [QueryCategory.COVERAGE_CHECK, QueryCategory.ELIGIBILITY]:
         focus_areas.extend(["coverage", "eligible", "covered", "benefits"])
     
@@ -348,6 +346,23 @@ def get_query_focus_areas(category: QueryCategory, usecase: UseCase) -> List[str
     elif category == QueryCategory.NETWORK:
         focus_areas.extend(["network", "hospital", "empanel", "in-network"])
     
+    return focus_areas
+
+
+def get_query_focus_areas(category: QueryCategory, usecase: UseCase) -> List[str]:
+    """
+    Determine which parts of the policy to focus on based on query type.
+    
+    Args:
+        category: The query category
+        usecase: The use-case context
+        
+    Returns:
+        List of focus areas to search for
+    """
+    # Category-based focus
+    focus_areas = get_category_focus_areas(category)
+    
     # Use-case based focus
     if usecase == UseCase.HOSPITAL_TPA:
         focus_areas.extend(["cashless", "eligibility", "room rent", "icu"])
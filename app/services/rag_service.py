@@ -2,10 +2,14 @@ import uuid
 import re
 from typing import List, Dict, Any
 
-from app.services.vector_service import search_documents, hybrid_rerank
-from app.services.query_classifier import classify_query, get_query_focus_areas
+from app.core.config import settings
+from app.infrastructure.metadata_filter import equality_value
+from app.services.vector_service import search_focused, hybrid_rerank
+from app.services.document_summary import get_document_summary
+from app.services.query_classifier import classify_query, get_category_focus_areas, get_query_focus_areas
 from app.services.answer_generator import generate_structured_answer, enrich_response_with_context
 from app.domain.policy_formatter import format_policy_summary
+from app.explainability.decision_trace_builder import start_trace
 
 
 
@@ -15,6 +19,7 @@ from app.domain.policy_formatter import format_policy_summary
 
 MAX_CLAUSE_LENGTH = 1200
 MIN_CLAUSE_LENGTH = 40
+MAX_CLAUSES_PER_CATEGORY = 5
 
 
 # ============================================================
@@ -60,6 +65,28 @@ def _detect_question_type(question: str) -> str:
     return "specific"
 
 
+# Words a request for a whole-document summary is made of; anything else
+# ("maternity", "room rent") is a focus that needs retrieval
+_SUMMARY_REQUEST_WORDS = {
+    "a", "about", "all", "an", "and", "are", "brief", "can", "complete", "could",
+    "cover", "covered", "covers", "describe", "does", "document", "entire", "explain",
+    "full", "give", "i", "in", "is", "it", "me", "my", "of", "overview", "please",
+    "plan", "policy", "provide", "quick", "short", "show", "summarise", "summarize",
+    "summary", "the", "this", "under", "what", "whole", "wording", "you",
+}
+
+
+_SUMMARY_REQUEST_RE = re.compile(r"\b(?:summar(?:y|ise|ize)|overview|describe|explain|cover(?:s|ed)?)\b")
+
+
+def _is_document_summary(question: str) -> bool:
+    """A summary question with no topic of its own ("summarize this policy")."""
+    q = question.lower()
+    if not _SUMMARY_REQUEST_RE.search(q):
+        return False
+    return all(word in _SUMMARY_REQUEST_WORDS for word in re.findall(r"[a-z]+", q))
+
+
 # ============================================================
 # LEGAL CLAUSE CLASSIFICATION (Deterministic — Audit Safe)
 # ============================================================
@@ -125,7 +152,7 @@ def _build_structured_map(clauses: List[str]):
 
     # Trim noise
     for key in structured:
-        structured[key] = structured[key][:5]
+        structured[key] = structured[key][:MAX_CLAUSES_PER_CATEGORY]
 
     return structured
 
@@ -168,26 +195,155 @@ def _calculate_confidence(structured):
     return round(min(evidence_weight / 10, 1.0), 2)
 
 
+# ============================================================
+# PRECOMPUTED DOCUMENT SUMMARY
+# ============================================================
+
+def _summary_source(where: Dict[str, Any]):
+    """
+    The document a filter selects whole; page / section / version filters
+    narrow it, so those go through retrieval.
+    """
+    if not where or set(where) != {"source"}:
+        return None
+    return equality_value(where, "source")
+
+
+def _precomputed_summary_answer(
+    question: str,
+    session_id: str,
+    source: str,
+    tracer,
+    query_category,
+    use_case,
+    classification_confidence: float,
+    focus_areas: List[str]
+):
+    """
+    Answer a summary question from the document summary built at
+    ingestion (services.document_summary); None if there is none.
+    """
+    with tracer.span("summary_lookup"):
+        summary = get_document_summary(source)
+    if summary is None:
+        return None
+
+    # Same shape as a retrieved answer (_build_structured_map)
+    entries = {
+        category: summary["structured"][category][:MAX_CLAUSES_PER_CATEGORY]
+        for category in summary["structured"]
+    }
+    structured = {category: [e["clause"] for e in entries[category]] for category in entries}
+    clauses = [clause for category in structured.values() for clause in category]
+
+    with tracer.span("answer_templating"):
+        structured_answer = generate_structured_answer(
+            category=query_category,
+            clauses=clauses,
+            verdict="informational",
+            metadata={"focus_areas": focus_areas}
+        )
+
+    unique_sources = []
+    seen = set()
+    for entry in (e for category in entries.values() for e in category):
+        key = (entry.get("page"), entry.get("section"))
+        if key not in seen:
+            seen.add(key)
+            cited = {"source": source, "page": entry.get("page")}
+            if entry.get("section"):
+                cited["section"] = entry["section"]
+            unique_sources.append(cited)
+
+    response = {
+        "session_id": session_id,
+        "question": question,
+        "query_category": query_category.value,
+        "use_case": use_case.value,
+        "analysis": {
+            "verdict": "informational",
+            "coverage": structured["coverage"],
+            "exclusions": structured["exclusions"],
+            "limits": structured["limits"],
+            "conditions": structured["conditions"],
+            "summary_view": summary["summary_view"],
+            "structured_answer": structured_answer
+        },
+        "confidence": _calculate_confidence(structured),
+        "decision_trace": {
+            "mode": "summary",
+            "summary": "precomputed",
+            "summary_built_at": summary["built_at"],
+            "parsed_clauses": summary["clauses"],
+            "classification_confidence": round(classification_confidence, 3)
+        },
+        "evidence": [{"clause": c} for c in clauses[:3]],
+        "sources": unique_sources,
+        "classification_metadata": {
+            "category": query_category.value,
+            "use_case": use_case.value,
+            "confidence": round(classification_confidence, 3),
+            "focus_areas": focus_areas
+        }
+    }
+
+    response = enrich_response_with_context(
+        response,
+        query_category,
+        use_case,
+        classification_confidence
+    )
+    tracer.attach(response["decision_trace"])
+    return response
+
+
 # ============================================================
 # MAIN PIPELINE - ENHANCED WITH QUERY CLASSIFICATION
 # ============================================================
 
-def answer_question(question: str, session_id: str = None):
+def answer_question(
+    question: str,
+    session_id: str = None,
+    where: Dict[str, Any] = None,
+    trace_timing: bool = False
+):
 
     if session_id is None:
         session_id = str(uuid.uuid4())
 
+    tracer = start_trace(trace_timing)
+
     # 🤖 CLASSIFY THE QUERY
-    query_category, use_case, classification_confidence = classify_query(question)
-    focus_areas = get_query_focus_areas(query_category, use_case)
-    
+    with tracer.span("classification"):
+        query_category, use_case, classification_confidence = classify_query(question)
+        focus_areas = get_query_focus_areas(query_category, use_case)
+
+    # INTENT DETECTION: a summary of one whole document needs no retrieval
+    question_type = _detect_question_type(question)
+    if _is_document_summary(question) and _summary_source(where):
+        response = _precomputed_summary_answer(
+            question, session_id, _summary_source(where), tracer,
+            query_category, use_case, classification_confidence, focus_areas
+        )
+        if response is not None:
+            return response
+
     # 1️⃣ SEMANTIC RETRIEVAL (WITH FOCUS AREAS)
-    raw_results = search_documents(question, k=10)
+    # Only the category's focus areas pre-filter; use-case terms would
+    # narrow every question from that use case to one tag
+    raw_results = search_focused(
+        question,
+        get_category_focus_areas(query_category),
+        k=settings.RETRIEVAL_K,
+        where=where,
+        tracer=tracer
+    )
 
     documents, metadatas, _ = hybrid_rerank(
         question,
         raw_results,
-        top_k=5
+        top_k=settings.RERANK_TOP_K,
+        tracer=tracer
     )
 
     if not documents:
@@ -198,7 +354,7 @@ def answer_question(question: str, session_id: str = None):
             "use_case": use_case.value,
             "analysis": {"verdict": "not_specified"},
             "confidence": 0.0,
-            "decision_trace": {"reason": "No relevant policy text retrieved."},
+            "decision_trace": tracer.attach({"reason": "No relevant policy text retrieved."}),
             "evidence": [],
             "sources": [],
             "classification_metadata": {
@@ -209,21 +365,21 @@ def answer_question(question: str, session_id: str = None):
         }
 
     # 2️⃣ PARSE RETRIEVED TEXT
-    clauses = _extract_clauses(documents)
-
-    # 3️⃣ INTENT DETECTION
-    question_type = _detect_question_type(question)
+    with tracer.span("clause_extraction"):
+        clauses = _extract_clauses(documents)
 
     # 4️⃣ BUILD LEGAL STRUCTURE
-    structured = _build_structured_map(clauses)
+    with tracer.span("clause_structuring"):
+        structured = _build_structured_map(clauses)
 
     # 5️⃣ GENERATE STRUCTURED ANSWER BASED ON QUERY TYPE
-    structured_answer = generate_structured_answer(
-        category=query_category,
-        clauses=clauses,
-        verdict=_derive_verdict(structured, question_type),
-        metadata={"focus_areas": focus_areas}
-    )
+    with tracer.span("answer_templating"):
+        structured_answer = generate_structured_answer(
+            category=query_category,
+            clauses=clauses,
+            verdict=_derive_verdict(structured, question_type),
+            metadata={"focus_areas": focus_areas}
+        )
 
     # 6️⃣ VERDICT
     verdict = _derive_verdict(structured, question_type)
@@ -231,7 +387,8 @@ def answer_question(question: str, session_id: str = None):
     # Human-readable transformation for summary queries
     formatted_summary = None
     if question_type == "summary":
-        formatted_summary = format_policy_summary(structured)
+        with tracer.span("summary_formatting"):
+            formatted_summary = format_policy_summary(structured)
 
     # 7️⃣ CONFIDENCE
     confidence = _calculate_confidence(structured)
@@ -247,10 +404,15 @@ def answer_question(question: str, session_id: str = None):
         key = (meta.get("source"), meta.get("page"))
         if key not in seen:
             seen.add(key)
-            unique_sources.append({
+            source = {
                 "source": meta.get("source"),
                 "page": meta.get("page")
-            })
+            }
+            if meta.get("page_end", source["page"]) != source["page"]:
+                source["page_end"] = meta["page_end"]
+            if meta.get("section"):
+                source["section"] = meta["section"]
+            unique_sources.append(source)
 
     # BUILD RESPONSE
     response = {
@@ -290,5 +452,7 @@ def answer_question(question: str, session_id: str = None):
         use_case,
         classification_confidence
     )
+
+    tracer.attach(response["decision_trace"])
     
     return response
@@ -0,0 +1,277 @@
+"""
+Re-embedding Migration
+
+Moves the serving collection to another embedding model without taking
+it offline:
+
+    1. start   - copy every chunk (ids, text, metadata) into a new target
+                 collection, re-encoding the text with the new model.
+                 Runs in its own process, throttled to REEMBED_MAX_RATE
+                 chunks/sec, and checkpoints after every batch so an
+                 interrupted run resumes where it stopped.
+    2. cutover - catch up with chunks added, changed or deleted in the
+                 source since the copy, then write ACTIVE_INDEX_PATH so
+                 the target collection and model become the configured
+                 ones. Workers switch on restart.
+
+Queries keep hitting the old collection, embedded with the old model,
+until workers restart after cutover. Pause ingestion between cutover and
+the restart; anything written to the old collection afterwards is not
+carried over.
+"""
+
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.core.config import settings
+from app.infrastructure.vector_store import create_vector_store, get_vector_store
+
+
+PAGE_SIZE = 4096
+
+
+# ============================================================
+# STATE
+# ============================================================
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9]+", "-", value).strip("-").lower()
+
+
+def _state_path(target_collection: str) -> str:
+    directory = os.path.dirname(os.path.abspath(settings.ACTIVE_INDEX_PATH))
+    return os.path.join(directory, f"reembed-{target_collection}.json")
+
+
+def load_state(target_collection: str) -> Dict[str, Any]:
+    with open(_state_path(target_collection), "r") as f:
+        return json.load(f)
+
+
+def _save_state(state: Dict[str, Any]):
+    state["updated_at"] = datetime.now(timezone.utc).isoformat()
+    path = _state_path(state["target_collection"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _new_state(model_name: str, backend: str, target_collection: str = None) -> Dict[str, Any]:
+    target_collection = target_collection or f"{settings.DEFAULT_COLLECTION}-{_slug(model_name)}"
+    return {
+        "source_collection": settings.DEFAULT_COLLECTION,
+        "source_model": settings.EMBEDDING_MODEL,
+        "target_collection": target_collection,
+        "target_mmap_dir": f"{settings.MMAP_INDEX_DIR.rstrip('/')}-{_slug(target_collection)}",
+        "model": model_name,
+        "backend": backend,
+        "offset": 0,
+        "copied": 0,
+        "status": "copying",
+        "started_at": datetime.now(timezone.utc).isoformat()
+    }
+
+
+def _target_store(state: Dict[str, Any]):
+    return create_vector_store(
+        collection=state["target_collection"],
+        mmap_dir=state["target_mmap_dir"]
+    )
+
+
+# ============================================================
+# COPY
+# ============================================================
+
+def _encode(encoder, texts: List[str]) -> List[List[float]]:
+    vectors = np.asarray(encoder.encode(texts, batch_size=settings.EMBEDDING_BATCH_SIZE), dtype=np.float32)
+    if settings.EMBEDDING_NORMALIZE:
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    return vectors.tolist()
+
+
+def _copy(encoder, target, ids: List[str], documents: List[str], metadatas: List[dict]):
+    metadatas = [
+        {**(m or {}), "emb_normalized": settings.EMBEDDING_NORMALIZE}
+        for m in metadatas
+    ]
+    target.add(ids=ids, documents=documents, metadatas=metadatas, embeddings=_encode(encoder, documents))
+
+
+def _throttle(started: float, done: int, max_rate: float):
+    if max_rate > 0:
+        ahead = done / max_rate - (time.perf_counter() - started)
+        if ahead > 0:
+            time.sleep(ahead)
+
+
+def run_reembedding(
+    model_name: str,
+    backend: str = None,
+    target_collection: str = None,
+    batch_size: int = None,
+    max_rate: float = None,
+    progress=print
+) -> Dict[str, Any]:
+    """
+    Copy the serving collection into a target collection embedded with
+    another model. Safe to interrupt and call again: it resumes from the
+    last checkpoint, and re-adding an existing chunk id is a no-op.
+
+    Args:
+        model_name: Target EMBEDDING_MODEL
+        backend: Target EMBEDDING_BACKEND (default: the current one)
+        target_collection: Defaults to "<DEFAULT_COLLECTION>-<model slug>"
+        batch_size: Chunks per batch (REEMBED_BATCH_SIZE)
+        max_rate: Chunks per second, 0 for unthrottled (REEMBED_MAX_RATE)
+        progress: Called with a status line after every batch
+
+    Returns:
+        The job state
+    """
+    from app.infrastructure.embeddings import embedding_identity, load_model
+
+    backend = backend or settings.EMBEDDING_BACKEND
+    batch_size = batch_size or settings.REEMBED_BATCH_SIZE
+    max_rate = settings.REEMBED_MAX_RATE if max_rate is None else max_rate
+
+    fresh = _new_state(model_name, backend, target_collection)
+    try:
+        state = load_state(fresh["target_collection"])
+        if state["status"] == "cutover":
+            raise ValueError(f"{state['target_collection']} is already the active collection")
+    except FileNotFoundError:
+        state = fresh
+
+    encoder = load_model(backend, model_name=model_name)
+    source = get_vector_store()
+    target = _target_store(state)
+    target.set_info(embedding_identity(encoder, model_name=model_name, backend=backend))
+
+    total = source.count()
+    started, done = time.perf_counter(), 0
+
+    while True:
+        page = source.get(include=["documents", "metadatas"], limit=batch_size, offset=state["offset"])
+        if not page["ids"]:
+            break
+
+        _copy(encoder, target, page["ids"], page["documents"], page["metadatas"])
+
+        state["offset"] += len(page["ids"])
+        state["copied"] = target.count()
+        _save_state(state)
+
+        done += len(page["ids"])
+        progress(f"{state['copied']}/{total} chunks re-embedded")
+        _throttle(started, done, max_rate)
+
+    state["status"] = "copied"
+    _save_state(state)
+    return state
+
+
+# ============================================================
+# CUTOVER
+# ============================================================
+
+def _all_ids(store) -> List[str]:
+    ids, offset = [], 0
+    while True:
+        page = store.get(include=[], limit=PAGE_SIZE, offset=offset)
+        if not page["ids"]:
+            return ids
+        ids.extend(page["ids"])
+        offset += len(page["ids"])
+
+
+def _sync(encoder, source, target, batch_size: int) -> Dict[str, int]:
+    """Bring the target in line with writes made to the source meanwhile."""
+    source_ids = set(_all_ids(source))
+    target_ids = set(_all_ids(target))
+
+    missing = sorted(source_ids - target_ids)
+    for start in range(0, len(missing), batch_size):
+        page = source.get(ids=missing[start:start + batch_size], include=["documents", "metadatas"])
+        _copy(encoder, target, page["ids"], page["documents"], page["metadatas"])
+
+    removed = sorted(target_ids - source_ids)
+    if removed:
+        target.delete(ids=removed)
+
+    # Metadata changes, e.g. policy versions closed during the copy
+    updated = 0
+    shared = sorted(source_ids & target_ids)
+    for start in range(0, len(shared), batch_size):
+        batch = shared[start:start + batch_size]
+        expected = source.get(ids=batch, include=["metadatas"])
+        existing = target.get(ids=batch, include=["metadatas"])
+        current = dict(zip(existing["ids"], existing["metadatas"]))
+
+        changed_ids, changed_meta = [], []
+        for chunk_id, metadata in zip(expected["ids"], expected["metadatas"]):
+            metadata = {**(metadata or {}), "emb_normalized": settings.EMBEDDING_NORMALIZE}
+            if current.get(chunk_id) != metadata:
+                changed_ids.append(chunk_id)
+                changed_meta.append(metadata)
+        if changed_ids:
+            target.update(ids=changed_ids, metadatas=changed_meta)
+            updated += len(changed_ids)
+
+    return {"added": len(missing), "removed": len(removed), "updated": updated}
+
+
+def cutover(target_collection: str) -> Dict[str, Any]:
+    """
+    Final catch-up, then make the target the active collection.
+
+    Raises:
+        FileNotFoundError: If no job exists for the target
+        ValueError: If the copy has not finished or counts disagree
+    """
+    from app.infrastructure.embeddings import load_model
+
+    state = load_state(target_collection)
+    if state["status"] != "copied":
+        raise ValueError(f"Re-embedding of {target_collection} is '{state['status']}', not 'copied'")
+
+    encoder = load_model(state["backend"], model_name=state["model"])
+    source = get_vector_store()
+    target = _target_store(state)
+
+    state["final_sync"] = _sync(encoder, source, target, settings.REEMBED_BATCH_SIZE)
+
+    if target.count() != source.count():
+        raise ValueError(f"Target has {target.count()} chunks, source {source.count()}; run cutover again")
+
+    active = {
+        "DEFAULT_COLLECTION": state["target_collection"],
+        "MMAP_INDEX_DIR": state["target_mmap_dir"] if settings.VECTOR_BACKEND == "mmap" else settings.MMAP_INDEX_DIR,
+        "EMBEDDING_MODEL": state["model"],
+        "EMBEDDING_BACKEND": state["backend"],
+        "previous": {
+            "DEFAULT_COLLECTION": settings.DEFAULT_COLLECTION,
+            "MMAP_INDEX_DIR": settings.MMAP_INDEX_DIR,
+            "EMBEDDING_MODEL": settings.EMBEDDING_MODEL,
+            "EMBEDDING_BACKEND": settings.EMBEDDING_BACKEND
+        },
+        "cutover_at": datetime.now(timezone.utc).isoformat()
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(settings.ACTIVE_INDEX_PATH)), exist_ok=True)
+    tmp_path = settings.ACTIVE_INDEX_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(active, f, indent=2)
+    os.replace(tmp_path, settings.ACTIVE_INDEX_PATH)
+
+    state["status"] = "cutover"
+    _save_state(state)
+    return state
@@ -0,0 +1,70 @@
+"""
+Retrieval Scope
+
+Turns the scope fields accepted by /policy/qa and /ask into a single
+vector store `where` filter, so a scoped question only searches the chunks
+of the matching document, insurer, product or policy version.
+"""
+
+from typing import Any, Dict, Optional
+
+from app.compliance.policy_versioning import version_filter
+
+
+# Request field -> chunk metadata key written at ingestion
+METADATA_SCOPE_FIELDS = {
+    "source": "source",
+    "insurer": "insurer",
+    "product": "product",
+}
+
+
+def build_scope_filter(
+    source: str = None,
+    insurer: str = None,
+    product: str = None,
+    policy_id: str = None,
+    version_id: str = None,
+    as_of: str = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Build the `where` filter for a scoped question.
+
+    Returns:
+        A filter dict, or None for an unscoped (whole corpus) question
+
+    Raises:
+        KeyError: If the requested policy version is not registered
+        ValueError: If a version is requested without a policy_id
+    """
+    values = {"source": source, "insurer": insurer, "product": product}
+    conditions = [
+        {METADATA_SCOPE_FIELDS[field]: value}
+        for field, value in values.items()
+        if value
+    ]
+
+    if policy_id:
+        conditions.extend(
+            version_filter(policy_id, version_id=version_id, as_of=as_of)["$and"]
+        )
+    elif version_id or as_of:
+        raise ValueError("version_id and as_of require policy_id")
+
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+
+def scope_filter_for(request) -> Optional[Dict[str, Any]]:
+    """build_scope_filter from a request model with RetrievalScope fields."""
+    return build_scope_filter(
+        source=request.source,
+        insurer=request.insurer,
+        product=request.product,
+        policy_id=request.policy_id,
+        version_id=request.version_id,
+        as_of=request.as_of
+    )
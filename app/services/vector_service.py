@@ -3,8 +3,55 @@ import re
 import numpy as np
 from typing import List, Tuple, Dict, Any
 
-from app.infrastructure.embeddings import generate_embedding
-from app.infrastructure.vector_store import collection
+from app.infrastructure.embeddings import generate_embedding, generate_embeddings, embed_array, embedding_identity
+from app.infrastructure.vector_store import get_vector_store
+from app.infrastructure.lexical_index import get_lexical_index
+from app.services.chunk_tagging import category_tags, focus_filter, combine_filters
+from app.core.config import settings
+from app.explainability.decision_trace_builder import NULL_TRACE
+from app.core.metrics import EMBEDDINGS_COMPUTED
+
+
+# ----------------------------
+# Embedding Identity
+# ----------------------------
+
+class EmbeddingMismatchError(ValueError):
+    """The collection was built with a different embedding model"""
+
+
+_identity_checked = False
+
+
+def ensure_embedding_identity(store=None):
+    """
+    Refuse to mix vectors from different models in one collection.
+
+    A collection without a recorded identity (new, or built before it was
+    recorded) adopts the configured model; otherwise model and dimension
+    must match. Checked once per process.
+    """
+    global _identity_checked
+
+    if _identity_checked:
+        return
+
+    store = store or get_vector_store()
+    expected = embedding_identity()
+    recorded = store.get_info()
+
+    if not recorded.get("embedding_model"):
+        store.set_info(expected)
+    elif (recorded["embedding_model"], recorded.get("embedding_dim")) != \
+            (expected["embedding_model"], expected["embedding_dim"]):
+        raise EmbeddingMismatchError(
+            f"Collection {settings.DEFAULT_COLLECTION} was built with {recorded['embedding_model']} "
+            f"({recorded.get('embedding_dim')}-d) but EMBEDDING_MODEL is {expected['embedding_model']} "
+            f"({expected['embedding_dim']}-d); re-embed it with `python -m app.cli.reembed`"
+        )
+
+    _identity_checked = True
+
 
 
 # ----------------------------
@@ -16,22 +63,74 @@ def add_document(text: str, metadata: dict):
     Adds a document chunk to the vector database.
     """
 
+    ensure_embedding_identity()
+
     doc_id = str(uuid.uuid4())
+    metadata = {**metadata, **category_tags(text), "emb_normalized": settings.EMBEDDING_NORMALIZE}
     embedding = generate_embedding(text)
+    EMBEDDINGS_COMPUTED.labels(purpose="ingest").inc()
 
-    collection.add(
+    get_vector_store().add(
         ids=[doc_id],
         documents=[text],
         metadatas=[metadata],
         embeddings=[embedding]
     )
+    get_lexical_index().add([doc_id], [text], [metadata])
 
 
+def add_documents(texts: List[str], metadatas: List[dict], ids: List[str] = None, embeddings: List[List[float]] = None):
+    """
+    Adds many chunks in one call, embedding them as a single batch
+    (unless `embeddings` were computed already, e.g. in an ingestion worker).
+    """
 
-def cosine_similarity(a, b):
-    a = np.array(a)
-    b = np.array(b)
-    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+    if not texts:
+        return []
+
+    ensure_embedding_identity()
+
+    if ids is None:
+        ids = [str(uuid.uuid4()) for _ in texts]
+
+    metadatas = [
+        {**metadata, **category_tags(text), "emb_normalized": settings.EMBEDDING_NORMALIZE}
+        for text, metadata in zip(texts, metadatas)
+    ]
+
+    if embeddings is None:
+        embeddings = generate_embeddings(texts)
+
+    get_vector_store().add(
+        ids=ids,
+        documents=texts,
+        metadatas=metadatas,
+        embeddings=embeddings
+    )
+    get_lexical_index().add(ids, texts, metadatas)
+    EMBEDDINGS_COMPUTED.labels(purpose="ingest").inc(len(texts))
+
+    return ids
+
+
+def delete_chunks(ids: List[str], batch_size: int = 1000):
+    """
+    Removes chunks by id from the vector store and the lexical index.
+    """
+
+    store = get_vector_store()
+    for start in range(0, len(ids), batch_size):
+        store.delete(ids=ids[start:start + batch_size])
+    get_lexical_index().remove(ids)
+
+
+def update_metadatas(ids: List[str], metadatas: List[dict]):
+    """
+    Replaces the metadata of existing chunks (e.g. closing a policy version).
+    """
+
+    get_vector_store().update(ids=ids, metadatas=metadatas)
+    get_lexical_index().update_metadata(ids, metadatas)
 
 
 
@@ -39,25 +138,163 @@ def cosine_similarity(a, b):
 # Vector Search
 # ----------------------------
 
-def search_documents(query: str, k: int = 8):
+def search_documents(query: str, k: int = 8, where: Dict[str, Any] = None, tracer=NULL_TRACE,
+                     query_embedding=None):
+    """
+    Nearest-neighbour search. `where` is passed straight to Chroma so
+    callers can scope the query by metadata (e.g. a policy version).
+
+    With LEXICAL_SEARCH_ENABLED the vector hits are fused with BM25 hits
+    (see fuse_lexical) and the top `k` of the fused ranking are returned.
+    """
 
-    query_embedding = generate_embedding(query)
+    ensure_embedding_identity()
 
-    results = collection.query(
-        query_embeddings=[query_embedding],
-        n_results=k,
-        include=["documents", "metadatas", "embeddings"]
-    )
+    if query_embedding is None:
+        with tracer.span("query_embedding"):
+            query_embedding = generate_embedding(query)
+        EMBEDDINGS_COMPUTED.labels(purpose="query").inc()
+
+    with tracer.span("vector_query"):
+        results = get_vector_store().query(
+            query_embeddings=[query_embedding],
+            n_results=k,
+            where=where,
+            include=["documents", "metadatas", "embeddings"]
+        )
+
+    if settings.LEXICAL_SEARCH_ENABLED:
+        with tracer.span("lexical_fusion"):
+            results = fuse_lexical(query, results, k, where)
 
     return results
 
 
 
+def search_focused(query: str, focus_areas: List[str], k: int = 8,
+                   where: Dict[str, Any] = None, tracer=NULL_TRACE):
+    """
+    Search chunks tagged with the question's focus areas first.
+
+    The focus filter (see chunk_tagging) is ANDed with `where`. If it
+    yields fewer than FOCUS_MIN_CANDIDATES hits (untagged corpus, or a
+    mis-classified question) the list is topped up with the best chunks
+    under `where` alone: the same query embedding is re-run for ids only,
+    and just the missing chunks are fetched.
+    """
+
+    focus_where = focus_filter(focus_areas) if settings.FOCUS_PREFILTER_ENABLED else None
+    if focus_where is None:
+        return search_documents(query, k=k, where=where, tracer=tracer)
+
+    with tracer.span("query_embedding"):
+        query_embedding = generate_embedding(query)
+    EMBEDDINGS_COMPUTED.labels(purpose="query").inc()
+
+    focused = search_documents(
+        query, k=k, where=combine_filters(where, focus_where),
+        tracer=tracer, query_embedding=query_embedding
+    )
+    found = set(focused.get("ids", [[]])[0])
+    if len(found) >= min(settings.FOCUS_MIN_CANDIDATES, k):
+        return focused
+
+    store = get_vector_store()
+    with tracer.span("focus_topup"):
+        ranked = store.query(query_embeddings=[query_embedding], n_results=k, where=where, include=["distances"])
+        topup = [doc_id for doc_id in ranked["ids"][0] if doc_id not in found][:k - len(found)]
+        fetched = store.get(ids=topup, include=["documents", "metadatas", "embeddings"]) if topup else {"ids": []}
+
+    merged = {key: [list(focused[key][0])] for key in ("ids", "documents", "metadatas", "embeddings")}
+    position = {doc_id: n for n, doc_id in enumerate(fetched["ids"])}
+    for doc_id in topup:
+        if doc_id not in position:
+            continue
+        for key in merged:
+            merged[key][0].append(fetched[key][position[doc_id]])
+
+    return merged
+
+
+
+# ----------------------------
+# Lexical Fusion
+# ----------------------------
+
+def reciprocal_rank_fusion(rankings: List[List[str]], rrf_k: int = 60) -> List[str]:
+    """
+    Merge ranked id lists: score(id) = sum of 1 / (rrf_k + rank).
+
+    Returns:
+        Ids ordered by fused score
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def fuse_lexical(query: str, results: dict, k: int, where: Dict[str, Any] = None) -> dict:
+    """
+    Fuse vector results with BM25 hits for the same query and scope.
+
+    Lexical-only hits are fetched from the vector store (with their
+    embeddings) so MMR can treat every fused candidate alike; the fetch
+    applies `where` too, so a chunk retired or re-scoped since the BM25
+    index was loaded never leaks into a scoped answer.
+    """
+    # policy_versioning writes through this module
+    from app.compliance.policy_versioning import current_snapshot_id, snapshot_changes
+
+    store = get_vector_store()
+    index = get_lexical_index()
+    index.sync(store, current_snapshot_id(), snapshot_changes)
+
+    lexical_ids = [doc_id for doc_id, _ in index.search(query, k=settings.LEXICAL_K, where=where)]
+    if not lexical_ids:
+        return results
+
+    candidates = {}
+    vector_ids = list(results.get("ids", [[]])[0])
+    for n, doc_id in enumerate(vector_ids):
+        candidates[doc_id] = (
+            results["documents"][0][n],
+            results["metadatas"][0][n],
+            results["embeddings"][0][n]
+        )
+
+    missing = [doc_id for doc_id in lexical_ids if doc_id not in candidates]
+    if missing:
+        fetched = store.get(ids=missing, where=where, include=["documents", "metadatas", "embeddings"])
+        for n, doc_id in enumerate(fetched["ids"]):
+            candidates[doc_id] = (
+                fetched["documents"][n],
+                fetched["metadatas"][n],
+                fetched["embeddings"][n]
+            )
+
+    fused = [
+        doc_id
+        for doc_id in reciprocal_rank_fusion([vector_ids, lexical_ids], rrf_k=settings.RRF_K)
+        if doc_id in candidates
+    ][:k]
+
+    return {
+        "ids": [fused],
+        "documents": [[candidates[doc_id][0] for doc_id in fused]],
+        "metadatas": [[candidates[doc_id][1] for doc_id in fused]],
+        "embeddings": [[candidates[doc_id][2] for doc_id in fused]]
+    }
+
+
+
 # ----------------------------
 # Hybrid Re-Ranking
 # ----------------------------
 
-def hybrid_rerank(query: str, results: dict, top_k: int = 4, lambda_param: float = 0.7):
+def hybrid_rerank(query: str, results: dict, top_k: int = 4, lambda_param: float = 0.7, tracer=NULL_TRACE):
 
     documents = results.get("documents", [[]])[0]
     metadatas = results.get("metadatas", [[]])[0]
@@ -66,45 +303,76 @@ def hybrid_rerank(query: str, results: dict, top_k: int = 4, lambda_param: float
     if not documents:
         return [], [], []
 
-    query_embedding = generate_embedding(query)
+    if settings.RERANKER_ENABLED:
+        with tracer.span("cross_encoder"):
+            reranked = _cross_encoder_select(query, documents, metadatas, top_k)
+        if reranked is not None:
+            return reranked
 
-    selected_docs = []
-    selected_meta = []
-    selected_scores = []
+    with tracer.span("rerank_embedding"):
+        query_embedding = embed_array(query)
+    EMBEDDINGS_COMPUTED.labels(purpose="query").inc()
 
-    candidate_indices = list(range(len(documents)))
+    with tracer.span("mmr"):
+        return _mmr_select(query_embedding, documents, metadatas, embeddings, top_k, lambda_param)
 
-    while len(selected_docs) < min(top_k, len(documents)):
 
-        mmr_scores = []
+def _cross_encoder_select(query, documents, metadatas, top_k):
+    """Top-k by cross-encoder score, or None to fall back to MMR."""
+    from app.infrastructure.cross_encoder import score_pairs
 
-        for idx in candidate_indices:
-            doc_embedding = embeddings[idx]
+    scores = score_pairs(query, documents)
+    if scores is None:
+        return None
 
-            relevance = cosine_similarity(query_embedding, doc_embedding)
+    order = sorted(range(len(documents)), key=lambda i: scores[i], reverse=True)[:top_k]
+    return (
+        [documents[i] for i in order],
+        [metadatas[i] for i in order],
+        [scores[i] for i in order]
+    )
 
-            diversity = 0
-            if selected_docs:
-                similarities = [
-                    cosine_similarity(doc_embedding, embeddings[i])
-                    for i in range(len(documents))
-                    if documents[i] in selected_docs
-                ]
-                diversity = max(similarities) if similarities else 0
 
-            mmr_score = lambda_param * relevance - (1 - lambda_param) * diversity
+def _unit_rows(embeddings, metadatas) -> np.ndarray:
+    """
+    Candidate embeddings as one float32 matrix with unit rows. Chunks
+    flagged emb_normalized at ingestion are used as stored.
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if all((m or {}).get("emb_normalized") for m in metadatas):
+        return matrix
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
 
-            mmr_scores.append((mmr_score, idx, relevance))
 
-        mmr_scores.sort(reverse=True, key=lambda x: x[0])
+def _mmr_select(query_embedding, documents, metadatas, embeddings, top_k, lambda_param):
 
-        best_score, best_idx, relevance_score = mmr_scores[0]
+    vectors = _unit_rows(embeddings, metadatas)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    if not settings.EMBEDDING_NORMALIZE:
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
 
-        selected_docs.append(documents[best_idx])
-        selected_meta.append(metadatas[best_idx])
-        selected_scores.append(relevance_score)
+    # Unit vectors: cosine similarity is a dot product, computed once
+    relevance = vectors @ query
+    pairwise = vectors @ vectors.T
 
-        candidate_indices.remove(best_idx)
+    selected = []
+    diversity = np.zeros(len(documents), dtype=np.float32)
+    available = np.ones(len(documents), dtype=bool)
 
-    return selected_docs, selected_meta, selected_scores
+    while len(selected) < min(top_k, len(documents)):
 
+        mmr_scores = lambda_param * relevance - (1 - lambda_param) * diversity
+        mmr_scores[~available] = -np.inf
+
+        best_idx = int(np.argmax(mmr_scores))
+        selected.append(best_idx)
+        available[best_idx] = False
+
+        # Max similarity to anything selected so far
+        diversity = pairwise[best_idx] if len(selected) == 1 else np.maximum(diversity, pairwise[best_idx])
+
+    return (
+        [documents[i] for i in selected],
+        [metadatas[i] for i in selected],
+        [float(relevance[i]) for i in selected]
+    )
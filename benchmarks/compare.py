@@ -0,0 +1,52 @@
+"""
+Compare two benchmark result files.
+
+Usage:
+    python -m benchmarks.compare bench/base.json bench/head.json [--threshold 5]
+
+Prints every numeric metric present in both files with its relative change;
+changes larger than the threshold (percent) are flagged.
+"""
+
+import argparse
+import json
+from typing import Any, Dict
+
+
+def _flatten(node: Any, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    if isinstance(node, dict):
+        for key, value in node.items():
+            flat.update(_flatten(value, f"{prefix}.{key}" if prefix else key))
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        flat[prefix] = float(node)
+    return flat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diff two benchmark JSON files")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    print(f"base {base['meta']['commit']}  ->  head {head['meta']['commit']}")
+
+    base_flat = _flatten(base["results"])
+    head_flat = _flatten(head["results"])
+
+    width = max((len(k) for k in base_flat), default=10)
+    for key in sorted(base_flat.keys() & head_flat.keys()):
+        old, new = base_flat[key], head_flat[key]
+        change = ((new - old) / old * 100) if old else 0.0
+        flag = "  <<" if abs(change) >= args.threshold else ""
+        print(f"{key:<{width}}  {old:>12.3f}  {new:>12.3f}  {change:>+8.1f}%{flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Embedding Backend Accuracy Check
+
+Encodes the same corpus with the reference backend (full-precision torch)
+and a candidate EMBEDDING_BACKEND, then reports how far the candidate's
+vectors drift and whether retrieval still returns the same chunks:
+
+    cosine_to_reference   per-text cosine between the two vectors
+                          (mean / p1 / min)
+    recall@k              overlap of the candidate's top-k chunks with
+                          the reference top-k, per query
+    texts_per_sec         encode throughput of each backend
+
+Usage:
+    # Chunks exported from the live index (python -m app.cli.index export)
+    python -m benchmarks.embedding_accuracy --candidate onnx-int8 --bundle /bundles/policies
+
+    # Synthetic corpus
+    python -m benchmarks.embedding_accuracy --candidate torch-int8 --docs 100 --threads 4
+
+Exits non-zero when mean cosine falls below --min-cosine or recall@k below
+--min-recall, so it can gate a backend switch in CI.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from benchmarks.synthetic_corpus import generate_corpus, generate_questions
+
+
+# ============================================================
+# CORPUS
+# ============================================================
+
+def bundle_texts(bundle_dir: str, limit: int) -> List[str]:
+    offsets = np.load(os.path.join(bundle_dir, "text_offsets.npy"))
+    with open(os.path.join(bundle_dir, "texts.bin"), "rb") as f:
+        blob = f.read()
+    count = min(len(offsets) - 1, limit)
+    return [blob[offsets[n]:offsets[n + 1]].decode("utf-8") for n in range(count)]
+
+
+def synthetic_texts(num_docs: int, seed: int) -> List[str]:
+    from app.infrastructure.text_chunker import chunk_text
+
+    return [
+        chunk
+        for doc in generate_corpus(num_docs, seed=seed)
+        for page in doc["pages"]
+        for chunk in chunk_text(page["text"])
+    ]
+
+
+# ============================================================
+# COMPARISON
+# ============================================================
+
+def encode(encoder, texts: List[str], batch_size: int) -> Dict[str, Any]:
+    start = time.perf_counter()
+    vectors = np.asarray(encoder.encode(texts, batch_size=batch_size), dtype=np.float32)
+    elapsed = time.perf_counter() - start
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    return {"vectors": vectors, "texts_per_sec": round(len(texts) / elapsed, 2)}
+
+
+def top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ corpus.T
+    return np.argpartition(-scores, kth=k - 1, axis=1)[:, :k]
+
+
+def compare(reference: Dict[str, np.ndarray], candidate: Dict[str, np.ndarray], k: int) -> Dict[str, Any]:
+    cosines = np.sum(reference["corpus"] * candidate["corpus"], axis=1)
+
+    expected = top_k(reference["corpus"], reference["queries"], k)
+    got = top_k(candidate["corpus"], candidate["queries"], k)
+    recall = [len(set(e.tolist()) & set(g.tolist())) / k for e, g in zip(expected, got)]
+
+    return {
+        "cosine_to_reference": {
+            "mean": round(float(cosines.mean()), 5),
+            "p1": round(float(np.percentile(cosines, 1)), 5),
+            "min": round(float(cosines.min()), 5)
+        },
+        f"recall@{k}": round(float(np.mean(recall)), 4),
+        "queries_below_full_recall": int(sum(r < 1.0 for r in recall))
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare an embedding backend against the reference model")
+    parser.add_argument("--candidate", required=True, help="EMBEDDING_BACKEND to check, e.g. onnx-int8")
+    parser.add_argument("--reference", default="torch")
+    parser.add_argument("--bundle", help="Bundle directory from `python -m app.cli.index export`")
+    parser.add_argument("--docs", type=int, default=100, help="Synthetic corpus size when no bundle is given")
+    parser.add_argument("--limit", type=int, default=5000, help="Max chunks taken from a bundle")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--min-recall", type=float, default=0.9)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write JSON results here")
+    args = parser.parse_args(argv)
+
+    from app.core.config import settings
+    settings.EMBEDDING_THREADS = args.threads
+    # get_model() loads EMBEDDING_BACKEND; make that the reference
+    settings.EMBEDDING_BACKEND = args.reference
+    from app.infrastructure import embeddings
+
+    texts = bundle_texts(args.bundle, args.limit) if args.bundle else synthetic_texts(args.docs, args.seed)
+    questions = generate_questions(args.queries, seed=args.seed)
+    k = min(args.k, len(texts))
+    print(f"{len(texts)} chunks, {len(questions)} queries, k={k}")
+
+    vectors, throughput = {}, {}
+    for role, backend in (("reference", args.reference), ("candidate", args.candidate)):
+        encoder = embeddings.get_model() if role == "reference" else embeddings.load_model(backend)
+        corpus = encode(encoder, texts, args.batch_size)
+        vectors[role] = {
+            "corpus": corpus["vectors"],
+            "queries": encode(encoder, questions, args.batch_size)["vectors"]
+        }
+        throughput[backend] = corpus["texts_per_sec"]
+        print(f"{backend:<12} {corpus['texts_per_sec']:.1f} texts/sec")
+
+    report = {
+        "model": settings.EMBEDDING_MODEL,
+        "reference": args.reference,
+        "candidate": args.candidate,
+        "chunks": len(texts),
+        "queries": len(questions),
+        "texts_per_sec": throughput,
+        **compare(vectors["reference"], vectors["candidate"], k)
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+    if report["cosine_to_reference"]["mean"] < args.min_cosine or report[f"recall@{k}"] < args.min_recall:
+        print("✗ Candidate backend is below the accuracy thresholds", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
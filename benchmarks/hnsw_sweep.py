@@ -0,0 +1,179 @@
+"""
+HNSW Parameter Sweep
+
+Builds an in-memory Chroma collection for every combination of HNSW
+parameters and reports recall@k against exact brute-force search together
+with build time and p50/p99 query latency, so HNSW_* settings can be picked
+from evidence.
+
+Usage:
+    # Vectors exported from a real index (python -m app.cli.index export)
+    python -m benchmarks.hnsw_sweep --bundle /bundles/policies --queries 300
+
+    # Synthetic corpus, no model weights needed
+    python -m benchmarks.hnsw_sweep --docs 300 --embedder hash \\
+        --M 8 16 32 --construction-ef 64 128 --search-ef 10 32 64 128 --k 10
+
+Queries are question embeddings for synthetic corpora and randomly sampled
+stored vectors for bundles.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from benchmarks.run import HashingEncoder, percentiles
+from benchmarks.synthetic_corpus import generate_corpus, generate_questions
+
+
+# ============================================================
+# DATA
+# ============================================================
+
+def load_bundle(bundle_dir: str, num_queries: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    vectors = np.load(os.path.join(bundle_dir, "embeddings.npy")).astype(np.float32)
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.choice(len(vectors), size=min(num_queries, len(vectors)), replace=False)]
+    return vectors, queries
+
+
+def synthetic_vectors(num_docs: int, num_queries: int, embedder: str, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    from app.infrastructure.text_chunker import chunk_text
+
+    if embedder == "hash":
+        encoder = HashingEncoder()
+    else:
+        from sentence_transformers import SentenceTransformer
+        from app.core.config import settings
+        encoder = SentenceTransformer(settings.EMBEDDING_MODEL)
+
+    texts = [
+        chunk
+        for doc in generate_corpus(num_docs, seed=seed)
+        for page in doc["pages"]
+        for chunk in chunk_text(page["text"])
+    ]
+    vectors = np.asarray(encoder.encode(texts), dtype=np.float32)
+    queries = np.asarray(encoder.encode(generate_questions(num_queries, seed=seed)), dtype=np.float32)
+    return vectors, queries
+
+
+# ============================================================
+# EXACT SEARCH
+# ============================================================
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int, space: str) -> np.ndarray:
+    if space == "cosine":
+        v = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        q = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        scores = q @ v.T
+    elif space == "ip":
+        scores = queries @ vectors.T
+    else:
+        # Smaller l2 distance is better; ||v||^2 - 2 q.v ranks identically
+        scores = 2 * (queries @ vectors.T) - np.sum(vectors * vectors, axis=1)
+
+    top = np.argpartition(-scores, kth=min(k, scores.shape[1] - 1) - 1, axis=1)[:, :k]
+    return top
+
+
+# ============================================================
+# SWEEP
+# ============================================================
+
+def run_config(client, vectors: np.ndarray, queries: np.ndarray, truth: np.ndarray,
+               k: int, space: str, m: int, construction_ef: int, search_ef: int) -> Dict[str, Any]:
+    from app.infrastructure.vector_store import hnsw_metadata
+
+    name = f"sweep_{space}_{m}_{construction_ef}_{search_ef}"
+    collection = client.create_collection(
+        name=name,
+        metadata=hnsw_metadata(space, m, construction_ef, search_ef)
+    )
+
+    ids = [str(i) for i in range(len(vectors))]
+    build_start = time.perf_counter()
+    for start in range(0, len(vectors), 4096):
+        collection.add(ids=ids[start:start + 4096], embeddings=vectors[start:start + 4096].tolist())
+    build_seconds = time.perf_counter() - build_start
+
+    latencies, hits = [], 0
+    for q, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[q.tolist()], n_results=k, include=[])
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len({int(i) for i in result["ids"][0]} & set(expected.tolist()))
+
+    client.delete_collection(name)
+
+    latency = percentiles(latencies)
+    return {
+        "space": space,
+        "M": m,
+        "construction_ef": construction_ef,
+        "search_ef": search_ef,
+        f"recall@{k}": round(hits / (len(queries) * k), 4),
+        "build_seconds": round(build_seconds, 3),
+        "p50_ms": latency["p50"],
+        "p99_ms": latency["p99"]
+    }
+
+
+def sweep(vectors, queries, args) -> List[Dict[str, Any]]:
+    import chromadb
+    from chromadb.config import Settings as ChromaSettings
+
+    client = chromadb.EphemeralClient(settings=ChromaSettings(anonymized_telemetry=False))
+    k = min(args.k, len(vectors))
+
+    results = []
+    for space in args.space:
+        truth = exact_top_k(vectors, queries, k, space)
+        for m, construction_ef, search_ef in itertools.product(args.M, args.construction_ef, args.search_ef):
+            row = run_config(client, vectors, queries, truth, k, space, m, construction_ef, search_ef)
+            results.append(row)
+            print(
+                f"space={space:<6} M={m:<3} construction_ef={construction_ef:<4} search_ef={search_ef:<4} "
+                f"recall@{k}={row[f'recall@{k}']:.4f}  p50={row['p50_ms']:.3f}ms  p99={row['p99_ms']:.3f}ms  "
+                f"build={row['build_seconds']:.2f}s"
+            )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep HNSW parameters for recall vs latency")
+    parser.add_argument("--bundle", help="Bundle directory from `python -m app.cli.index export`")
+    parser.add_argument("--docs", type=int, default=200, help="Synthetic corpus size when no bundle is given")
+    parser.add_argument("--embedder", choices=["model", "hash"], default="model")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--space", nargs="+", choices=["l2", "cosine", "ip"], default=["l2"])
+    parser.add_argument("--M", nargs="+", type=int, default=[16])
+    parser.add_argument("--construction-ef", nargs="+", type=int, default=[100])
+    parser.add_argument("--search-ef", nargs="+", type=int, default=[10, 32, 64, 128])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write JSON results here")
+    args = parser.parse_args(argv)
+
+    if args.bundle:
+        vectors, queries = load_bundle(args.bundle, args.queries, args.seed)
+    else:
+        vectors, queries = synthetic_vectors(args.docs, args.queries, args.embedder, args.seed)
+
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {len(queries)} queries")
+    results = sweep(vectors, queries, args)
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"vectors": len(vectors), "queries": len(queries), "results": results}, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
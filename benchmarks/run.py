@@ -0,0 +1,302 @@
+"""
+Benchmark Runner
+
+Offline, reproducible benchmark of the ingestion and QA pipelines over a
+synthetic policy corpus. Results are written as JSON so two commits can be
+compared with `python -m benchmarks.compare old.json new.json`.
+
+Usage:
+    python -m benchmarks.run --docs 200 --questions 200 --output bench/HEAD.json
+    python -m benchmarks.run --embedder hash   # no model weights needed
+    python -m benchmarks.run --backend mmap --sharding hash
+
+The run uses its own temporary directory for every index, registry and
+cache the app writes, so it never touches the application's index. The
+vector backend and sharding come from --backend / --sharding, not the
+environment.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from benchmarks.synthetic_corpus import generate_corpus, generate_questions
+
+
+# ============================================================
+# HELPERS
+# ============================================================
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def _rank(p):
+        # Nearest-rank percentile
+        index = max(0, math.ceil(p / 100 * len(ordered)) - 1)
+        return round(ordered[index], 3)
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "p50": _rank(50),
+        "p90": _rank(90),
+        "p99": _rank(99),
+        "max": round(ordered[-1], 3)
+    }
+
+
+def max_rss_mb() -> float:
+    """Process resident-set high-water mark so far."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(rss / divisor, 1)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+class HashingEncoder:
+    """
+    Deterministic bag-of-words hashing encoder with the SentenceTransformer
+    `encode` signature. Lets the non-model stages be benchmarked offline;
+    numbers for embedding stages are then not representative.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _encode_one(self, text: str):
+        import numpy as np
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for token in text.lower().split():
+            vec[zlib.crc32(token.encode("utf-8")) % self.dim] += 1.0
+        return vec
+
+    def encode(self, texts, **kwargs):
+        import numpy as np
+        if isinstance(texts, str):
+            return self._encode_one(texts)
+        return np.stack([self._encode_one(t) for t in texts]) if texts else np.zeros((0, self.dim))
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+
+# ============================================================
+# PHASES
+# ============================================================
+
+def bench_classifier(questions: List[str], repeat: int) -> Dict[str, Any]:
+    from app.services.query_classifier import classify_query, get_query_focus_areas
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for q in questions:
+            category, use_case, _ = classify_query(q)
+            get_query_focus_areas(category, use_case)
+    elapsed = time.perf_counter() - start
+
+    total = repeat * len(questions)
+    return {
+        "queries": total,
+        "seconds": round(elapsed, 4),
+        "queries_per_sec": round(total / elapsed, 1),
+        "max_rss_mb": max_rss_mb()
+    }
+
+
+def bench_chunking(corpus: List[Dict[str, Any]]) -> Dict[str, Any]:
+    from app.infrastructure.text_chunker import chunk_text
+
+    pages = [p["text"] for doc in corpus for p in doc["pages"]]
+    words = sum(len(p.split()) for p in pages)
+
+    start = time.perf_counter()
+    chunks = 0
+    for text in pages:
+        chunks += len(chunk_text(text))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "pages": len(pages),
+        "chunks": chunks,
+        "seconds": round(elapsed, 4),
+        "pages_per_sec": round(len(pages) / elapsed, 1),
+        "words_per_sec": round(words / elapsed, 1),
+        "max_rss_mb": max_rss_mb()
+    }
+
+
+def bench_ingestion(corpus: List[Dict[str, Any]]) -> Dict[str, Any]:
+    from app.infrastructure.text_chunker import chunk_text
+    from app.services.vector_service import add_documents
+
+    docs = pages = chunks = 0
+    per_doc_ms = []
+
+    start = time.perf_counter()
+    for doc in corpus:
+        doc_start = time.perf_counter()
+        texts, metadatas = [], []
+        for page in doc["pages"]:
+            for i, chunk in enumerate(chunk_text(page["text"])):
+                texts.append(chunk)
+                metadatas.append({
+                    "source": doc["source"],
+                    "page": page["page"],
+                    "chunk": i,
+                    "insurer": doc["insurer"],
+                    "product": doc["product"]
+                })
+        add_documents(texts, metadatas)
+        per_doc_ms.append((time.perf_counter() - doc_start) * 1000)
+
+        docs += 1
+        pages += len(doc["pages"])
+        chunks += len(texts)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "documents": docs,
+        "pages": pages,
+        "chunks": chunks,
+        "seconds": round(elapsed, 3),
+        "docs_per_sec": round(docs / elapsed, 2),
+        "pages_per_sec": round(pages / elapsed, 2),
+        "chunks_per_sec": round(chunks / elapsed, 2),
+        "embeddings_per_sec": round(chunks / elapsed, 2),
+        "per_document_ms": percentiles(per_doc_ms),
+        "max_rss_mb": max_rss_mb()
+    }
+
+
+def bench_qa(questions: List[str], pipeline: str) -> Dict[str, Any]:
+    if pipeline == "reasoning":
+        from app.services.policy_reasoning_engine import answer_question
+    else:
+        from app.services.rag_service import answer_question
+
+    stage_samples: Dict[str, List[float]] = {}
+    totals = []
+
+    for q in questions:
+        start = time.perf_counter()
+        response = answer_question(q, trace_timing=True)
+        totals.append((time.perf_counter() - start) * 1000)
+
+        timing = response.get("decision_trace", {}).get("timing", {})
+        for stage in timing.get("stages", []):
+            stage_samples.setdefault(stage["stage"], []).append(stage["wall_ms"])
+
+    return {
+        "pipeline": pipeline,
+        "questions": len(questions),
+        "total_ms": percentiles(totals),
+        "stages_ms": {name: percentiles(s) for name, s in stage_samples.items()},
+        "max_rss_mb": max_rss_mb()
+    }
+
+
+# ============================================================
+# ENTRY POINT
+# ============================================================
+
+def _isolate_environment(workdir: str, backend: str, sharding: str):
+    """Point the app at a throwaway store before any app module is imported."""
+    os.environ["VECTOR_BACKEND"] = backend
+    os.environ["VECTOR_SHARDING"] = sharding
+    os.environ["CHROMA_MODE"] = "persistent"
+    os.environ["CHROMA_PERSIST_DIR"] = os.path.join(workdir, "chroma")
+    os.environ["MMAP_INDEX_DIR"] = os.path.join(workdir, "vector_index")
+    os.environ["DEFAULT_COLLECTION"] = "benchmark"
+    # A left-over active index file would override the collection and model
+    os.environ["ACTIVE_INDEX_PATH"] = os.path.join(workdir, "active_index.json")
+    os.environ["POLICY_REGISTRY_PATH"] = os.path.join(workdir, "policy_versions.json")
+    os.environ["SOURCE_INDEX_PATH"] = os.path.join(workdir, "source_index.sqlite3")
+    os.environ["DOC_SUMMARY_DIR"] = os.path.join(workdir, "summaries")
+    os.environ["OCR_CACHE_DIR"] = os.path.join(workdir, "ocr_cache")
+    os.environ["UPLOAD_DIR"] = os.path.join(workdir, "uploads")
+
+
+def run(args) -> Dict[str, Any]:
+    corpus = list(generate_corpus(args.docs, seed=args.seed))
+    questions = generate_questions(args.questions, seed=args.seed)
+
+    if args.embedder == "hash":
+        from app.infrastructure.embeddings import set_model
+        set_model(HashingEncoder())
+
+    results = {
+        "classifier": bench_classifier(questions, repeat=args.classifier_repeat),
+        "chunking": bench_chunking(corpus),
+        "ingestion": bench_ingestion(corpus)
+    }
+    for pipeline in args.pipelines:
+        results[f"qa_{pipeline}"] = bench_qa(questions, pipeline)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "embedder": args.embedder,
+            "backend": args.backend,
+            "sharding": args.sharding,
+            "docs": args.docs,
+            "questions": args.questions,
+            "seed": args.seed
+        },
+        "results": results
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ingestion and QA pipelines")
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--classifier-repeat", type=int, default=50)
+    parser.add_argument("--embedder", choices=["model", "hash"], default="model")
+    parser.add_argument("--pipelines", nargs="+", choices=["rag", "reasoning"], default=["rag"])
+    parser.add_argument("--backend", choices=["chroma", "mmap"], default="chroma")
+    parser.add_argument("--sharding", choices=["none", "hash", "tenant"], default="none")
+    parser.add_argument("--output", help="Write JSON results here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="policy-bench-") as workdir:
+        _isolate_environment(workdir, args.backend, args.sharding)
+        report = run(args)
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+        print(f"Wrote {args.output}")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Synthetic Policy Corpus Generator
+
+Produces deterministic, realistic-looking insurance policy wordings made of
+coverage, exclusion, limit and condition clauses, in the same page format
+that `pdf_parser.extract_text` returns. Used by the benchmark suite so
+results are reproducible without shipping real policy PDFs.
+"""
+
+import random
+from typing import Any, Dict, Iterator, List
+
+
+INSURERS = [
+    "Acme General", "Northwind Assurance", "Bluepeak Health",
+    "Sterling Mutual", "Harbor Life", "Crescent Insurance"
+]
+
+PRODUCTS = [
+    "Family Floater", "Individual Health Shield", "Senior Care Plus",
+    "Group Mediclaim", "Critical Illness Cover", "Top-Up Secure"
+]
+
+TREATMENTS = [
+    "in-patient hospitalisation", "day care procedures", "ICU charges",
+    "ambulance charges", "organ donor expenses", "domiciliary treatment",
+    "AYUSH treatment", "maternity expenses", "newborn baby cover",
+    "cataract surgery", "knee replacement", "dialysis", "chemotherapy",
+    "robotic surgery", "mental illness treatment", "pre-hospitalisation expenses",
+    "post-hospitalisation expenses", "room rent", "air ambulance", "bariatric surgery"
+]
+
+EXCLUSIONS = [
+    "cosmetic or plastic surgery", "dental treatment unless due to an accident",
+    "self-inflicted injury", "treatment for alcoholism or drug abuse",
+    "war, invasion or acts of foreign enemies", "experimental or unproven treatment",
+    "spectacles, contact lenses and hearing aids", "infertility treatment",
+    "hazardous sports", "weight control programmes", "routine medical check-ups",
+    "external congenital anomalies"
+]
+
+SECTION_TITLES = {
+    "coverage": "Section {n}: Coverage",
+    "exclusions": "Section {n}: Exclusions",
+    "limits": "Section {n}: Limits and Sub-limits",
+    "conditions": "Section {n}: General Conditions"
+}
+
+
+# ============================================================
+# CLAUSE TEMPLATES
+# ============================================================
+
+def _coverage_clause(rng: random.Random, n: str) -> str:
+    treatment = rng.choice(TREATMENTS)
+    return rng.choice([
+        f"{n} We will pay for {treatment} incurred during the policy period "
+        f"where the insured person is admitted on the advice of a medical practitioner.",
+        f"{n} The policy covers reasonable and customary charges for {treatment} "
+        f"provided the treatment is medically necessary.",
+        f"{n} {treatment.capitalize()} is covered under this policy for all insured persons "
+        f"named in the schedule."
+    ])
+
+
+def _exclusion_clause(rng: random.Random, n: str) -> str:
+    excluded = rng.choice(EXCLUSIONS)
+    return rng.choice([
+        f"{n} We will not pay for any expenses arising from {excluded}.",
+        f"{n} Expenses related to {excluded} are excluded from the scope of this policy.",
+        f"{n} The company shall not be liable to make any payment in respect of {excluded}."
+    ])
+
+
+def _limit_clause(rng: random.Random, n: str) -> str:
+    treatment = rng.choice(TREATMENTS)
+    pct = rng.choice([1, 2, 5, 10, 20, 25])
+    amount = rng.choice([10000, 25000, 50000, 100000, 200000])
+    return rng.choice([
+        f"{n} Payment for {treatment} is limited to {pct}% of the sum insured per day.",
+        f"{n} The maximum payment for {treatment} shall be up to Rs. {amount:,} per policy year.",
+        f"{n} A deductible of Rs. {amount // 10:,} applies to each claim for {treatment}.",
+        f"{n} A co-payment of {pct}% of the admissible claim amount applies to {treatment}."
+    ])
+
+
+def _condition_clause(rng: random.Random, n: str) -> str:
+    treatment = rng.choice(TREATMENTS)
+    days = rng.choice([30, 90, 365, 730, 1095])
+    return rng.choice([
+        f"{n} Cover for {treatment} is subject to a waiting period of {days} days "
+        f"from the first policy inception date.",
+        f"{n} Claims for {treatment} will be admissible only if pre-authorisation is "
+        f"obtained at least 48 hours before admission.",
+        f"{n} Provided that the insured person notifies the company within {days // 30 or 1} "
+        f"days of discharge, claims for {treatment} shall be processed.",
+        f"{n} Benefits for {treatment} are payable unless the condition was a "
+        f"pre-existing disease declared at proposal."
+    ])
+
+
+CLAUSE_BUILDERS = {
+    "coverage": _coverage_clause,
+    "exclusions": _exclusion_clause,
+    "limits": _limit_clause,
+    "conditions": _condition_clause
+}
+
+
+# ============================================================
+# DOCUMENT GENERATION
+# ============================================================
+
+def generate_policy(doc_index: int, seed: int = 0, clauses_per_section: int = 24,
+                    words_per_page: int = 450) -> Dict[str, Any]:
+    """
+    Generate one synthetic policy.
+
+    Returns:
+        {"source", "insurer", "product", "pages": [{"page", "text"}]}
+    """
+    rng = random.Random(seed * 1_000_003 + doc_index)
+
+    insurer = rng.choice(INSURERS)
+    product = rng.choice(PRODUCTS)
+
+    paragraphs = [
+        f"{insurer} {product} Policy Wording. UIN {rng.randint(10000, 99999)}.",
+        "This policy is a contract of insurance between the policyholder and the company."
+    ]
+
+    for section_no, (category, build) in enumerate(CLAUSE_BUILDERS.items(), start=1):
+        paragraphs.append(SECTION_TITLES[category].format(n=section_no))
+        for clause_no in range(1, clauses_per_section + 1):
+            paragraphs.append(build(rng, f"{section_no}.{clause_no}"))
+
+    # Pack paragraphs into pages of roughly `words_per_page` words
+    pages, current, count = [], [], 0
+    for paragraph in paragraphs:
+        current.append(paragraph)
+        count += len(paragraph.split())
+        if count >= words_per_page:
+            pages.append({"page": len(pages) + 1, "text": "\n".join(current)})
+            current, count = [], 0
+    if current:
+        pages.append({"page": len(pages) + 1, "text": "\n".join(current)})
+
+    return {
+        "source": f"synthetic_policy_{doc_index:05d}.pdf",
+        "insurer": insurer,
+        "product": product,
+        "pages": pages
+    }
+
+
+def generate_corpus(num_docs: int, seed: int = 0, **kwargs) -> Iterator[Dict[str, Any]]:
+    """Yield `num_docs` policies lazily so large corpora stay cheap."""
+    for doc_index in range(num_docs):
+        yield generate_policy(doc_index, seed=seed, **kwargs)
+
+
+QUESTION_TEMPLATES = [
+    "Is {t} covered?",
+    "What is the limit for {t}?",
+    "Is there a waiting period for {t}?",
+    "What are the exclusions for {t}?",
+    "Is pre-authorization required for {t}?",
+    "What is the deductible on {t}?",
+    "What documents do I need to claim {t}?",
+    "Give me a summary of the policy",
+    "Is {t} covered for a cashless claim at a network hospital?",
+    "What is the room rent and ICU limit?"
+]
+
+
+def generate_questions(num_questions: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        rng.choice(QUESTION_TEMPLATES).format(t=rng.choice(TREATMENTS))
+        for _ in range(num_questions)
+    ]
+
+
+def write_pdfs(output_dir: str, num_docs: int, seed: int = 0):
+    """Render the corpus to PDFs (requires PyMuPDF) for end-to-end ingestion runs."""
+    import os
+    import fitz
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    for policy in generate_corpus(num_docs, seed=seed):
+        doc = fitz.open()
+        for page in policy["pages"]:
+            pdf_page = doc.new_page()
+            pdf_page.insert_textbox(pdf_page.rect + (36, 36, -36, -36), page["text"], fontsize=9)
+        doc.save(os.path.join(output_dir, policy["source"]))
+        doc.close()
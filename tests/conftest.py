@@ -0,0 +1,12 @@
+import pytest
+
+from app.core.config import settings
+from app.infrastructure import text_chunker
+
+
+@pytest.fixture(autouse=True)
+def approx_tokens(monkeypatch):
+    """Count tokens without loading the embedding model."""
+    monkeypatch.setattr(settings, "CHUNK_TOKENIZER", "approx")
+    monkeypatch.setattr(text_chunker, "_token_counter", None)
+    monkeypatch.setattr(text_chunker, "_token_budget", None)
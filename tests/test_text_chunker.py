@@ -0,0 +1,146 @@
+import pytest
+
+from app.core.config import settings
+from app.infrastructure import embeddings, text_chunker
+from app.infrastructure.text_chunker import approx_token_count, chunk_spans, is_heading, token_budget
+
+
+# ============================================================
+# HEADINGS
+# ============================================================
+
+@pytest.mark.parametrize("line", [
+    "4.2 Exclusions",
+    "1. COVERAGE",
+    "Section 4",
+    "SECTION 4:",
+    "clause 2.1",
+    "GENERAL CONDITIONS",
+    "  WAITING PERIODS  ",
+])
+def test_headings(line):
+    assert is_heading(line)
+
+
+@pytest.mark.parametrize("line", [
+    "the insured person shall be covered for",
+    "hospitalisation expenses incurred by the insured",
+    "30 days after the policy start date",
+    "Room rent is capped at 1% of the sum insured.",
+    "Exclusions",
+    "A",
+])
+def test_body_lines_are_not_headings(line):
+    assert not is_heading(line)
+
+
+# ============================================================
+# CHUNK BOUNDARIES
+# ============================================================
+
+WRAPPED = (
+    "The insurer will pay for hospitalisation expenses incurred by the\n"
+    "insured person during the policy period, subject to the limits\n"
+    "in the schedule. Room rent is capped at 1% of the sum insured per\n"
+    "day.\n"
+)
+
+
+def test_spans_are_exact_slices():
+    text = "GENERAL CONDITIONS\n" + WRAPPED + "\n4.2 Exclusions\nCosmetic surgery is excluded.\n"
+    for chunk in chunk_spans(text, max_tokens=20, overlap_tokens=5):
+        assert chunk["text"] == text[chunk["start"]:chunk["end"]]
+
+
+def test_wrapped_paragraph_is_not_split_at_line_breaks():
+    chunks = chunk_spans(WRAPPED, max_tokens=200, overlap_tokens=0)
+
+    assert len(chunks) == 1
+    assert chunks[0]["text"] == WRAPPED.strip()
+
+
+def test_chunks_end_on_sentence_boundaries():
+    chunks = chunk_spans(WRAPPED, max_tokens=30, overlap_tokens=0)
+
+    assert len(chunks) == 2
+    assert chunks[0]["text"].endswith("schedule.")
+    assert chunks[1]["text"].startswith("Room rent")
+
+
+def test_chunks_respect_the_token_budget():
+    text = " ".join(f"Clause text number {n} applies." for n in range(200))
+    chunks = chunk_spans(text, max_tokens=32, overlap_tokens=8)
+
+    assert len(chunks) > 1
+    assert all(approx_token_count(c["text"]) <= 32 for c in chunks)
+
+
+def test_overlap_carries_trailing_sentences():
+    text = "First sentence here. Second sentence here. Third sentence here. Fourth sentence here."
+    first, second = chunk_spans(text, max_tokens=8, overlap_tokens=4)[:2]
+
+    assert first["text"].endswith("Second sentence here.")
+    assert second["text"].startswith("Second sentence here.")
+
+
+def test_heading_starts_a_new_chunk_without_overlap():
+    text = "Ambulance cover applies.\n4.2 Exclusions\nCosmetic surgery is excluded.\n"
+    chunks = chunk_spans(text, max_tokens=200, overlap_tokens=50)
+
+    assert [c["text"] for c in chunks] == [
+        "Ambulance cover applies.",
+        "4.2 Exclusions\nCosmetic surgery is excluded."
+    ]
+
+
+def test_heading_like_line_inside_a_sentence_is_body():
+    text = (
+        "Expenses are paid during the policy period subject to\n"
+        "GENERAL CONDITIONS APPLY\n"
+        "and the limits in the schedule.\n"
+    )
+    chunks = chunk_spans(text, max_tokens=200, overlap_tokens=0)
+
+    assert [c["text"] for c in chunks] == [text.strip()]
+
+
+def test_consecutive_headings_stay_with_their_body():
+    text = "Ambulance cover applies.\n\n2. EXCLUSIONS\n2.1 Cosmetic\nCosmetic surgery is excluded.\n"
+    chunks = chunk_spans(text, max_tokens=200, overlap_tokens=0)
+
+    assert [c["text"] for c in chunks] == [
+        "Ambulance cover applies.",
+        "2. EXCLUSIONS\n2.1 Cosmetic\nCosmetic surgery is excluded."
+    ]
+
+
+def test_long_sentence_is_split_at_words():
+    text = " ".join(["word"] * 50) + "."
+    chunks = chunk_spans(text, max_tokens=10, overlap_tokens=0)
+
+    assert all(approx_token_count(c["text"]) <= 10 for c in chunks)
+    assert " ".join(c["text"] for c in chunks) == text
+
+
+# ============================================================
+# TOKEN BUDGET
+# ============================================================
+
+class _Encoder:
+    max_seq_length = 256
+
+
+def test_budget_leaves_room_for_special_tokens(monkeypatch):
+    monkeypatch.setattr(settings, "CHUNK_TOKENIZER", "model")
+    monkeypatch.setattr(settings, "CHUNK_MAX_TOKENS", 256)
+    monkeypatch.setattr(embeddings, "_model", _Encoder())
+
+    assert token_budget() == 254
+
+
+def test_budget_keeps_a_smaller_setting(monkeypatch):
+    monkeypatch.setattr(settings, "CHUNK_TOKENIZER", "model")
+    monkeypatch.setattr(settings, "CHUNK_MAX_TOKENS", 128)
+    monkeypatch.setattr(embeddings, "_model", _Encoder())
+
+    assert token_budget() == 128